@@ -8,16 +8,123 @@ class Settings(BaseSettings):
     gemini_embedding_model: str = "models/embedding-001"
     gemini_generation_model: str = "gemini-2.5-flash"
 
+    # Gemini call governor, shared by embeddings and generation. Set the two
+    # request budgets to a split of the project's quota; 0 leaves one unlimited.
+    # Interactive calls (queries) may also spend spare ingest budget, when ingest
+    # is limited, and get concurrency slots first
+    gemini_interactive_requests_per_minute: float = 0
+    gemini_interactive_burst: int = 20
+    gemini_interactive_max_wait_seconds: float = 10  # then fail fast with 503
+    gemini_ingest_requests_per_minute: float = 0  # uploads and LLM profiles
+    gemini_ingest_burst: int = 20
+    gemini_max_concurrency: int = 16  # Gemini calls in flight at once
+    gemini_breaker_failure_threshold: int = 5  # consecutive failures that open the circuit
+    gemini_breaker_reset_seconds: float = 30  # open time before one probe call is let through
+
+    # Embedding batching
+    embedding_batch_size: int = 100
+    embedding_max_concurrency: int = 4
+    embedding_max_retries: int = 5
+    embedding_retry_base_delay: float = 1.0
+    embedding_retry_max_delay: float = 30.0
+
+    # Embedding cache
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = "./embedding_cache.sqlite3"
+    embedding_cache_max_entries: int = 500_000
+
+    # Background ingestion
+    ingestion_workers: int = 2
+    ingestion_max_pending_jobs: int = 16
+    ingestion_job_retention: int = 1000
+
+    # Archive uploads
+    archive_max_members: int = 1000
+    archive_max_member_bytes: int = 50 * 1024 * 1024
+    archive_max_total_bytes: int = 500 * 1024 * 1024
+    archive_process_workers: int = 2
+    archive_embedding_workers: int = 4
+
     # Chunking parameters
     chunk_size: int = 600
     chunk_overlap: int = 100
 
     # Retrieval parameters
     top_k: int = 5
+    retrieval_mode: str = "vector"  # vector, lexical or hybrid; requests may pick their own
+    hybrid_candidate_multiplier: int = 4
+    hybrid_rrf_k: int = 60
+    context_token_budget: int = 4000  # estimated tokens of retrieved context per prompt
+
+    # Result re-ranking: diversify an oversized candidate pool and/or rank documents instead of chunks
+    retrieval_diversity: str = "none"  # none or mmr
+    mmr_lambda: float = 0.5  # 1 ranks by relevance alone, lower values favour novelty
+    rerank_candidate_pool: int = 50  # chunks retrieved before re-ranking down to top_k
+    group_results_by_document: bool = False  # top_k then counts documents (candidates)
+    document_score_aggregation: str = "max"  # max or sum of a document's chunk scores
+    chunks_per_document: int = 1
+
+    # Batch queries
+    query_batch_max_questions: int = 50
+    query_batch_concurrency: int = 16
+
+    # Document catalog
+    documents_list_max_limit: int = 1000
+    documents_bulk_delete_max: int = 10_000
+
+    # Candidate profiles
+    profile_extractor: str = "rules"  # none, rules or llm (one Gemini call per CV)
+    profile_max_chars: int = 12000  # CV text given to the extractor
+    profiles_search_max_limit: int = 1000
+
+    # Query sessions: follow-ups first re-rank the chunks the session last retrieved
+    session_ttl_seconds: float = 1800  # idle time before a session expires
+    session_max_memory_mb: float = 64  # least recently used sessions are evicted past this
+    session_context_size: int = 30  # chunks kept per session for follow-ups
+    session_reuse_min_score: float = 0.6  # best cached-chunk similarity needed to skip the search
+    session_summary_max_chars: int = 1200  # conversation summary sent with each prompt
+
+    # Answer cache
+    answer_cache_enabled: bool = True
+    answer_cache_max_entries: int = 1000
+    answer_cache_ttl_seconds: float = 3600
+    answer_cache_similarity_threshold: float = 0.95
 
     # ChromaDB
     chromadb_path: str = "./chroma_db"
     collection_name: str = "documents"
+    # Threads for vector-store calls made from async endpoints, so searches
+    # never block the event loop or queue behind other blocking work
+    vector_store_workers: int = 8
+
+    # Vector storage backend: chroma (HNSW) or numpy (exact, memory-mapped)
+    vector_backend: str = "chroma"
+    numpy_index_path: str = "./vector_index"
+    numpy_dtype: str = "float32"  # float32 or float16
+    numpy_segment_rows: int = 50_000
+    numpy_compaction_ratio: float = 0.25
+
+    # Chroma HNSW index. A collection keeps the parameters it was built with;
+    # changing them takes a reindex (POST /index/reindex)
+    hnsw_m: int = 16  # links per node: recall and memory grow with it
+    hnsw_construction_ef: int = 100  # candidate list while building
+    hnsw_search_ef: int = 10  # candidate list while searching (at least the k asked for)
+    reindex_batch_size: int = 1000
+
+    # Vector sharding: by a hash of the document ID, or by category (resume or job description)
+    vector_shards: int = 1  # document sharding only; 1 keeps a single collection
+    vector_shard_by: str = "document"  # document or category
+
+    # Stored chunk text: none or zstd (needs the zstandard package)
+    chunk_text_compression: str = "none"
+    chunk_text_compression_level: int = 3
+
+    # Observability
+    metrics_enabled: bool = True  # stage histograms and counters, served on /metrics
+    debug_timing_enabled: bool = True  # honor the X-Debug-Timing request header
+
+    # Service lifecycle
+    warm_up_on_startup: bool = True
 
     class Config:
         env_file = ".env"
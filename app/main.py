@@ -1,90 +1,117 @@
-from typing import List
-from app.models.schemas import BulkUploadResponse, BulkUploadResult
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+import json
+import math
 import shutil
+import threading
+import time
 from pathlib import Path
 from uuid import uuid4
-import os
 
 
-from app.config import get_settings, Settings
+from app.config import get_settings
 from app.models.schemas import (
-    DocumentUploadResponse,
     QueryRequest,
     QueryResponse,
-    HealthResponse
+    QueryBatchRequest,
+    QueryBatchResponse,
+    QueryBatchResult,
+    SessionCreateRequest,
+    SessionInfo,
+    SessionQueryRequest,
+    SessionQueryResponse,
+    DocumentInfo,
+    DocumentListResponse,
+    DocumentBulkDeleteRequest,
+    DocumentBulkDeleteResponse,
+    CollectionStatsResponse,
+    GeminiStatsResponse,
+    HnswParamsInfo,
+    IndexInfoResponse,
+    ReindexRequest,
+    ReindexStatusInfo,
+    CandidateProfileInfo,
+    ProfileSearchRequest,
+    ProfileSearchResponse,
+    HealthResponse,
+    JobSubmissionResponse,
+    JobStatusResponse,
+    JobFileStatus
 )
 from app.services.document_service import DocumentService
+from app.services.container import ServiceContainer
+from app.services.archive_ingestor import ArchiveIngestor
+from app.services.gemini_governor import GeminiUnavailableError
+from app.services.index_reindexer import IndexReindexer, ReindexInProgressError, ReindexStatus
+from app.services.job_queue import IngestionJobQueue, QueueFullError
+from app.services.session_store import QuerySession, SessionNotFoundError
+from app.services.vector_backends.base import HnswParams
+from app.services.profile_extractor import SECTORS
+from app.services.profile_store import ProfileFilter
+from app.utils.archive_extractor import ArchiveExtractor, COMPRESSED_EXTENSIONS
+from app.utils.text_extractor import SUPPORTED_EXTENSIONS
+from app.utils import metrics
+from app.utils.tracing import TracingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+
+    # Check if API key is configured
+    if not settings.gemini_api_key:
+        print("WARNING API Key")
+    else:
+        print("Gemini API Key configured")
+
+    print(f"ChromaDB path: {settings.chromadb_path}")
+    print(f"Chunk size: {settings.chunk_size}, Overlap: {settings.chunk_overlap}")
+    print(f"Top-K retrieval: {settings.top_k}")
+
+    metrics.set_enabled(settings.metrics_enabled)
+
+    # A container installed before startup (e.g. by a benchmark) is reused as-is
+    container = getattr(app.state, "container", None)
+    if container is None:
+        container = await run_in_threadpool(ServiceContainer, settings)
+        app.state.container = container
+
+    if settings.warm_up_on_startup:
+        try:
+            await run_in_threadpool(container.warm_up)
+            print("Services warmed up")
+        except Exception as e:
+            print(f"WARNING warm-up failed: {str(e)}")
+
+    try:
+        yield
+    finally:
+        await run_in_threadpool(container.shutdown)
+        app.state.container = None
 
 
 # Initialize FastAPI application
 app = FastAPI(
     title="RAG API",
     description="Retrieval-Augmented Generation API using FastAPI, ChromaDB, and Gemini",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.add_middleware(TracingMiddleware, debug_timing=get_settings().debug_timing_enabled)
 
 # Create temp directory for uploads
 UPLOAD_DIR = Path("./uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
-def get_document_service(settings: Settings = Depends(get_settings)) -> DocumentService:
-    return DocumentService(settings)
-
-# Bulk upload endpoint (moved below app initialization)
-@app.post("/documents/bulk_upload", response_model=BulkUploadResponse)
-async def bulk_upload_documents(
-    files: List[UploadFile] = File(...),
-    document_service: DocumentService = Depends(get_document_service)
-):
-    allowed_extensions = {'.pdf', '.txt'}
-    results = []
-    for file in files:
-        file_extension = Path(file.filename).suffix.lower()
-        if file_extension not in allowed_extensions:
-            results.append(BulkUploadResult(
-                document_id=None,
-                filename=file.filename,
-                chunks_created=None,
-                message="Failed",
-                error=f"Unsupported file format. Allowed: {allowed_extensions}"
-            ))
-            continue
-
-        temp_filename = f"{uuid4()}{file_extension}"
-        temp_file_path = UPLOAD_DIR / temp_filename
-        try:
-            with open(temp_file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            document_id, num_chunks = document_service.process_document(
-                file_path=str(temp_file_path),
-                filename=file.filename
-            )
-            results.append(BulkUploadResult(
-                document_id=document_id,
-                filename=file.filename,
-                chunks_created=num_chunks,
-                message="Document uploaded and processed successfully",
-                error=None
-            ))
-        except Exception as e:
-            results.append(BulkUploadResult(
-                document_id=None,
-                filename=file.filename,
-                chunks_created=None,
-                message="Failed",
-                error=str(e)
-            ))
-        finally:
-            if temp_file_path.exists():
-                temp_file_path.unlink()
-    return BulkUploadResponse(results=results)
-
-
-def get_document_service(settings: Settings = Depends(get_settings)) -> DocumentService:
-    return DocumentService(settings)
-
+def get_document_service(request: Request) -> DocumentService:
+    container = getattr(request.app.state, "container", None)
+    if container is None or container.closed:
+        raise HTTPException(status_code=503, detail="Service is not available")
+    return container.document_service
 
 @app.get("/", response_model=HealthResponse)
 async def root():
@@ -102,107 +129,315 @@ async def health_check():
     )
 
 
-@app.post("/documents/upload", response_model=DocumentUploadResponse)
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    if not metrics.enabled():
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def get_job_queue(request: Request) -> IngestionJobQueue:
+    container = getattr(request.app.state, "container", None)
+    if container is None or container.closed:
+        raise HTTPException(status_code=503, detail="Service is not available")
+    return container.job_queue
+
+
+def get_archive_ingestor(request: Request) -> ArchiveIngestor:
+    container = getattr(request.app.state, "container", None)
+    if container is None or container.closed:
+        raise HTTPException(status_code=503, detail="Service is not available")
+    return container.archive_ingestor
+
+
+def get_reindexer(request: Request) -> IndexReindexer:
+    container = getattr(request.app.state, "container", None)
+    if container is None or container.closed:
+        raise HTTPException(status_code=503, detail="Service is not available")
+    return container.reindexer
+
+
+def _check_queue_capacity(job_queue: IngestionJobQueue) -> None:
+    # Reject early rather than writing files we would have to throw away
+    if job_queue.pending_jobs >= job_queue.max_pending_jobs:
+        raise HTTPException(
+            status_code=429,
+            detail="Ingestion queue is full, retry later",
+            headers={"Retry-After": "5"}
+        )
+
+
+def _save_upload(file: UploadFile, extension: str) -> Path:
+    temp_file_path = UPLOAD_DIR / f"{uuid4()}{extension}"
+    with open(temp_file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+    return temp_file_path
+
+
+def _submit_job(
+    job_queue: IngestionJobQueue,
+    saved: List[Tuple[str, str]],
+    rejected: List[Tuple[str, str]],
+    document_id: Optional[str] = None
+) -> JSONResponse:
+    try:
+        job = job_queue.submit(saved, rejected, document_id)
+    except QueueFullError as e:
+        for path, _ in saved:
+            Path(path).unlink(missing_ok=True)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+    response = JobSubmissionResponse(
+        job_id=job.job_id,
+        status=job.status,
+        files_accepted=len(saved),
+        files_rejected=len(rejected),
+        message="Upload accepted for background processing"
+    )
+    return JSONResponse(status_code=202, content=response.model_dump())
+
+
+def _stream_archive(archive_ingestor: ArchiveIngestor, archive_path: Path, filename: str) -> Iterator[str]:
+    try:
+        for result in archive_ingestor.ingest(str(archive_path), filename):
+            yield result.model_dump_json() + "\n"
+    finally:
+        archive_path.unlink(missing_ok=True)
+
+
+@app.post("/documents/upload", response_model=JobSubmissionResponse, status_code=202)
 async def upload_document(
     file: UploadFile = File(...),
-    document_service: DocumentService = Depends(get_document_service)
+    document_id: Optional[str] = Form(None),
+    stream: bool = False,
+    job_queue: IngestionJobQueue = Depends(get_job_queue),
+    archive_ingestor: ArchiveIngestor = Depends(get_archive_ingestor)
 ):
-    # Validate file format
-    import zipfile
-    import tarfile
-    import gzip
-    import tempfile
-    allowed_extensions = {'.pdf', '.txt'}
-    compressed_extensions = {'.zip', '.tar', '.tar.gz', '.tgz', '.gz'}
-    file_extension = Path(file.filename).suffix.lower()
-
-    if file_extension in compressed_extensions:
-        with tempfile.TemporaryDirectory() as extract_dir:
-            temp_path = UPLOAD_DIR / f"{uuid4()}{file_extension}"
-            try:
-                with open(temp_path, "wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-                # Handle .zip
-                if file_extension == '.zip':
-                    with zipfile.ZipFile(temp_path, 'r') as zip_ref:
-                        zip_ref.extractall(extract_dir)
-                # Handle .tar, .tar.gz, .tgz
-                elif file_extension in {'.tar', '.tar.gz', '.tgz'}:
-                    with tarfile.open(temp_path, 'r:*') as tar_ref:
-                        tar_ref.extractall(extract_dir)
-                # Handle .gz (single file)
-                elif file_extension == '.gz':
-                    # Assume the .gz contains a single file
-                    import shutil as sh
-                    base_name = Path(file.filename).stem
-                    out_path = os.path.join(extract_dir, base_name)
-                    with gzip.open(temp_path, 'rb') as f_in, open(out_path, 'wb') as f_out:
-                        sh.copyfileobj(f_in, f_out)
-                else:
-                    raise HTTPException(status_code=400, detail=f"Unsupported compressed file type: {file_extension}")
-
-                results = []
-                for root, _, files in os.walk(extract_dir):
-                    for fname in files:
-                        ext = Path(fname).suffix.lower()
-                        if ext not in allowed_extensions:
-                            results.append({
-                                "filename": fname,
-                                "message": f"Skipped unsupported file type: {ext}"
-                            })
-                            continue
-                        fpath = os.path.join(root, fname)
-                        try:
-                            document_id, num_chunks = document_service.process_document(
-                                file_path=fpath,
-                                filename=fname
-                            )
-                            results.append({
-                                "document_id": document_id,
-                                "filename": fname,
-                                "chunks_created": num_chunks,
-                                "message": "Document uploaded and processed successfully"
-                            })
-                        except Exception as e:
-                            results.append({
-                                "filename": fname,
-                                "message": f"Failed: {str(e)}"
-                            })
-                return JSONResponse(content={"results": results})
-            finally:
-                if temp_path.exists():
-                    temp_path.unlink()
-    elif file_extension in allowed_extensions:
-        # Save uploaded file temporarily
-        temp_filename = f"{uuid4()}{file_extension}"
-        temp_file_path = UPLOAD_DIR / temp_filename
-        try:
-            with open(temp_file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            # Process document
-            document_id, num_chunks = document_service.process_document(
-                file_path=str(temp_file_path),
-                filename=file.filename
-            )
-            return DocumentUploadResponse(
-                document_id=document_id,
-                filename=file.filename,
-                chunks_created=num_chunks,
-                message="Document uploaded and processed successfully"
+    archive_extension = ArchiveExtractor.archive_extension(file.filename)
+    file_extension = archive_extension or Path(file.filename).suffix.lower()
+
+    if file_extension not in SUPPORTED_EXTENSIONS | COMPRESSED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file format. Allowed: {SUPPORTED_EXTENSIONS | COMPRESSED_EXTENSIONS}"
+        )
+
+    if document_id and archive_extension:
+        raise HTTPException(status_code=400, detail="document_id can only be used to replace a single PDF or TXT file")
+
+    # Archives can be processed inline, streaming one NDJSON line per member as it finishes
+    if stream and archive_extension:
+        temp_file_path = await run_in_threadpool(_save_upload, file, file_extension)
+        return StreamingResponse(
+            _stream_archive(archive_ingestor, temp_file_path, file.filename),
+            media_type="application/x-ndjson"
+        )
+
+    _check_queue_capacity(job_queue)
+
+    temp_file_path = await run_in_threadpool(_save_upload, file, file_extension)
+    return _submit_job(job_queue, [(str(temp_file_path), file.filename)], [], document_id)
+
+
+@app.post("/documents/bulk_upload", response_model=JobSubmissionResponse, status_code=202)
+async def bulk_upload_documents(
+    files: List[UploadFile] = File(...),
+    job_queue: IngestionJobQueue = Depends(get_job_queue)
+):
+    _check_queue_capacity(job_queue)
+
+    saved = []
+    rejected = []
+    for file in files:
+        file_extension = Path(file.filename).suffix.lower()
+        if file_extension not in SUPPORTED_EXTENSIONS:
+            rejected.append((file.filename, f"Unsupported file format. Allowed: {SUPPORTED_EXTENSIONS}"))
+            continue
+        temp_file_path = await run_in_threadpool(_save_upload, file, file_extension)
+        saved.append((str(temp_file_path), file.filename))
+
+    return _submit_job(job_queue, saved, rejected)
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(
+    job_id: str,
+    job_queue: IngestionJobQueue = Depends(get_job_queue)
+):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    return JobStatusResponse(
+        job_id=job.job_id,
+        status=job.status,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        total_files=len(job.files),
+        processed_files=job.processed_files,
+        files=[
+            JobFileStatus(
+                filename=f.filename,
+                status=f.status,
+                document_id=f.document_id,
+                chunks_created=f.chunks_created,
+                chunks_reused=f.chunks_reused,
+                chunks_embedded=f.chunks_embedded,
+                duplicate=f.duplicate,
+                error=f.error,
+                started_at=f.started_at,
+                finished_at=f.finished_at,
+                duration_ms=f.duration_ms
             )
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
-        finally:
-            if temp_file_path.exists():
-                temp_file_path.unlink()
-    else:
+            for f in list(job.files)
+        ]
+    )
+
+
+@app.get("/documents", response_model=DocumentListResponse)
+async def list_documents(
+    limit: int = Query(100, ge=1),
+    offset: int = Query(0, ge=0),
+    document_service: DocumentService = Depends(get_document_service)
+):
+    max_limit = document_service.settings.documents_list_max_limit
+    if limit > max_limit:
+        raise HTTPException(status_code=400, detail=f"limit must be at most {max_limit}")
+
+    records, total = await document_service.run_in_vector_pool(document_service.list_documents, limit, offset)
+    return DocumentListResponse(
+        documents=[DocumentInfo(**asdict(record)) for record in records],
+        total=total,
+        limit=limit,
+        offset=offset
+    )
+
+
+@app.get("/documents/{document_id}", response_model=DocumentInfo)
+async def get_document(
+    document_id: str,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    record = await document_service.run_in_vector_pool(document_service.get_document, document_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
+    return DocumentInfo(**asdict(record))
+
+
+@app.get("/documents/{document_id}/profile", response_model=CandidateProfileInfo)
+async def get_document_profile(
+    document_id: str,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    profile = await document_service.run_in_vector_pool(document_service.get_profile, document_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"No candidate profile for document: {document_id}")
+    return CandidateProfileInfo(**asdict(profile))
+
+
+@app.post("/profiles/search", response_model=ProfileSearchResponse)
+async def search_profiles(
+    request: ProfileSearchRequest,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """Filter and rank candidate profiles across the whole corpus, without an LLM call."""
+    max_limit = document_service.settings.profiles_search_max_limit
+    if request.limit > max_limit:
+        raise HTTPException(status_code=400, detail=f"limit must be at most {max_limit}")
+    unknown = [sector for sector in request.sectors if sector.lower().replace(" ", "_") not in SECTORS]
+    if unknown:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported file format. Allowed: {allowed_extensions | compressed_extensions}"
+            detail=f"Unknown sectors: {unknown}. Supported: {list(SECTORS)}"
         )
 
+    filters = ProfileFilter(**request.model_dump(exclude={"sort", "limit", "offset"}))
+    start = time.perf_counter()
+    profiles, total = await document_service.run_in_vector_pool(
+        document_service.search_profiles, filters, request.sort, request.limit, request.offset
+    )
+    return ProfileSearchResponse(
+        profiles=[CandidateProfileInfo(**asdict(profile)) for profile in profiles],
+        total=total,
+        limit=request.limit,
+        offset=request.offset,
+        took_ms=round((time.perf_counter() - start) * 1000, 2)
+    )
+
+
+@app.post("/documents/bulk_delete", response_model=DocumentBulkDeleteResponse)
+async def bulk_delete_documents(
+    request: DocumentBulkDeleteRequest,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    max_ids = document_service.settings.documents_bulk_delete_max
+    if len(request.document_ids) > max_ids:
+        raise HTTPException(status_code=400, detail=f"At most {max_ids} documents per request")
+
+    deleted, not_found = await document_service.run_in_vector_pool(document_service.delete_documents, request.document_ids)
+    return DocumentBulkDeleteResponse(deleted=deleted, not_found=not_found)
+
+
+@app.get("/stats", response_model=CollectionStatsResponse)
+async def collection_stats(document_service: DocumentService = Depends(get_document_service)):
+    stats = await document_service.run_in_vector_pool(document_service.vector_store.get_collection_stats)
+    return CollectionStatsResponse(**stats)
+
+
+@app.get("/gemini", response_model=GeminiStatsResponse)
+async def gemini_stats(document_service: DocumentService = Depends(get_document_service)):
+    return GeminiStatsResponse(**document_service.governor.stats())
+
+
+def _unavailable(e: GeminiUnavailableError) -> HTTPException:
+    # Refused before reaching Gemini: the client should come back later, not report a failure
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(math.ceil(e.retry_after)))})
+
+
+def _params_info(params: Optional[HnswParams]) -> Optional[HnswParamsInfo]:
+    return HnswParamsInfo(**params._asdict()) if params is not None else None
+
+
+def _reindex_info(status: ReindexStatus) -> ReindexStatusInfo:
+    return ReindexStatusInfo(**{**asdict(status), "params": _params_info(status.params)})
+
+
+@app.get("/index", response_model=IndexInfoResponse)
+async def index_info(reindexer: IndexReindexer = Depends(get_reindexer)):
+    params = await run_in_threadpool(reindexer.vector_store.backend.index_params)
+    return IndexInfoResponse(
+        vector_backend=reindexer.settings.vector_backend,
+        params=_params_info(params),
+        configured=_params_info(HnswParams.from_settings(reindexer.settings)),
+        reindex=_reindex_info(reindexer.status())
+    )
+
+
+@app.post("/index/reindex", response_model=ReindexStatusInfo, status_code=202)
+async def reindex(request: ReindexRequest, reindexer: IndexReindexer = Depends(get_reindexer)):
+    """Rebuild the vector index with new HNSW parameters; poll GET /index for progress."""
+    configured = HnswParams.from_settings(reindexer.settings)
+    params = configured._replace(**request.model_dump(exclude_none=True))
+    try:
+        status = reindexer.start(params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ReindexInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _reindex_info(status)
+
+
+@app.delete("/documents/{document_id}")
+async def delete_document(
+    document_id: str,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    deleted = await document_service.run_in_vector_pool(document_service.delete_document, document_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
+    return {"document_id": document_id, "message": "Document deleted"}
+
 
 @app.post("/documents/query", response_model=QueryResponse)
 async def query_documents(
@@ -210,31 +445,159 @@ async def query_documents(
     document_service: DocumentService = Depends(get_document_service)
 ):
     try:
-        response = document_service.query_documents(
+        response = await document_service.query_documents_async(
             question=query.question,
-            document_id=query.document_id
+            document_id=query.document_id,
+            retrieval_mode=query.retrieval_mode
         )
         return response
 
+    except GeminiUnavailableError as e:
+        raise _unavailable(e)
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
 
-@app.on_event("startup")
-async def startup_event():
-    settings = get_settings()
+@app.post("/documents/query_batch", response_model=QueryBatchResponse)
+async def query_documents_batch(
+    query: QueryBatchRequest,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    max_questions = document_service.settings.query_batch_max_questions
+    if len(query.questions) > max_questions:
+        raise HTTPException(status_code=400, detail=f"At most {max_questions} questions per batch")
 
-    # Check if API key is configured
-    if not settings.gemini_api_key:
-        print("WARNING API Key")
-    else:
-        print("Gemini API Key configured")
+    start = time.perf_counter()
+    try:
+        results = await run_in_threadpool(
+            document_service.query_batch,
+            query.questions,
+            query.document_id,
+            query.retrieval_mode
+        )
+    except GeminiUnavailableError as e:
+        raise _unavailable(e)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
-    print(f"ChromaDB path: {settings.chromadb_path}")
-    print(f"Chunk size: {settings.chunk_size}, Overlap: {settings.chunk_overlap}")
-    print(f"Top-K retrieval: {settings.top_k}")
+    return QueryBatchResponse(
+        results=[
+            QueryBatchResult(question=question, response=response, error=error)
+            for question, (response, error) in zip(query.questions, results)
+        ],
+        total_ms=round((time.perf_counter() - start) * 1000, 2)
+    )
+
+
+def _session_info(session: QuerySession) -> SessionInfo:
+    return SessionInfo(
+        session_id=session.session_id,
+        document_id=session.document_id,
+        turns=session.turns,
+        searches=session.searches,
+        cached_chunks=len(session.chunk_ids),
+        document_ids=session.document_ids,
+        summary=session.summary,
+        expires_in_seconds=round(max(0.0, session.expires_at - time.monotonic()), 1)
+    )
+
+
+@app.post("/sessions", response_model=SessionInfo, status_code=201)
+async def create_session(
+    request: SessionCreateRequest,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    return _session_info(document_service.create_session(request.document_id))
+
+
+@app.get("/sessions/{session_id}", response_model=SessionInfo)
+async def get_session(
+    session_id: str,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    try:
+        return _session_info(document_service.get_session(session_id))
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(
+    session_id: str,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    if not document_service.delete_session(session_id):
+        raise HTTPException(status_code=404, detail=f"Session not found or expired: {session_id}")
+    return {"session_id": session_id, "message": "Session deleted"}
+
+
+@app.post("/sessions/{session_id}/query", response_model=SessionQueryResponse)
+async def query_session(
+    session_id: str,
+    query: SessionQueryRequest,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    try:
+        return await run_in_threadpool(
+            document_service.query_session,
+            session_id,
+            query.question,
+            query.retrieval_mode
+        )
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except GeminiUnavailableError as e:
+        raise _unavailable(e)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/documents/query/stream")
+async def query_documents_stream(
+    query: QueryRequest,
+    request: Request,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    cancelled = threading.Event()
+    events = document_service.stream_query(
+        question=query.question,
+        document_id=query.document_id,
+        cancelled=cancelled,
+        retrieval_mode=query.retrieval_mode
+    )
+
+    async def event_source() -> AsyncIterator[str]:
+        try:
+            async for event, data in iterate_in_threadpool(events):
+                if await request.is_disconnected():
+                    break
+                yield _sse(event, data)
+        except RuntimeError as e:
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            # Stop generation when the client goes away. If a worker thread is
+            # still inside the generator, it sees the flag at the next token.
+            cancelled.set()
+            try:
+                events.close()
+            except ValueError:
+                pass
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from uuid import uuid4
 
 
@@ -13,11 +13,18 @@ class DocumentUploadResponse(BaseModel):
 class QueryRequest(BaseModel):
     question: str = Field(..., min_length=1, description="User question")
     document_id: Optional[str] = Field(None, description="Optional document ID to filter search")
+    retrieval_mode: Optional[Literal["vector", "lexical", "hybrid"]] = Field(
+        None,
+        description="vector, lexical (BM25, no embedding call) or hybrid; defaults to the configured mode"
+    )
 
 
 class SourceChunk(BaseModel):
     chunk_id: str
     similarity_score: float
+    fused_score: Optional[float] = Field(
+        None, description="Hybrid retrieval only: the reciprocal-rank fusion score the chunks are ranked by"
+    )
     text: str
 
 
@@ -25,6 +32,190 @@ class QueryResponse(BaseModel):
     answer: str = Field(..., description="Generated answer from the RAG system")
     source_chunks: List[SourceChunk] = Field(..., description="Source chunks used for generation")
     document_ids: List[str] = Field(..., description="Document IDs from which context was retrieved")
+    cached: bool = Field(False, description="Whether the answer was served from the answer cache")
+    prompt_tokens: Optional[int] = Field(None, description="Estimated prompt tokens sent to the LLM")
+
+
+class QueryBatchRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, description="Questions to answer against the same scope")
+    document_id: Optional[str] = Field(None, description="Optional document ID to filter search")
+    retrieval_mode: Optional[Literal["vector", "lexical", "hybrid"]] = Field(
+        None,
+        description="vector, lexical (BM25, no embedding call) or hybrid; defaults to the configured mode"
+    )
+
+
+class QueryBatchResult(BaseModel):
+    question: str
+    response: Optional[QueryResponse] = Field(None, description="Answer, or null if this question failed")
+    error: Optional[str] = None
+
+
+class QueryBatchResponse(BaseModel):
+    results: List[QueryBatchResult] = Field(..., description="One result per question, in request order")
+    total_ms: float
+
+
+class SessionCreateRequest(BaseModel):
+    document_id: Optional[str] = Field(None, description="Optional document ID every turn of the session searches within")
+
+
+class SessionInfo(BaseModel):
+    session_id: str
+    document_id: Optional[str] = None
+    turns: int
+    searches: int = Field(..., description="Turns that ran a full search instead of re-ranking cached chunks")
+    cached_chunks: int = Field(..., description="Chunks kept from the last search for follow-up questions")
+    document_ids: List[str] = Field(..., description="Documents the cached chunks come from")
+    summary: str = Field(..., description="Rolling summary of earlier turns sent with each prompt")
+    expires_in_seconds: float
+
+
+class SessionQueryRequest(BaseModel):
+    question: str = Field(..., min_length=1, description="User question; may refer back to earlier turns")
+    retrieval_mode: Optional[Literal["vector", "lexical", "hybrid"]] = Field(
+        None,
+        description="vector, lexical (BM25, no embedding call) or hybrid; defaults to the configured mode"
+    )
+
+
+class SessionQueryResponse(QueryResponse):
+    session_id: str
+    turn: int
+    context_reused: bool = Field(..., description="Whether the session's cached chunks answered without a search")
+    summary: str
+
+
+class DocumentInfo(BaseModel):
+    document_id: str
+    filename: Optional[str] = Field(None, description="Original filename; unknown for documents ingested before the catalog")
+    content_hash: Optional[str] = None
+    chunk_count: int
+    byte_size: Optional[int] = Field(None, description="Size of the uploaded file in bytes")
+    ingested_at: float = Field(..., description="Unix time of the last (re-)ingest")
+    state: str = Field("ready", description="ready, or ingesting/deleting while a write is under way")
+
+
+class DocumentListResponse(BaseModel):
+    documents: List[DocumentInfo] = Field(..., description="Newest first")
+    total: int
+    limit: int
+    offset: int
+
+
+class DocumentBulkDeleteRequest(BaseModel):
+    document_ids: List[str] = Field(..., min_length=1, description="Documents to delete")
+
+
+class DocumentBulkDeleteResponse(BaseModel):
+    deleted: List[str]
+    not_found: List[str]
+
+
+class CandidateProfileInfo(BaseModel):
+    document_id: str
+    name: Optional[str] = None
+    years_experience: Optional[float] = Field(None, description="Total years of experience")
+    location: Optional[str] = None
+    sectors: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Sector -> years in roles mentioning it; 0 when mentioned without dates"
+    )
+    skills: List[str] = Field(default_factory=list)
+    certifications: List[str] = Field(default_factory=list)
+    extractor: str = Field(..., description="rules or llm")
+    extracted_at: float
+
+
+class ProfileSearchRequest(BaseModel):
+    min_years_experience: Optional[float] = Field(None, ge=0)
+    max_years_experience: Optional[float] = Field(None, ge=0)
+    sectors: List[str] = Field(default_factory=list, description="Every listed sector is required")
+    min_sector_years: Optional[float] = Field(None, ge=0, description="Minimum years in each listed sector")
+    skills: List[str] = Field(default_factory=list, description="Every listed skill is required")
+    certifications: List[str] = Field(default_factory=list, description="Every listed certification is required")
+    location: Optional[str] = Field(None, description="Case-insensitive substring of the location")
+    name: Optional[str] = Field(None, description="Case-insensitive substring of the name")
+    sort: Literal["experience", "name", "recent"] = Field(
+        "experience",
+        description="experience ranks by years in the listed sectors, then total years"
+    )
+    limit: int = Field(50, ge=1)
+    offset: int = Field(0, ge=0)
+
+
+class ProfileSearchResponse(BaseModel):
+    profiles: List[CandidateProfileInfo]
+    total: int = Field(..., description="Profiles matching the filters")
+    limit: int
+    offset: int
+    took_ms: float
+
+
+class CollectionStatsResponse(BaseModel):
+    total_chunks: int
+    total_documents: int
+    total_bytes: int = Field(..., description="Sum of uploaded file sizes known to the catalog")
+    collection_name: str
+    vector_backend: str
+    shards: Optional[Dict[str, int]] = Field(None, description="Chunks per shard, when the store is sharded")
+    total_profiles: int = Field(0, description="Documents with an extracted candidate profile")
+
+
+class HnswParamsInfo(BaseModel):
+    m: int = Field(..., description="Links per node")
+    construction_ef: int = Field(..., description="Candidate list size while building")
+    search_ef: int = Field(..., description="Candidate list size while searching")
+
+
+class ReindexRequest(BaseModel):
+    m: Optional[int] = Field(None, ge=2, description="Defaults to HNSW_M")
+    construction_ef: Optional[int] = Field(None, ge=1, description="Defaults to HNSW_CONSTRUCTION_EF")
+    search_ef: Optional[int] = Field(None, ge=1, description="Defaults to HNSW_SEARCH_EF")
+
+
+class ReindexStatusInfo(BaseModel):
+    status: str = Field(..., description="idle, running, completed or failed")
+    params: Optional[HnswParamsInfo] = Field(None, description="Parameters of the latest reindex")
+    copied_chunks: int = 0
+    total_chunks: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+class IndexInfoResponse(BaseModel):
+    vector_backend: str
+    params: Optional[HnswParamsInfo] = Field(
+        None, description="Parameters the live index was built with; null for exact search"
+    )
+    configured: HnswParamsInfo = Field(..., description="HNSW_* settings, used for new collections")
+    reindex: ReindexStatusInfo
+
+
+class GeminiBudgetInfo(BaseModel):
+    requests_per_minute: float = Field(..., description="0 when unlimited")
+    tokens_available: Optional[float] = Field(None, description="Requests that can start right now; null when unlimited")
+    queue_depth: int = Field(..., description="Calls waiting for a token or a concurrency slot")
+    admitted: int
+    throttled: int = Field(..., description="Calls failed after waiting longer than the budget allows")
+    mean_wait_ms: float = Field(..., description="Over the most recent admitted calls")
+    p95_wait_ms: float
+    max_wait_ms: float
+
+
+class GeminiCircuitInfo(BaseModel):
+    state: Literal["closed", "open", "half_open"]
+    consecutive_failures: int
+    times_opened: int
+
+
+class GeminiStatsResponse(BaseModel):
+    budgets: Dict[str, GeminiBudgetInfo] = Field(..., description="interactive and ingest")
+    in_flight: int
+    max_concurrency: int
+    circuit: GeminiCircuitInfo
+    coalesced: Dict[str, int] = Field(..., description="Calls that shared an identical in-flight call, by API")
 
 
 class HealthResponse(BaseModel):
@@ -32,14 +223,34 @@ class HealthResponse(BaseModel):
     message: str
 
 
-# Bulk upload response model
-class BulkUploadResult(BaseModel):
-    document_id: Optional[str]
-    filename: str
-    chunks_created: Optional[int]
+class JobSubmissionResponse(BaseModel):
+    job_id: str = Field(..., description="Identifier to poll at /jobs/{job_id}")
+    status: str = Field(..., description="Job status at submission time")
+    files_accepted: int = Field(..., description="Number of files queued for processing")
+    files_rejected: int = Field(..., description="Number of files rejected before queueing")
     message: str
+
+
+class JobFileStatus(BaseModel):
+    filename: str
+    status: str = Field(..., description="pending, processing, completed, failed or skipped")
+    document_id: Optional[str] = None
+    chunks_created: Optional[int] = None
+    chunks_reused: Optional[int] = Field(None, description="Chunks whose stored embedding was reused")
+    chunks_embedded: Optional[int] = Field(None, description="Chunks that were (re-)embedded")
+    duplicate: bool = Field(False, description="Identical content was already ingested")
     error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    duration_ms: Optional[float] = None
 
 
-class BulkUploadResponse(BaseModel):
-    results: List[BulkUploadResult]
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str = Field(..., description="queued, running, completed, completed_with_errors or failed")
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    total_files: int
+    processed_files: int
+    files: List[JobFileStatus]
@@ -0,0 +1,164 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.schemas import QueryResponse
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s?.!]+$")
+
+
+@dataclass
+class _Entry:
+    scope: Optional[str]
+    mode: str
+    embedding: Optional[np.ndarray]
+    response: QueryResponse
+    expires_at: float
+
+
+class AnswerCache:
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600, similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Optional[str], str], _Entry]" = OrderedDict()
+        # Per-(scope, mode) (keys, stacked embeddings), rebuilt lazily after any change
+        self._matrices: Dict[Tuple[Optional[str], str], Tuple[List, np.ndarray]] = {}
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        return _TRAILING_PUNCTUATION.sub("", " ".join(question.lower().split()))
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _hit(self, key: Tuple[str, Optional[str], str], entry: _Entry) -> QueryResponse:
+        self._entries.move_to_end(key)
+        return entry.response.model_copy(update={"cached": True})
+
+    def _remove(self, key: Tuple[str, Optional[str], str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._matrices.pop((entry.scope, entry.mode), None)
+
+    def get_exact(
+        self,
+        question: str,
+        document_id: Optional[str] = None,
+        mode: str = ""
+    ) -> Optional[QueryResponse]:
+        key = (self.normalize(question), document_id, mode)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self.exact_hits += 1
+            return self._hit(key, entry)
+
+    def get_similar(
+        self,
+        embedding: List[float],
+        document_id: Optional[str] = None,
+        mode: str = ""
+    ) -> Optional[QueryResponse]:
+        query = self._unit(embedding)
+        with self._lock:
+            matrix = self._matrices.get((document_id, mode))
+            if matrix is None:
+                keys = [
+                    key for key, entry in self._entries.items()
+                    if entry.scope == document_id and entry.mode == mode and entry.embedding is not None
+                ]
+                if keys:
+                    matrix = (keys, np.stack([self._entries[key].embedding for key in keys]))
+                    self._matrices[(document_id, mode)] = matrix
+
+            if matrix is None or matrix[1].shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            keys, vectors = matrix
+            scores = vectors @ query
+            now = time.monotonic()
+            # Best non-expired neighbour above the threshold
+            for i in np.argsort(-scores):
+                if scores[i] < self.similarity_threshold:
+                    break
+                entry = self._entries[keys[i]]
+                if entry.expires_at >= now:
+                    self.semantic_hits += 1
+                    return self._hit(keys[i], entry)
+
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        question: str,
+        document_id: Optional[str],
+        embedding: Optional[List[float]],
+        response: QueryResponse,
+        mode: str = ""
+    ) -> None:
+        if self.max_entries <= 0:
+            return
+
+        key = (self.normalize(question), document_id, mode)
+        entry = _Entry(
+            scope=document_id,
+            mode=mode,
+            embedding=self._unit(embedding) if embedding is not None else None,
+            response=response,
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._matrices.pop((document_id, mode), None)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_document(self, document_id: str) -> None:
+        self.invalidate_documents([document_id])
+
+    def invalidate_documents(self, document_ids: List[str]) -> None:
+        # Corpus-wide answers and answers scoped to these documents may now be stale
+        scopes = set(document_ids)
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if entry.scope is None or entry.scope in scopes
+            ]
+            for key in stale:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses
+            }
@@ -0,0 +1,179 @@
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional
+from app.config import Settings
+from app.models.schemas import JobFileStatus
+from app.services.document_service import DocumentService, IngestResult
+from app.utils.archive_extractor import ArchiveExtractor, extract_and_chunk
+from app.utils.chunker import Chunk
+from app.utils.hashing import sha256_bytes
+from app.utils.text_extractor import SUPPORTED_EXTENSIONS
+
+_DONE = object()
+
+
+class ArchiveIngestor:
+    def __init__(self, settings: Settings, document_service: DocumentService):
+        self.settings = settings
+        self.document_service = document_service
+        self.extractor = ArchiveExtractor(
+            max_members=settings.archive_max_members,
+            max_member_bytes=settings.archive_max_member_bytes,
+            max_total_bytes=settings.archive_max_total_bytes
+        )
+        self.process_workers = max(1, settings.archive_process_workers)
+        self._embed_pool = ThreadPoolExecutor(
+            max_workers=max(1, settings.archive_embedding_workers),
+            thread_name_prefix="archive-embed"
+        )
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._closed = False
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        # Created lazily; spawn avoids forking a process that holds gRPC/SQLite threads
+        with self._pool_lock:
+            if self._closed:
+                raise RuntimeError("Archive ingestor is closed")
+            # A worker that crashed (or was OOM-killed) breaks the whole pool for good
+            if self._process_pool is not None and getattr(self._process_pool, "_broken", False):
+                self._process_pool.shutdown(wait=False)
+                self._process_pool = None
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._process_pool
+
+    def close(self) -> None:
+        self._embed_pool.shutdown(wait=True)
+        with self._pool_lock:
+            self._closed = True
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=True)
+                self._process_pool = None
+
+    @staticmethod
+    def _completed(name: str, result: IngestResult, started_at: float) -> JobFileStatus:
+        finished_at = time.time()
+        return JobFileStatus(
+            filename=name,
+            status="completed",
+            document_id=result.document_id,
+            chunks_created=result.chunks_created,
+            chunks_reused=result.chunks_reused,
+            chunks_embedded=result.chunks_embedded,
+            duplicate=result.duplicate,
+            started_at=started_at,
+            finished_at=finished_at,
+            duration_ms=round((finished_at - started_at) * 1000, 2)
+        )
+
+    def _store(
+        self,
+        name: str,
+        chunk_future: Future,
+        content_hash: str,
+        byte_size: int,
+        started_at: float
+    ) -> JobFileStatus:
+        try:
+            chunks: List[Chunk] = chunk_future.result()
+            if not chunks:
+                raise ValueError("No chunks generated from document")
+            result = self.document_service.process_chunks(
+                chunks, content_hash, filename=name, byte_size=byte_size
+            )
+            return self._completed(name, result, started_at)
+        except Exception as e:
+            finished_at = time.time()
+            return JobFileStatus(
+                filename=name,
+                status="failed",
+                error=str(e),
+                started_at=started_at,
+                finished_at=finished_at,
+                duration_ms=round((finished_at - started_at) * 1000, 2)
+            )
+
+    def ingest(self, archive_path: str, filename: str) -> Iterator[JobFileStatus]:
+        # Yields one status per archive member, in completion order
+        results: "queue.Queue" = queue.Queue()
+        # Bound the number of members held in memory between reading and storing
+        in_flight = threading.BoundedSemaphore(self.process_workers * 2)
+
+        def finish(future: Future) -> None:
+            results.put(future.result())
+            in_flight.release()
+
+        def hand_off(chunk_future: Future, name: str, content_hash: str, byte_size: int, started_at: float) -> None:
+            try:
+                self._embed_pool.submit(
+                    self._store, name, chunk_future, content_hash, byte_size, started_at
+                ).add_done_callback(finish)
+            except Exception as e:
+                results.put(JobFileStatus(filename=name, status="failed", error=str(e)))
+                in_flight.release()
+
+        def read_members() -> None:
+            try:
+                for name, data in self.extractor.iter_members(archive_path, filename):
+                    ext = Path(name).suffix.lower()
+                    if ext not in SUPPORTED_EXTENSIONS:
+                        results.put(JobFileStatus(
+                            filename=name,
+                            status="skipped",
+                            error=f"Skipped unsupported file type: {ext}"
+                        ))
+                        continue
+
+                    # Members already ingested skip extraction entirely
+                    started_at = time.time()
+                    content_hash = sha256_bytes(data)
+                    duplicate = self.document_service.find_duplicate(content_hash)
+                    if duplicate:
+                        results.put(self._completed(name, duplicate, started_at))
+                        continue
+
+                    in_flight.acquire()
+                    try:
+                        # Fetched per member so a pool broken by a crashed worker is replaced
+                        chunk_future = self._get_process_pool().submit(
+                            extract_and_chunk,
+                            data,
+                            name,
+                            self.settings.chunk_size,
+                            self.settings.chunk_overlap
+                        )
+                    except Exception as e:
+                        # Nothing will call hand_off for this member: give its slot back here
+                        in_flight.release()
+                        results.put(JobFileStatus(filename=name, status="failed", error=str(e)))
+                        continue
+                    chunk_future.add_done_callback(
+                        lambda f, name=name, content_hash=content_hash, size=len(data), started_at=started_at:
+                        hand_off(f, name, content_hash, size, started_at)
+                    )
+            except Exception as e:
+                results.put(JobFileStatus(filename=filename, status="failed", error=str(e)))
+            finally:
+                # Wait for every submitted member before signalling completion. Every
+                # acquired slot is released exactly once (finish, hand_off or the
+                # submit failure above), so taking them all back cannot block forever
+                for _ in range(self.process_workers * 2):
+                    in_flight.acquire()
+                results.put(_DONE)
+
+        reader = threading.Thread(target=read_members, name="archive-reader", daemon=True)
+        reader.start()
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            yield item
+        reader.join()
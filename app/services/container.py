@@ -0,0 +1,37 @@
+import threading
+from typing import Optional
+from app.config import Settings
+from app.services.archive_ingestor import ArchiveIngestor
+from app.services.document_service import DocumentService
+from app.services.index_reindexer import IndexReindexer
+from app.services.job_queue import IngestionJobQueue
+
+
+class ServiceContainer:
+    def __init__(self, settings: Settings, document_service: Optional[DocumentService] = None):
+        self.settings = settings
+        self.document_service = document_service or DocumentService(settings)
+        self.archive_ingestor = ArchiveIngestor(settings, self.document_service)
+        self.job_queue = IngestionJobQueue(settings, self.document_service, self.archive_ingestor)
+        self.reindexer = IndexReindexer(settings, self.document_service.vector_store)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def warm_up(self) -> None:
+        # Open the collection, load the HNSW index and resolve the models so the
+        # first real request does not pay for it.
+        self.document_service.warm_up()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.job_queue.shutdown()
+        self.archive_ingestor.close()
+        self.document_service.close()
+        self.reindexer.shutdown()
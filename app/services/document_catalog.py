@@ -0,0 +1,154 @@
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# A row is written as ingesting before any of the document's chunks, and made
+# ready once they are all stored; deletes mark it deleting before removing the
+# chunks. A row left in either state by a crash is cleaned up at startup.
+STATE_INGESTING = "ingesting"
+STATE_READY = "ready"
+STATE_DELETING = "deleting"
+
+COLUMNS = "document_id, filename, content_hash, chunk_count, byte_size, ingested_at, state"
+
+
+@dataclass
+class DocumentRecord:
+    document_id: str
+    filename: Optional[str]
+    content_hash: Optional[str]
+    chunk_count: int
+    byte_size: Optional[int]
+    ingested_at: float
+    state: str = STATE_READY
+
+
+class DocumentCatalog:
+    """One row per stored document, so listing and lookups never touch the vector store."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "document_id TEXT PRIMARY KEY, filename TEXT, content_hash TEXT, "
+            "chunk_count INTEGER NOT NULL, byte_size INTEGER, ingested_at REAL NOT NULL, "
+            f"state TEXT NOT NULL DEFAULT '{STATE_READY}')"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}
+        if "state" not in columns:
+            # Catalogs from before the state column only ever held finished documents
+            self._conn.execute(f"ALTER TABLE documents ADD COLUMN state TEXT NOT NULL DEFAULT '{STATE_READY}'")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents(content_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_ingested ON documents(ingested_at)")
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def upsert(self, records: Iterable[DocumentRecord]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO documents ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (r.document_id, r.filename, r.content_hash, r.chunk_count, r.byte_size, r.ingested_at, r.state)
+                    for r in records
+                ]
+            )
+            self._conn.commit()
+
+    def mark(self, document_ids: List[str], state: str) -> None:
+        with self._lock:
+            for i in range(0, len(document_ids), 500):
+                batch = document_ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(
+                    f"UPDATE documents SET state = ? WHERE document_id IN ({placeholders})", [state, *batch]
+                )
+            self._conn.commit()
+
+    def unfinished(self) -> List[str]:
+        """Documents whose ingest or delete never completed."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT document_id FROM documents WHERE state != ?", (STATE_READY,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, document_id: str) -> Optional[DocumentRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {COLUMNS} "
+                "FROM documents WHERE document_id = ?",
+                (document_id,)
+            ).fetchone()
+        return DocumentRecord(*row) if row else None
+
+    def get_many(self, document_ids: List[str]) -> Dict[str, DocumentRecord]:
+        records: Dict[str, DocumentRecord] = {}
+        with self._lock:
+            for i in range(0, len(document_ids), 500):
+                batch = document_ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                for row in self._conn.execute(
+                    f"SELECT {COLUMNS} "
+                    f"FROM documents WHERE document_id IN ({placeholders})",
+                    batch
+                ):
+                    records[row[0]] = DocumentRecord(*row)
+        return records
+
+    def find_by_hash(self, content_hash: str, document_id: Optional[str] = None) -> Optional[DocumentRecord]:
+        query = (
+            f"SELECT {COLUMNS} "
+            "FROM documents WHERE content_hash = ? AND state = ?"
+        )
+        params: Tuple = (content_hash, STATE_READY)
+        if document_id:
+            query += " AND document_id = ?"
+            params += (document_id,)
+        with self._lock:
+            row = self._conn.execute(query + " LIMIT 1", params).fetchone()
+        return DocumentRecord(*row) if row else None
+
+    def list(self, limit: int = 100, offset: int = 0) -> Tuple[List[DocumentRecord], int]:
+        # Newest first; the total lets callers page through the rest
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {COLUMNS} "
+                "FROM documents WHERE state = ? ORDER BY ingested_at DESC, document_id LIMIT ? OFFSET ?",
+                (STATE_READY, limit, offset)
+            ).fetchall()
+            total = self._conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE state = ?", (STATE_READY,)
+            ).fetchone()[0]
+        return [DocumentRecord(*row) for row in rows], total
+
+    def remove(self, document_ids: List[str]) -> None:
+        with self._lock:
+            for i in range(0, len(document_ids), 500):
+                batch = document_ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(f"DELETE FROM documents WHERE document_id IN ({placeholders})", batch)
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            documents, chunks, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(chunk_count), 0), COALESCE(SUM(byte_size), 0) "
+                "FROM documents WHERE state = ?",
+                (STATE_READY,)
+            ).fetchone()
+        return {"total_documents": documents, "catalog_chunks": chunks, "total_bytes": size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
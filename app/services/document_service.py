@@ -1,91 +1,989 @@
-from typing import List, Tuple
+import asyncio
+import dataclasses
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
 from pathlib import Path
 from uuid import uuid4
+import numpy as np
 from app.config import Settings
 from app.utils.text_extractor import TextExtractor
-from app.utils.chunker import TextChunker
+from app.utils.chunker import Chunk, TextChunker
 from app.services.embedding_service import EmbeddingService
 from app.services.vector_store import VectorStore
+from app.services.document_catalog import DocumentRecord
 from app.services.llm_service import LLMService
-from app.models.schemas import QueryResponse, SourceChunk
+from app.services.answer_cache import AnswerCache
+from app.services.session_store import QuerySession, SessionStore, blend_query
+from app.services.profile_extractor import CandidateProfile, assemble_text, create_profile_extractor
+from app.services.profile_store import ProfileFilter
+from app.models.schemas import QueryResponse, SessionQueryResponse, SourceChunk
+from app.utils.hashing import sha256_file, sha256_text
+from app.utils.context_packer import ContextPacker
+from app.utils.reranker import ResultReranker
+from app.utils.document_category import detect_category
+from app.utils import metrics, tracing
+
+
+logger = logging.getLogger(__name__)
+
+NO_ANSWER = "I don't know based on the provided context."
+
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+
+T = TypeVar("T")
+
+
+class IngestResult(NamedTuple):
+    document_id: str
+    chunks_created: int
+    chunks_reused: int = 0
+    chunks_embedded: int = 0
+    duplicate: bool = False
+
+
+class Retrieved(NamedTuple):
+    chunk_ids: List[str]
+    texts: List[str]
+    scores: List[float]  # cosine similarity, or BM25 in lexical mode
+    # Hybrid only: the reciprocal-rank fusion score the chunks are ordered by
+    fused_scores: Optional[List[float]] = None
+
+    def take(self, positions: List[int]) -> "Retrieved":
+        return Retrieved(
+            [self.chunk_ids[i] for i in positions],
+            [self.texts[i] for i in positions],
+            [self.scores[i] for i in positions],
+            [self.fused_scores[i] for i in positions] if self.fused_scores is not None else None
+        )
 
 
 class DocumentService:
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        embedding_service: Optional[EmbeddingService] = None,
+        vector_store: Optional[VectorStore] = None,
+        llm_service: Optional[LLMService] = None
+    ):
         self.settings = settings
         self.text_extractor = TextExtractor()
         self.chunker = TextChunker(
             chunk_size=settings.chunk_size,
             overlap=settings.chunk_overlap
         )
-        self.embedding_service = EmbeddingService(settings)
-        self.vector_store = VectorStore(settings)
-        self.llm_service = LLMService(settings)
+        self.embedding_service = embedding_service or EmbeddingService(settings)
+        # Embeddings and generation draw on the same Gemini budgets
+        self.governor = self.embedding_service.governor
+        self.vector_store = vector_store or VectorStore(settings)
+        # Blocking store calls from async code run here, not on the event loop
+        # and not in the default executor shared with everything else
+        self.vector_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.vector_store_workers),
+            thread_name_prefix="vector-store"
+        )
+        self.llm_service = llm_service or LLMService(settings, self.governor)
+        self.context_packer = ContextPacker(token_budget=settings.context_token_budget)
+        self.profile_extractor = create_profile_extractor(settings, self.llm_service.ingest_model)
+        self.reranker = ResultReranker(
+            diversity=settings.retrieval_diversity,
+            mmr_lambda=settings.mmr_lambda,
+            group_by_document=settings.group_results_by_document,
+            aggregation=settings.document_score_aggregation,
+            chunks_per_document=settings.chunks_per_document
+        )
+        self.answer_cache: Optional[AnswerCache] = None
+        if settings.answer_cache_enabled:
+            self.answer_cache = AnswerCache(
+                max_entries=settings.answer_cache_max_entries,
+                ttl_seconds=settings.answer_cache_ttl_seconds,
+                similarity_threshold=settings.answer_cache_similarity_threshold
+            )
+        self.sessions = SessionStore(
+            ttl_seconds=settings.session_ttl_seconds,
+            max_bytes=int(settings.session_max_memory_mb * 1024 * 1024)
+        )
+
+    def warm_up(self) -> None:
+        self.vector_store.warm_up()
+        self.embedding_service.warm_up()
+        self.llm_service.warm_up()
+
+    def close(self) -> None:
+        self.vector_executor.shutdown(wait=True)
+        self.embedding_service.close()
+        self.vector_store.close()
+
+    async def run_in_vector_pool(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Await a blocking vector-store call on the dedicated pool, keeping the request trace."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.vector_executor, tracing.bind(functools.partial(fn, *args, **kwargs)))
+
+    def process_document(
+        self,
+        file_path: str,
+        filename: str,
+        document_id: Optional[str] = None
+    ) -> IngestResult:
+        # Identical content is never processed twice
+        with tracing.span("hash"):
+            content_hash = sha256_file(file_path)
+        duplicate = self.find_duplicate(content_hash, document_id)
+        if duplicate:
+            return duplicate
 
-    def process_document(self, file_path: str, filename: str) -> Tuple[str, int]:
         # Extract file extension
         file_extension = Path(filename).suffix
 
-        # Extract text
-        text = self.text_extractor.extract_text(file_path, file_extension)
+        # Pages are extracted and chunked lazily, so embedding and storing start
+        # before the last page is parsed
+        pages = tracing.timed_iter("extract", self.text_extractor.iter_pages(file_path, file_extension))
+        chunks = tracing.timed_iter("chunk", self.chunker.chunk_pages(pages))
 
-        # Chunk text
-        chunks = self.chunker.chunk_text(text)
+        return self._store_chunks(
+            chunks, content_hash, document_id, filename=filename, byte_size=os.path.getsize(file_path)
+        )
 
-        if not chunks:
-            raise ValueError("No chunks generated from document")
+    def process_chunks(
+        self,
+        chunks: List[Chunk],
+        content_hash: str,
+        document_id: Optional[str] = None,
+        filename: Optional[str] = None,
+        byte_size: Optional[int] = None
+    ) -> IngestResult:
+        return self._store_chunks(iter(chunks), content_hash, document_id, filename=filename, byte_size=byte_size)
 
-        # Generate embeddings
-        embeddings = self.embedding_service.generate_embeddings_batch(chunks)
+    def find_duplicate(self, content_hash: str, document_id: Optional[str] = None) -> Optional[IngestResult]:
+        # When replacing a document, only that document counts as a duplicate
+        existing = self.vector_store.find_document_by_hash(content_hash, document_id)
+        if not existing:
+            return None
+
+        return IngestResult(
+            document_id=existing.document_id,
+            chunks_created=existing.chunk_count,
+            chunks_reused=existing.chunk_count,
+            chunks_embedded=0,
+            duplicate=True
+        )
 
-        # Generate unique document ID
-        document_id = str(uuid4())
+    @staticmethod
+    def _chunk_metadata(chunk: Chunk, chunk_hash: str, content_hash: str, category: str) -> Dict[str, Any]:
+        metadata = {
+            "page_number": chunk.page_number,
+            "chunk_hash": chunk_hash,
+            "content_hash": content_hash,
+            "category": category
+        }
+        # Where the chunk sits in the extracted text; metadata values cannot be None
+        if chunk.start_char is not None and chunk.end_char is not None:
+            metadata["start_char"] = chunk.start_char
+            metadata["end_char"] = chunk.end_char
+        return metadata
+
+    def _store_batch(
+        self,
+        document_id: str,
+        batch: List[Chunk],
+        start_index: int,
+        content_hash: str,
+        reusable: Dict[str, List[float]],
+        category: str
+    ) -> Tuple[int, int]:
+        texts = [chunk.text for chunk in batch]
+        chunk_hashes = [sha256_text(text) for text in texts]
+
+        # Only chunks whose text is new to this document are embedded
+        to_embed = [i for i, h in enumerate(chunk_hashes) if h not in reusable]
+        embeddings = [reusable.get(h) for h in chunk_hashes]
+        if to_embed:
+            with tracing.span("embed"):
+                fresh = self.embedding_service.generate_embeddings_batch([texts[i] for i in to_embed])
+            for i, embedding in zip(to_embed, fresh):
+                embeddings[i] = embedding
 
         # Store in vector database
-        chunk_ids = self.vector_store.add_chunks(
+        with tracing.span("store"):
+            self.vector_store.add_chunks(
+                document_id=document_id,
+                chunks=texts,
+                embeddings=embeddings,
+                start_index=start_index,
+                extra_metadatas=[
+                    self._chunk_metadata(chunk, chunk_hash, content_hash, category)
+                    for chunk, chunk_hash in zip(batch, chunk_hashes)
+                ]
+            )
+
+        return len(batch) - len(to_embed), len(to_embed)
+
+    def _store_chunks(
+        self,
+        chunks: Iterator[Chunk],
+        content_hash: str,
+        document_id: Optional[str] = None,
+        filename: Optional[str] = None,
+        byte_size: Optional[int] = None
+    ) -> IngestResult:
+        # Replacing a document: reuse the embeddings of chunks whose text is
+        # unchanged and drop chunk IDs past the new end of the document
+        existing_ids: List[str] = []
+        existing_indices: List[int] = []
+        existing_metadatas: List[Dict] = []
+        existing_embeddings: List[List[float]] = []
+        existing_texts: List[str] = []
+        reusable: Dict[str, List[float]] = {}
+        previous: Optional[DocumentRecord] = None
+        if document_id:
+            existing_ids, existing_metadatas, existing_embeddings = self.vector_store.get_document_chunks(document_id)
+            if not existing_ids:
+                raise ValueError(f"Document not found: {document_id}")
+            # Kept so a replacement that fails halfway can put the old version back
+            previous = self.vector_store.get_document_record(document_id)
+            texts_by_id = self.vector_store.get_chunk_texts(existing_ids)
+            existing_texts = [texts_by_id.get(cid, "") for cid in existing_ids]
+            for metadata, embedding in zip(existing_metadatas, existing_embeddings):
+                existing_indices.append(metadata.get("chunk_index", 0))
+                if metadata.get("chunk_hash"):
+                    reusable[metadata["chunk_hash"]] = embedding
+        else:
+            # Generate unique document ID
+            document_id = str(uuid4())
+
+        # Enough chunks per flush to keep every embedding worker busy
+        flush_size = max(1, self.settings.embedding_batch_size * self.settings.embedding_max_concurrency)
+        num_chunks = 0
+        reused = 0
+        embedded = 0
+        category = None
+        # Opening text of the document, for the profile extractor
+        profile_pieces: List[Tuple[str, Optional[int], Optional[int]]] = []
+        profile_chars = 0
+
+        record = DocumentRecord(
             document_id=document_id,
-            chunks=chunks,
-            embeddings=embeddings
+            filename=filename,
+            content_hash=content_hash,
+            chunk_count=0,
+            byte_size=byte_size,
+            ingested_at=time.time()
         )
+        # Pending until every chunk is stored, so a crash mid-ingest is cleaned up at startup
+        self.vector_store.begin_document(record)
+        try:
+            # Embed/store one batch in the background while the next one is parsed
+            with ThreadPoolExecutor(max_workers=1) as writer:
+                pending = None
+                for batch in self._batched(chunks, flush_size):
+                    if pending is not None:
+                        batch_reused, batch_embedded = pending.result()
+                        reused += batch_reused
+                        embedded += batch_embedded
+                    if category is None:
+                        # Decided once, from the opening chunks, for the whole document
+                        category = detect_category("\n".join(chunk.text for chunk in batch[:8]))
+                    if self.profile_extractor is not None and profile_chars < self.settings.profile_max_chars:
+                        for chunk in batch:
+                            profile_pieces.append((chunk.text, chunk.start_char, chunk.end_char))
+                            profile_chars += len(chunk.text)
+                    pending = writer.submit(
+                        self._store_batch, document_id, batch, num_chunks, content_hash, reusable, category
+                    )
+                    num_chunks += len(batch)
+                if pending is not None:
+                    batch_reused, batch_embedded = pending.result()
+                    reused += batch_reused
+                    embedded += batch_embedded
+
+            if not num_chunks:
+                raise ValueError("No chunks generated from document")
 
-        return document_id, len(chunks)
+            stale = [cid for cid, index in zip(existing_ids, existing_indices) if index >= num_chunks]
+            self.vector_store.delete_chunks(stale)
+            # Ready once every chunk is stored
+            self.vector_store.register_document(
+                dataclasses.replace(record, chunk_count=num_chunks, ingested_at=time.time())
+            )
+        except Exception:
+            # Do not leave a partially stored new document behind, nor a
+            # replaced one that mixes chunks of both versions
+            if not existing_ids:
+                self.vector_store.delete_document(document_id)
+            else:
+                try:
+                    self.vector_store.restore_chunks(
+                        document_id, existing_ids, existing_texts, existing_embeddings, existing_metadatas, previous
+                    )
+                except Exception:
+                    # Left pending, so the next startup drops the half-replaced document
+                    logger.exception("Could not restore document %s after a failed replacement", document_id)
+            raise
 
-    def query_documents(self, question: str, document_id: str = None) -> QueryResponse:
-        # Generate query embedding
-        query_embedding = self.embedding_service.generate_query_embedding(question)
+        self._extract_profile(document_id, category, profile_pieces)
 
-        # Retrieve relevant chunks
-        chunk_ids, chunk_texts, similarity_scores = self.vector_store.search(
-            query_embedding=query_embedding,
-            top_k=self.settings.top_k,
-            document_id=document_id
+        metrics.DOCUMENTS_INGESTED.inc()
+        metrics.CHUNKS_INGESTED.inc("computed", amount=embedded)
+        metrics.CHUNKS_INGESTED.inc("reused", amount=reused)
+        metrics.DOCUMENT_CHUNKS.observe(num_chunks)
+
+        if self.answer_cache:
+            self.answer_cache.invalidate_document(document_id)
+        self.sessions.invalidate_documents([document_id])
+
+        return IngestResult(
+            document_id=document_id,
+            chunks_created=num_chunks,
+            chunks_reused=reused,
+            chunks_embedded=embedded
         )
 
-        if not chunk_texts:
-            return QueryResponse(
-                answer="I don't know based on the provided context.",
-                source_chunks=[],
-                document_ids=[]
+    def _extract_profile(
+        self,
+        document_id: str,
+        category: Optional[str],
+        pieces: List[Tuple[str, Optional[int], Optional[int]]]
+    ) -> None:
+        if self.profile_extractor is None:
+            return
+        if category != "resume":
+            # Only CVs have a profile; a replaced one may now read as a job description
+            self.vector_store.profiles.remove([document_id])
+            return
+        try:
+            with tracing.span("profile"):
+                text = assemble_text(pieces, self.settings.profile_max_chars)
+                profile = self.profile_extractor.extract(document_id, text)
+        except Exception as e:
+            # The document is stored either way; its profile can be backfilled later
+            logger.warning("Profile extraction failed for %s: %s", document_id, e)
+            return
+        self.vector_store.save_profile(profile)
+
+    @staticmethod
+    def _batched(chunks: Iterator[Chunk], size: int) -> Iterator[List[Chunk]]:
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def list_documents(self, limit: int = 100, offset: int = 0) -> Tuple[List[DocumentRecord], int]:
+        return self.vector_store.list_documents(limit=limit, offset=offset)
+
+    def get_document(self, document_id: str) -> Optional[DocumentRecord]:
+        return self.vector_store.get_document_record(document_id)
+
+    def get_profile(self, document_id: str) -> Optional[CandidateProfile]:
+        return self.vector_store.get_profile(document_id)
+
+    def search_profiles(
+        self,
+        filters: ProfileFilter,
+        sort: str = "experience",
+        limit: int = 50,
+        offset: int = 0
+    ) -> Tuple[List[CandidateProfile], int]:
+        return self.vector_store.search_profiles(filters, sort=sort, limit=limit, offset=offset)
+
+    def delete_document(self, document_id: str) -> bool:
+        deleted, _ = self.delete_documents([document_id])
+        return bool(deleted)
+
+    def delete_documents(self, document_ids: List[str]) -> Tuple[List[str], List[str]]:
+        """Delete documents by ID. Returns (deleted, not_found)."""
+        document_ids = list(dict.fromkeys(document_ids))
+        known = self.vector_store.get_document_records(document_ids)
+        # A document missing from the catalog may still have chunks, e.g. after
+        # an interrupted ingest; those are looked up by ID only
+        deleted = [
+            document_id for document_id in document_ids
+            if document_id in known or self.vector_store.count_document_chunks(document_id)
+        ]
+        found = set(deleted)
+        not_found = [document_id for document_id in document_ids if document_id not in found]
+        if deleted:
+            self.vector_store.delete_documents(deleted)
+            if self.answer_cache:
+                self.answer_cache.invalidate_documents(deleted)
+            self.sessions.invalidate_documents(deleted)
+        return deleted, not_found
+
+    def _cached_answer(
+        self,
+        question: str,
+        document_id: Optional[str],
+        query_embedding: Optional[List[float]] = None,
+        mode: str = ""
+    ) -> Optional[QueryResponse]:
+        if not self.answer_cache:
+            return None
+        # Without an embedding only an exact repeat can match
+        if query_embedding is None:
+            cache = "answer_exact"
+            cached = self.answer_cache.get_exact(question, document_id, mode)
+        else:
+            cache = "answer_similar"
+            cached = self.answer_cache.get_similar(query_embedding, document_id, mode)
+        metrics.CACHE_REQUESTS.inc(cache, "hit" if cached else "miss")
+        return cached
+
+    def _retrieval_mode(self, retrieval_mode: Optional[str]) -> str:
+        mode = retrieval_mode or self.settings.retrieval_mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}. Supported modes: {list(RETRIEVAL_MODES)}")
+        return mode
+
+    @staticmethod
+    def _fuse(rankings: List[List[str]], k: int, top_k: int) -> List[Tuple[str, float]]:
+        # Reciprocal-rank fusion: only ranks matter, so BM25 and cosine scores
+        # never have to be put on the same scale
+        scores: Dict[str, float] = {}
+        for ranking in rankings:
+            for rank, chunk_id in enumerate(ranking, start=1):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def _retrieve(
+        self,
+        question: str,
+        query_embedding: Optional[List[float]],
+        document_id: Optional[str],
+        mode: str
+    ) -> Retrieved:
+        return self._retrieve_many([question], [query_embedding], document_id, mode)[0]
+
+    def _retrieve_many(
+        self,
+        questions: List[str],
+        query_embeddings: List[Optional[List[float]]],
+        document_id: Optional[str],
+        mode: str
+    ) -> List[Retrieved]:
+        top_k = self.settings.top_k
+        if not self.reranker.enabled:
+            with tracing.span("retrieve"):
+                return self._search(questions, query_embeddings, document_id, mode, top_k)
+
+        # Retrieve more than needed, then let the reranker choose among them
+        with tracing.span("retrieve"):
+            pools = self._search(
+                questions, query_embeddings, document_id, mode, max(top_k, self.settings.rerank_candidate_pool)
             )
+        with tracing.span("rerank"):
+            return self._rerank(pools, query_embeddings, top_k)
 
-        # Generate answer using LLM
-        answer = self.llm_service.generate_answer(question, chunk_texts)
+    def _rerank(
+        self,
+        pools: List[Retrieved],
+        query_embeddings: List[Optional[List[float]]],
+        top_k: int
+    ) -> List[Retrieved]:
+        embeddings: Dict[str, Any] = {}
+        if self.reranker.needs_embeddings:
+            # One lookup for every pool of the batch
+            embeddings = self.vector_store.get_chunk_embeddings(
+                list({chunk_id for pool in pools for chunk_id in pool.chunk_ids})
+            )
+
+        results = []
+        for pool, query_embedding in zip(pools, query_embeddings):
+            pool_embeddings = None
+            if embeddings and all(chunk_id in embeddings for chunk_id in pool.chunk_ids):
+                pool_embeddings = np.asarray([embeddings[chunk_id] for chunk_id in pool.chunk_ids], dtype=np.float32)
+            # Without embeddings the reranker falls back on the scores the pool is ranked by
+            scores = pool.fused_scores if pool.fused_scores is not None else pool.scores
+            keep = self.reranker.rerank(pool.chunk_ids, scores, pool_embeddings, top_k, query_embedding)
+            results.append(pool.take(keep))
+        return results
+
+    def _search(
+        self,
+        questions: List[str],
+        query_embeddings: List[Optional[List[float]]],
+        document_id: Optional[str],
+        mode: str,
+        top_k: int
+    ) -> List[Retrieved]:
+        if mode == "lexical":
+            return [
+                Retrieved(*self.vector_store.lexical_search(question, top_k=top_k, document_id=document_id))
+                for question in questions
+            ]
+        if mode == "vector":
+            return [
+                Retrieved(*result)
+                for result in self.vector_store.search_many(query_embeddings, top_k=top_k, document_id=document_id)
+            ]
+
+        pool = top_k * max(1, self.settings.hybrid_candidate_multiplier)
+        vector_results = self.vector_store.search_many(query_embeddings, top_k=pool, document_id=document_id)
+
+        fused_results = []
+        texts: Dict[str, str] = {}
+        similarities: List[Dict[str, float]] = []
+        for question, (vector_ids, vector_texts, vector_scores) in zip(questions, vector_results):
+            lexical_hits = self.vector_store.lexical_index.search(question, top_k=pool, document_id=document_id)
+            fused_results.append(self._fuse(
+                [vector_ids, [chunk_id for chunk_id, _ in lexical_hits]],
+                k=self.settings.hybrid_rrf_k,
+                top_k=top_k
+            ))
+            texts.update(zip(vector_ids, vector_texts))
+            similarities.append(dict(zip(vector_ids, vector_scores)))
+
+        # Vector hits already carry their text and cosine score; look up
+        # lexical-only hits in one call each
+        lexical_only = list({cid for fused in fused_results for cid, _ in fused if cid not in texts})
+        texts.update(self.vector_store.get_chunk_texts(lexical_only))
+        lexical_embeddings = self.vector_store.get_chunk_embeddings(lexical_only)
+        results = []
+        for fused, query_embedding, similarity in zip(fused_results, query_embeddings, similarities):
+            chunk_ids = [cid for cid, _ in fused]
+            missing = [cid for cid in chunk_ids if cid not in similarity and cid in lexical_embeddings]
+            if missing:
+                query = np.asarray(query_embedding, dtype=np.float32)
+                vectors = np.asarray([lexical_embeddings[cid] for cid in missing], dtype=np.float32)
+                cosine = vectors @ query / np.maximum(np.linalg.norm(vectors, axis=1) * np.linalg.norm(query), 1e-12)
+                similarity = {**similarity, **dict(zip(missing, cosine.tolist()))}
+            results.append(Retrieved(
+                chunk_ids,
+                [texts.get(cid, "") for cid in chunk_ids],
+                [similarity.get(cid, 0.0) for cid in chunk_ids],
+                [score for _, score in fused]
+            ))
+        return results
 
+    def _pack_context(
+        self,
+        question: str,
+        chunk_ids: List[str],
+        chunk_texts: List[str],
+        history: Optional[str] = None
+    ) -> Tuple[List[str], int]:
+        # Overlapping neighbours are merged and duplicates dropped before the LLM sees them
+        with tracing.span("pack"):
+            passages = self.context_packer.pack(chunk_ids, chunk_texts)
+            prompt_tokens = self.llm_service.estimate_prompt_tokens(question, passages, history)
+        metrics.PROMPT_TOKENS.observe(prompt_tokens)
+        logger.info(
+            "Packed %d chunks into %d passages, prompt_tokens=%d",
+            len(chunk_texts),
+            len(passages),
+            prompt_tokens
+        )
+        return passages, prompt_tokens
+
+    @staticmethod
+    def _build_sources(retrieved: Retrieved) -> Tuple[List[SourceChunk], List[str]]:
         # Prepare source chunks
+        fused_scores = retrieved.fused_scores or [None] * len(retrieved.chunk_ids)
         source_chunks = [
             SourceChunk(
                 chunk_id=chunk_id,
                 similarity_score=round(score, 4),
+                fused_score=round(fused, 6) if fused is not None else None,
                 text=text[:500]  # Truncate for response size
             )
-            for chunk_id, score, text in zip(chunk_ids, similarity_scores, chunk_texts)
+            for chunk_id, score, fused, text in zip(retrieved.chunk_ids, retrieved.scores, fused_scores, retrieved.texts)
         ]
 
         # Extract unique document IDs
-        doc_ids = list(set([cid.split('_chunk_')[0] for cid in chunk_ids]))
+        doc_ids = list(set([cid.split('_chunk_')[0] for cid in retrieved.chunk_ids]))
+
+        return source_chunks, doc_ids
+
+    def query_documents(
+        self,
+        question: str,
+        document_id: str = None,
+        retrieval_mode: Optional[str] = None
+    ) -> QueryResponse:
+        mode = self._retrieval_mode(retrieval_mode)
+
+        # Exact repeat of a recent question: no embedding, search or generation
+        cached = self._cached_answer(question, document_id, mode=mode)
+        if cached:
+            return cached
+
+        # Lexical retrieval needs no query embedding at all
+        query_embedding = None
+        if mode != "lexical":
+            with tracing.span("embed_query"):
+                query_embedding = self.embedding_service.generate_query_embedding(question)
+
+            # Reworded repeat: nearest cached question above the similarity threshold
+            cached = self._cached_answer(question, document_id, query_embedding, mode)
+            if cached:
+                return cached
+
+        # Retrieve relevant chunks
+        retrieved = self._retrieve(question, query_embedding, document_id, mode)
+        chunk_ids, chunk_texts = retrieved.chunk_ids, retrieved.texts
+
+        if not chunk_texts:
+            return QueryResponse(
+                answer=NO_ANSWER,
+                source_chunks=[],
+                document_ids=[]
+            )
+
+        # Generate answer using LLM
+        passages, prompt_tokens = self._pack_context(question, chunk_ids, chunk_texts)
+        with tracing.span("generate"):
+            answer = self.llm_service.generate_answer(question, passages)
+
+        source_chunks, doc_ids = self._build_sources(retrieved)
+
+        response = QueryResponse(
+            answer=answer,
+            source_chunks=source_chunks,
+            document_ids=doc_ids,
+            prompt_tokens=prompt_tokens
+        )
+
+        if self.answer_cache:
+            self.answer_cache.put(question, document_id, query_embedding, response, mode)
+
+        return response
+
+    async def query_documents_async(
+        self,
+        question: str,
+        document_id: str = None,
+        retrieval_mode: Optional[str] = None
+    ) -> QueryResponse:
+        """``query_documents`` for the event loop: Gemini is awaited, Chroma runs on the vector pool."""
+        mode = self._retrieval_mode(retrieval_mode)
+
+        cached = self._cached_answer(question, document_id, mode=mode)
+        if cached:
+            return cached
+
+        query_embedding = None
+        if mode != "lexical":
+            with tracing.async_span("embed_query"):
+                query_embedding = await self.embedding_service.generate_query_embedding_async(question)
+
+            cached = self._cached_answer(question, document_id, query_embedding, mode)
+            if cached:
+                return cached
+
+        retrieved = await self.run_in_vector_pool(self._retrieve, question, query_embedding, document_id, mode)
+        chunk_ids, chunk_texts = retrieved.chunk_ids, retrieved.texts
+
+        if not chunk_texts:
+            return QueryResponse(
+                answer=NO_ANSWER,
+                source_chunks=[],
+                document_ids=[]
+            )
+
+        passages, prompt_tokens = self._pack_context(question, chunk_ids, chunk_texts)
+        with tracing.async_span("generate"):
+            answer = await self.llm_service.generate_answer_async(question, passages)
+
+        source_chunks, doc_ids = self._build_sources(retrieved)
+
+        response = QueryResponse(
+            answer=answer,
+            source_chunks=source_chunks,
+            document_ids=doc_ids,
+            prompt_tokens=prompt_tokens
+        )
+
+        if self.answer_cache:
+            self.answer_cache.put(question, document_id, query_embedding, response, mode)
 
-        return QueryResponse(
+        return response
+
+    def query_batch(
+        self,
+        questions: List[str],
+        document_id: str = None,
+        retrieval_mode: Optional[str] = None
+    ) -> List[Tuple[Optional[QueryResponse], Optional[str]]]:
+        # Returns (response, error) per question, in input order. Embedding and
+        # search run once for the whole batch; only generation is per question.
+        mode = self._retrieval_mode(retrieval_mode)
+        results: List[Tuple[Optional[QueryResponse], Optional[str]]] = [(None, None)] * len(questions)
+
+        pending = []
+        for i, question in enumerate(questions):
+            cached = self._cached_answer(question, document_id, mode=mode)
+            if cached:
+                results[i] = (cached, None)
+            else:
+                pending.append(i)
+
+        embeddings: Dict[int, Optional[List[float]]] = {i: None for i in pending}
+        if pending and mode != "lexical":
+            with tracing.span("embed_query"):
+                fresh = self.embedding_service.generate_query_embeddings([questions[i] for i in pending])
+            still_pending = []
+            for i, embedding in zip(pending, fresh):
+                embeddings[i] = embedding
+                cached = self._cached_answer(questions[i], document_id, embedding, mode)
+                if cached:
+                    results[i] = (cached, None)
+                else:
+                    still_pending.append(i)
+            pending = still_pending
+
+        if not pending:
+            return results
+
+        retrieved = dict(zip(pending, self._retrieve_many(
+            [questions[i] for i in pending], [embeddings[i] for i in pending], document_id, mode
+        )))
+
+        def answer(i: int) -> Tuple[Optional[QueryResponse], Optional[str]]:
+            chunk_ids, chunk_texts = retrieved[i].chunk_ids, retrieved[i].texts
+            if not chunk_texts:
+                return QueryResponse(answer=NO_ANSWER, source_chunks=[], document_ids=[]), None
+            passages, prompt_tokens = self._pack_context(questions[i], chunk_ids, chunk_texts)
+            try:
+                with tracing.span("generate"):
+                    text = self.llm_service.generate_answer(questions[i], passages)
+            except RuntimeError as e:
+                return None, str(e)
+            source_chunks, doc_ids = self._build_sources(retrieved[i])
+            response = QueryResponse(
+                answer=text,
+                source_chunks=source_chunks,
+                document_ids=doc_ids,
+                prompt_tokens=prompt_tokens
+            )
+            if self.answer_cache:
+                self.answer_cache.put(questions[i], document_id, embeddings[i], response, mode)
+            return response, None
+
+        # Generations run side by side, so the batch takes about as long as its slowest answer
+        workers = max(1, min(self.settings.query_batch_concurrency, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query-batch") as executor:
+            for i, result in zip(pending, executor.map(tracing.bind(answer), pending)):
+                results[i] = result
+
+        return results
+
+    def create_session(self, document_id: Optional[str] = None) -> QuerySession:
+        return self.sessions.create(document_id)
+
+    def get_session(self, session_id: str) -> QuerySession:
+        return self.sessions.get(session_id)
+
+    def delete_session(self, session_id: str) -> bool:
+        return self.sessions.delete(session_id)
+
+    def _session_context(
+        self,
+        session: QuerySession,
+        query_embedding: List[float]
+    ) -> Optional[Retrieved]:
+        """The session's cached chunks best matching the query, or None if even the best scores too low."""
+        if session.embeddings is None or not len(session.embeddings):
+            return None
+        with tracing.span("rerank"):
+            query = np.asarray(query_embedding, dtype=np.float32)
+            scores = session.embeddings @ (query / (np.linalg.norm(query) or 1.0))
+            order = np.argsort(-scores)[:self.settings.top_k]
+        if scores[order[0]] < self.settings.session_reuse_min_score:
+            return None
+        return Retrieved(
+            [session.chunk_ids[i] for i in order],
+            [session.chunk_texts[i] for i in order],
+            [float(scores[i]) for i in order]
+        )
+
+    def query_session(
+        self,
+        session_id: str,
+        question: str,
+        retrieval_mode: Optional[str] = None
+    ) -> SessionQueryResponse:
+        """Answer a question in a session, reusing its last retrieved chunks when they still fit.
+
+        Follow-ups are scored against the cached chunks first; a full search,
+        which refreshes the cache, runs only when none of them scores at least
+        ``session_reuse_min_score``. The prompt carries the session's running
+        summary instead of its full history. Answers are not cached, since
+        they depend on the conversation.
+        """
+        mode = self._retrieval_mode(retrieval_mode)
+        session = self.sessions.get(session_id)
+        # Follow-ups lean on the questions before them ("which of them holds a PMP?")
+        history = " ".join(session.recent_questions)
+        search_text = f"{history}\n{question}" if history else question
+
+        search_embedding = None
+        if mode != "lexical":
+            with tracing.span("embed_query"):
+                embeddings = self.embedding_service.generate_query_embeddings(
+                    [question, history] if history else [question]
+                )
+            search_embedding = blend_query(embeddings[0], embeddings[1] if history else None)
+
+        retrieved = None
+        if search_embedding is not None:
+            retrieved = self._session_context(session, search_embedding)
+        reused = retrieved is not None
+        metrics.CACHE_REQUESTS.inc("session_context", "hit" if reused else "miss")
+        if not reused:
+            pool_size = max(self.settings.top_k, self.settings.session_context_size)
+            with tracing.span("retrieve"):
+                pool = self._search([search_text], [search_embedding], session.document_id, mode, pool_size)[0]
+            if self.reranker.enabled:
+                with tracing.span("rerank"):
+                    retrieved = self._rerank([pool], [search_embedding], self.settings.top_k)[0]
+            else:
+                retrieved = pool.take(list(range(min(self.settings.top_k, len(pool.chunk_ids)))))
+
+            # Lexical sessions cache nothing: without embeddings there is nothing to re-rank locally
+            pool_ids, pool_texts = pool.chunk_ids, pool.texts
+            embeddings = self.vector_store.get_chunk_embeddings(pool_ids) if mode != "lexical" else {}
+            keep = [i for i, chunk_id in enumerate(pool_ids) if chunk_id in embeddings]
+            session.set_context(
+                [pool_ids[i] for i in keep],
+                [pool_texts[i] for i in keep],
+                np.asarray([embeddings[pool_ids[i]] for i in keep], dtype=np.float32) if keep else None
+            )
+            session.searches += 1
+
+        chunk_ids, chunk_texts = retrieved.chunk_ids, retrieved.texts
+        prompt_tokens = None
+        if chunk_texts:
+            summary = session.summary or None
+            passages, prompt_tokens = self._pack_context(question, chunk_ids, chunk_texts, summary)
+            with tracing.span("generate"):
+                answer = self.llm_service.generate_answer(question, passages, summary)
+        else:
+            answer = NO_ANSWER
+
+        session.add_turn(question, answer, self.settings.session_summary_max_chars)
+        self.sessions.save(session)
+
+        source_chunks, doc_ids = self._build_sources(retrieved)
+        return SessionQueryResponse(
             answer=answer,
             source_chunks=source_chunks,
-            document_ids=doc_ids
+            document_ids=doc_ids,
+            prompt_tokens=prompt_tokens,
+            session_id=session.session_id,
+            turn=session.turns,
+            context_reused=reused,
+            summary=session.summary
         )
+
+    def stream_query(
+        self,
+        question: str,
+        document_id: str = None,
+        cancelled: Optional[threading.Event] = None,
+        retrieval_mode: Optional[str] = None
+    ) -> Iterator[Tuple[str, Dict]]:
+        # Yields (event, data) pairs: "sources" once, "token" per generated
+        # piece of text, then a final "done" summary
+        start = time.perf_counter()
+        mode = self._retrieval_mode(retrieval_mode)
+
+        query_embedding = None
+        cached = self._cached_answer(question, document_id, mode=mode)
+        if not cached and mode != "lexical":
+            with tracing.span("embed_query"):
+                query_embedding = self.embedding_service.generate_query_embedding(question)
+            cached = self._cached_answer(question, document_id, query_embedding, mode)
+
+        if cached:
+            yield "sources", {
+                "source_chunks": [chunk.model_dump() for chunk in cached.source_chunks],
+                "document_ids": cached.document_ids
+            }
+            yield "token", {"text": cached.answer}
+            yield "done", {
+                "answer": cached.answer,
+                "cached": True,
+                "prompt_tokens": cached.prompt_tokens,
+                "time_to_first_token_ms": None,
+                "generation_ms": 0.0,
+                "total_ms": round((time.perf_counter() - start) * 1000, 2)
+            }
+            return
+
+        retrieved = self._retrieve(question, query_embedding, document_id, mode)
+        chunk_ids, chunk_texts = retrieved.chunk_ids, retrieved.texts
+        source_chunks, doc_ids = self._build_sources(retrieved)
+
+        # Sources go out before generation starts
+        yield "sources", {
+            "source_chunks": [chunk.model_dump() for chunk in source_chunks],
+            "document_ids": doc_ids
+        }
+
+        generation_start = time.perf_counter()
+        first_token_ms = None
+        pieces = []
+        prompt_tokens = None
+        if chunk_texts:
+            passages, prompt_tokens = self._pack_context(question, chunk_ids, chunk_texts)
+            stream = self.llm_service.stream_answer(question, passages)
+            try:
+                for text in stream:
+                    if cancelled is not None and cancelled.is_set():
+                        logger.info("Streamed answer cancelled by client")
+                        return
+                    if first_token_ms is None:
+                        first_token_ms = round((time.perf_counter() - generation_start) * 1000, 2)
+                    pieces.append(text)
+                    yield "token", {"text": text}
+            finally:
+                # Cancels the upstream stream if we stopped early
+                stream.close()
+            answer = "".join(pieces).strip()
+        else:
+            answer = NO_ANSWER
+            yield "token", {"text": answer}
+        generation_ms = round((time.perf_counter() - generation_start) * 1000, 2)
+        tracing.record("generate", generation_ms / 1000)
+        if first_token_ms is not None:
+            metrics.TIME_TO_FIRST_TOKEN_SECONDS.observe(first_token_ms / 1000)
+
+        logger.info(
+            "Streamed answer: time_to_first_token_ms=%s generation_ms=%s",
+            first_token_ms,
+            generation_ms
+        )
+
+        if chunk_texts and self.answer_cache:
+            self.answer_cache.put(
+                question,
+                document_id,
+                query_embedding,
+                QueryResponse(
+                    answer=answer,
+                    source_chunks=source_chunks,
+                    document_ids=doc_ids,
+                    prompt_tokens=prompt_tokens
+                ),
+                mode
+            )
+
+        done = {
+            "answer": answer,
+            "cached": False,
+            "prompt_tokens": prompt_tokens,
+            "time_to_first_token_ms": first_token_ms,
+            "generation_ms": generation_ms,
+            "total_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+        # Headers went out before generation, so a traced stream reports its stages here
+        trace = tracing.current_trace()
+        if trace is not None:
+            done["stages_ms"] = trace.breakdown_ms()
+        yield "done", done
@@ -0,0 +1,122 @@
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_entries: int = 500_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)"
+        )
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(last_used), 0) FROM embeddings").fetchone()
+        self._entries, self._clock = row
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    @classmethod
+    def make_key(cls, model: str, task_type: str, text: str) -> str:
+        payload = f"{model}\x00{task_type}\x00{cls.normalize(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+
+        with self._lock:
+            # Stay well below SQLite's host-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(self._tick(), key) for key in found]
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        if not items or self.max_entries <= 0:
+            return
+
+        keys = list(items)
+        with self._lock:
+            existing = set()
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                existing.update(row[0] for row in self._conn.execute(
+                    f"SELECT key FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ))
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), self._tick())
+                    for key, vector in items.items()
+                ]
+            )
+            self._entries += len(keys) - len(existing)
+
+            # Evict least recently used entries past the size cap
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self._entries = self.max_entries
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,44 +1,270 @@
+import asyncio
+import google.ai.generativelanguage as glm
 import google.generativeai as genai
-from typing import List
+from google.api_core import exceptions as google_exceptions
+from google.generativeai.client import get_default_generative_async_client
+from google.generativeai.embedding import EMBEDDING_MAX_BATCH_SIZE
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from app.config import Settings
+from app.services.embedding_cache import EmbeddingCache
+from app.services.gemini_governor import INGEST, INTERACTIVE, GeminiGovernor, GeminiUnavailableError
+from app.utils import metrics
+from app.utils.hashing import sha256_text
+from app.utils.retry import retry_with_backoff, retry_with_backoff_async
+
+# Errors worth retrying: quota/rate limiting and transient unavailability
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+)
 
 
 class EmbeddingService:
  
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, governor: Optional[GeminiGovernor] = None):
 
         self.settings = settings
+        self.governor = governor or GeminiGovernor(settings)
         if settings.gemini_api_key:
             genai.configure(api_key=settings.gemini_api_key)
         self.model = settings.gemini_embedding_model
+        self.batch_size = max(1, settings.embedding_batch_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.embedding_max_concurrency),
+            thread_name_prefix="embedding"
+        )
+        self.cache: Optional[EmbeddingCache] = None
+        if settings.embedding_cache_enabled:
+            self.cache = EmbeddingCache(
+                settings.embedding_cache_path,
+                max_entries=settings.embedding_cache_max_entries
+            )
 
-    def generate_embedding(self, text: str) -> List[float]:
+    def warm_up(self) -> None:
+        if self.settings.gemini_api_key:
+            genai.get_model(self.model)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        if self.cache:
+            self.cache.close()
+
+    @staticmethod
+    def _priority(task_type: str) -> str:
+        # Documents are embedded at ingest; everything else serves a query
+        return INGEST if task_type == "retrieval_document" else INTERACTIVE
+
+    def _embed_attempt(self, texts: List[str], task_type: str) -> List[List[float]]:
+        try:
+            return self.governor.run(self._priority(task_type), lambda: self._embed_contents(texts, task_type))
+        except GeminiUnavailableError:
+            raise
+        except Exception:
+            metrics.API_ERRORS.inc("embedding")
+            raise
+
+    def _embed_contents(self, texts: List[str], task_type: str) -> List[List[float]]:
+        # One request for the whole list; the SDK routes lists to batchEmbedContents
+        result = genai.embed_content(
+            model=self.model,
+            content=texts,
+            task_type=task_type
+        )
+        return result['embedding']
+
+    def _embed_with_retry(self, texts: List[str], task_type: str) -> List[List[float]]:
+        # Identical batches in flight (the same question asked twice at once) share one call
+        key = sha256_text("\x00".join([self.model, task_type] + texts))
+        return self.governor.coalesce("embedding", key, lambda: retry_with_backoff(
+            lambda: self._embed_attempt(texts, task_type),
+            retry_on=RETRYABLE_ERRORS,
+            max_retries=self.settings.embedding_max_retries,
+            base_delay=self.settings.embedding_retry_base_delay,
+            max_delay=self.settings.embedding_retry_max_delay,
+            on_retry=lambda e: metrics.API_RETRIES.inc("embedding")
+        ))
+
+    def _embed_uncached(self, texts: List[str], task_type: str) -> List[List[float]]:
+        batches = [
+            texts[i:i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+
+        if len(batches) == 1:
+            results = [self._embed_with_retry(batches[0], task_type)]
+        else:
+            # executor.map yields in submission order, so output order matches input
+            results = list(self._executor.map(
+                lambda batch: self._embed_with_retry(batch, task_type),
+                batches
+            ))
+
+        embeddings = [embedding for batch in results for embedding in batch]
+        if len(embeddings) != len(texts):
+            raise RuntimeError("Embedding count does not match number of inputs")
+        return embeddings
+
+    def _embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        if not self.cache:
+            return self._embed_uncached(texts, task_type)
+
+        keys = [EmbeddingCache.make_key(self.model, task_type, text) for text in texts]
+        cached = self.cache.get_many(keys)
+        metrics.CACHE_REQUESTS.inc("embedding", "hit", amount=len(cached))
+
+        # Embed each distinct missing text once, even if it repeats in the input
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            metrics.CACHE_REQUESTS.inc("embedding", "miss", amount=len(missing))
+            fresh = self._embed_uncached(list(missing.values()), task_type)
+            fresh_by_key = dict(zip(missing.keys(), fresh))
+            self.cache.put_many(fresh_by_key)
+            cached.update(fresh_by_key)
+
+        return [cached[key] for key in keys]
+
+    # Async variants: the same batching, retries, governor and cache, without
+    # holding a thread while Gemini answers
+
+    async def _embed_contents_async(self, texts: List[str], task_type: str) -> List[List[float]]:
+        # google-generativeai 0.3.2 has no embed_content_async; this is what
+        # embed_content does, on the asyncio client
+        model = self.model if self.model.startswith("models/") else f"models/{self.model}"
+        client = get_default_generative_async_client()
+        embeddings: List[List[float]] = []
+        for i in range(0, len(texts), EMBEDDING_MAX_BATCH_SIZE):
+            response = await client.batch_embed_contents(glm.BatchEmbedContentsRequest(
+                model=model,
+                requests=[
+                    glm.EmbedContentRequest(model=model, content={"parts": [{"text": text}]}, task_type=task_type.upper())
+                    for text in texts[i:i + EMBEDDING_MAX_BATCH_SIZE]
+                ]
+            ))
+            embeddings.extend(list(embedding.values) for embedding in response.embeddings)
+        return embeddings
+
+    async def _embed_attempt_async(self, texts: List[str], task_type: str) -> List[List[float]]:
         try:
-            result = genai.embed_content(
-                model=self.model,
-                content=text,
-                task_type="retrieval_document"
+            return await self.governor.run_async(
+                self._priority(task_type), lambda: self._embed_contents_async(texts, task_type)
             )
-            return result['embedding']
+        except GeminiUnavailableError:
+            raise
+        except Exception:
+            metrics.API_ERRORS.inc("embedding")
+            raise
+
+    async def _embed_with_retry_async(self, texts: List[str], task_type: str) -> List[List[float]]:
+        key = sha256_text("\x00".join([self.model, task_type] + texts))
+        return await self.governor.coalesce_async("embedding", key, lambda: retry_with_backoff_async(
+            lambda: self._embed_attempt_async(texts, task_type),
+            retry_on=RETRYABLE_ERRORS,
+            max_retries=self.settings.embedding_max_retries,
+            base_delay=self.settings.embedding_retry_base_delay,
+            max_delay=self.settings.embedding_retry_max_delay,
+            on_retry=lambda e: metrics.API_RETRIES.inc("embedding")
+        ))
+
+    async def _embed_uncached_async(self, texts: List[str], task_type: str) -> List[List[float]]:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        # Same cap on batches in flight as the thread pool gives the sync path
+        semaphore = asyncio.Semaphore(max(1, self.settings.embedding_max_concurrency))
+
+        async def embed(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._embed_with_retry_async(batch, task_type)
+
+        results = await asyncio.gather(*(embed(batch) for batch in batches))
+        embeddings = [embedding for batch in results for embedding in batch]
+        if len(embeddings) != len(texts):
+            raise RuntimeError("Embedding count does not match number of inputs")
+        return embeddings
+
+    async def _embed_async(self, texts: List[str], task_type: str) -> List[List[float]]:
+        if not self.cache:
+            return await self._embed_uncached_async(texts, task_type)
+
+        # The cache is SQLite: read and write it off the event loop
+        loop = asyncio.get_running_loop()
+        keys = [EmbeddingCache.make_key(self.model, task_type, text) for text in texts]
+        cached = await loop.run_in_executor(None, self.cache.get_many, keys)
+        metrics.CACHE_REQUESTS.inc("embedding", "hit", amount=len(cached))
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            metrics.CACHE_REQUESTS.inc("embedding", "miss", amount=len(missing))
+            fresh = await self._embed_uncached_async(list(missing.values()), task_type)
+            fresh_by_key = dict(zip(missing.keys(), fresh))
+            await loop.run_in_executor(None, self.cache.put_many, fresh_by_key)
+            cached.update(fresh_by_key)
+
+        return [cached[key] for key in keys]
+
+    def generate_embedding(self, text: str) -> List[float]:
+        try:
+            return self._embed([text], "retrieval_document")[0]
+        except GeminiUnavailableError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Failed to generate embedding: {str(e)}")
 
     def generate_query_embedding(self, query: str) -> List[float]:
        
         try:
-            result = genai.embed_content(
-                model=self.model,
-                content=query,
-                task_type="retrieval_query"
-            )
-            return result['embedding']
+            return self._embed([query], "retrieval_query")[0]
+        except GeminiUnavailableError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Failed to generate query embedding: {str(e)}")
 
+    def generate_query_embeddings(self, queries: List[str]) -> List[List[float]]:
+        if not queries:
+            return []
+
+        try:
+            return self._embed(queries, "retrieval_query")
+        except GeminiUnavailableError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate query embeddings: {str(e)}")
+
     def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
        
-        embeddings = []
-        for text in texts:
-            embedding = self.generate_embedding(text)
-            embeddings.append(embedding)
-        return embeddings
+        if not texts:
+            return []
+
+        try:
+            return self._embed(texts, "retrieval_document")
+        except GeminiUnavailableError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate embeddings: {str(e)}")
+
+    async def generate_query_embedding_async(self, query: str) -> List[float]:
+        try:
+            return (await self._embed_async([query], "retrieval_query"))[0]
+        except GeminiUnavailableError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate query embedding: {str(e)}")
+
+    async def generate_embeddings_batch_async(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        try:
+            return await self._embed_async(texts, "retrieval_document")
+        except GeminiUnavailableError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate embeddings: {str(e)}")
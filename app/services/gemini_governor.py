@@ -0,0 +1,473 @@
+"""One gate in front of every Gemini call, shared by embeddings and generation.
+
+Calls are either ``interactive`` (query embeddings and answers) or ``ingest``
+(chunk embeddings and LLM profiles). Each kind has its own token bucket, so a
+bulk upload cannot spend the quota queries need; interactive calls may also
+take spare tokens from a limited ingest budget, never the reverse, and are
+admitted first to the
+shared concurrency slots. A circuit breaker fails calls fast while Gemini is
+erroring, and identical calls already in flight are coalesced into one.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+from google.api_core import exceptions as google_exceptions
+
+from app.config import Settings
+from app.utils import metrics
+
+T = TypeVar("T")
+
+INTERACTIVE = "interactive"
+INGEST = "ingest"
+PRIORITIES = (INTERACTIVE, INGEST)
+
+# Upstream trouble, as opposed to a bad request: these count against the breaker
+BREAKER_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    ConnectionError,
+    TimeoutError,
+)
+
+# Recent waits kept per budget for the stats
+WAIT_SAMPLES = 1000
+
+
+class GeminiUnavailableError(RuntimeError):
+    """A call refused without reaching Gemini; worth retrying after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(GeminiUnavailableError):
+    pass
+
+
+class ThrottledError(GeminiUnavailableError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, requests_per_minute: float, burst: int):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    def take(self, now: float) -> float:
+        """Take a token and return 0, or return the seconds until one is available."""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Budget:
+    """A token bucket plus what callers waited on it."""
+
+    def __init__(self, name: str, requests_per_minute: float, burst: int, max_wait: Optional[float]):
+        self.name = name
+        self.bucket = TokenBucket(requests_per_minute, burst)
+        self.max_wait = max_wait
+        self.waiting = 0
+        self.admitted = 0
+        self.throttled = 0
+        self.waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        tokens = None if self.bucket.unlimited else round(self.bucket.available(now), 2)
+        return {
+            "requests_per_minute": round(self.bucket.rate * 60, 2),
+            "tokens_available": tokens,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "mean_wait_ms": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+            "p95_wait_ms": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 2) if waits else 0.0,
+            "max_wait_ms": round(waits[-1] * 1000, 2) if waits else 0.0
+        }
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and fails calls
+    fast; after ``reset_seconds`` one probe call decides whether it closes."""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        metrics.GEMINI_CIRCUIT_OPEN.set(0)
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "closed":
+                return
+            retry_after = self._opened_at + self.reset_seconds - time.monotonic()
+            if self.state == "open" and retry_after <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(
+                f"Gemini is failing; calls are paused for up to {self.reset_seconds:g} s",
+                retry_after=max(1.0, retry_after)
+            )
+
+    def cancel_probe(self) -> None:
+        # The probe never reached Gemini; let the next call probe instead
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != "closed":
+                self.state = "closed"
+                metrics.GEMINI_CIRCUIT_OPEN.set(0)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened += 1
+                self._opened_at = time.monotonic()
+                metrics.GEMINI_CIRCUIT_OPEN.set(1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures, "times_opened": self.opened}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        # The leader was cancelled or interrupted: no outcome to share, so
+        # whoever waited on it makes the call itself
+        self.abandoned = False
+        # Wake-ups for callers waiting on an event loop rather than a thread
+        self.callbacks: List[Callable[[], None]] = []
+
+
+def _wake(waiter: "asyncio.Future") -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class SingleFlight:
+    """Runs one call per key at a time; callers arriving meanwhile get its result (or error).
+
+    Only the call's own outcome is shared. If the leader is cancelled, its
+    followers start over: the first of them to rejoin leads a new call.
+    """
+
+    def __init__(self):
+        self.coalesced: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    def _join(self, key: str, api: str, count: bool = True):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                self._flights[key] = _Flight()
+                return self._flights[key], True
+            if count:
+                self.coalesced[api] = self.coalesced.get(api, 0) + 1
+        if count:
+            metrics.GEMINI_COALESCED.inc(api)
+        return flight, False
+
+    def _land(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            del self._flights[key]
+            callbacks = flight.callbacks
+        flight.done.set()
+        for callback in callbacks:
+            callback()
+
+    @staticmethod
+    def _outcome(flight: _Flight) -> Any:
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    @staticmethod
+    def _record(flight: _Flight, error: BaseException) -> None:
+        if isinstance(error, Exception):
+            flight.error = error
+        else:
+            # CancelledError, KeyboardInterrupt: the leader's own business
+            flight.abandoned = True
+
+    def do(self, key: str, fn: Callable[[], T], api: str = "") -> T:
+        joined = False
+        while True:
+            flight, leader = self._join(key, api, count=not joined)
+            if leader:
+                break
+            joined = True
+            flight.done.wait()
+            if not flight.abandoned:
+                return self._outcome(flight)
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            self._record(flight, e)
+            raise
+        finally:
+            self._land(key, flight)
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]], api: str = "") -> T:
+        """``do`` for coroutines; shares flights with synchronous callers."""
+        joined = False
+        while True:
+            flight, leader = self._join(key, api, count=not joined)
+            if leader:
+                break
+            joined = True
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            with self._lock:
+                # A flight still registered has not run its callbacks yet
+                in_flight = self._flights.get(key) is flight
+                if in_flight:
+                    flight.callbacks.append(lambda: loop.call_soon_threadsafe(_wake, waiter))
+            if in_flight:
+                await waiter
+            flight.done.wait()  # set by now, or within a few instructions
+            if not flight.abandoned:
+                return self._outcome(flight)
+
+        try:
+            flight.result = await fn()
+            return flight.result
+        except BaseException as e:
+            self._record(flight, e)
+            raise
+        finally:
+            self._land(key, flight)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.coalesced)
+
+
+class GeminiGovernor:
+    def __init__(self, settings: Settings):
+        self.max_concurrency = max(1, settings.gemini_max_concurrency)
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.gemini_breaker_failure_threshold,
+            reset_seconds=settings.gemini_breaker_reset_seconds
+        )
+        self.single_flight = SingleFlight()
+        self._budgets = {
+            INTERACTIVE: Budget(
+                INTERACTIVE,
+                settings.gemini_interactive_requests_per_minute,
+                settings.gemini_interactive_burst,
+                max_wait=settings.gemini_interactive_max_wait_seconds
+            ),
+            # Ingest waits as long as it takes: jobs are not in a hurry
+            INGEST: Budget(INGEST, settings.gemini_ingest_requests_per_minute, settings.gemini_ingest_burst, max_wait=None),
+        }
+        self._in_flight = 0
+        self._slot_waiters = {priority: 0 for priority in PRIORITIES}
+        self._cond = threading.Condition()
+
+    def _take_token(self, priority: str, now: float) -> float:
+        if priority == INGEST:
+            # Interactive callers queued for tokens get the next ingest token first
+            if self._budgets[INTERACTIVE].waiting > self._slot_waiters[INTERACTIVE]:
+                return 0.05
+            return self._budgets[INGEST].bucket.take(now)
+        wait = self._budgets[INTERACTIVE].bucket.take(now)
+        # Spare ingest tokens only exist when ingest has a budget; borrowing
+        # from an unlimited bucket would switch the interactive limit off
+        ingest = self._budgets[INGEST].bucket
+        if wait and not ingest.unlimited and ingest.take(now) == 0:
+            return 0.0
+        return wait
+
+    def _free_slot(self, priority: str) -> bool:
+        if self._in_flight >= self.max_concurrency:
+            return False
+        return priority == INTERACTIVE or not self._slot_waiters[INTERACTIVE]
+
+    def _acquire(self, priority: str) -> None:
+        budget = self._budgets[priority]
+        start = time.monotonic()
+        deadline = start + budget.max_wait if budget.max_wait is not None else None
+        with self._cond:
+            budget.waiting += 1
+            metrics.GEMINI_QUEUE_DEPTH.set(budget.waiting, priority)
+            has_token = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = 0.0
+                    if not has_token:
+                        wait = self._take_token(priority, now)
+                        has_token = wait == 0
+                        if has_token:
+                            self._slot_waiters[priority] += 1
+                    if has_token and self._free_slot(priority):
+                        self._slot_waiters[priority] -= 1
+                        self._in_flight += 1
+                        break
+                    if deadline is not None and now >= deadline:
+                        if has_token:
+                            self._slot_waiters[priority] -= 1
+                        budget.throttled += 1
+                        metrics.GEMINI_REJECTED.inc(priority, "throttled")
+                        raise ThrottledError(
+                            f"Gemini {priority} budget exhausted; waited {budget.max_wait:g} s",
+                            retry_after=max(1.0, wait)
+                        )
+                    # Slots are handed over by notify; tokens only by the clock
+                    timeout = wait if not has_token else None
+                    if deadline is not None:
+                        timeout = min(timeout if timeout is not None else deadline - now, deadline - now)
+                    self._cond.wait(timeout)
+            finally:
+                budget.waiting -= 1
+                metrics.GEMINI_QUEUE_DEPTH.set(budget.waiting, priority)
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            budget.admitted += 1
+            budget.waits.append(waited)
+        metrics.GEMINI_WAIT_SECONDS.observe(waited, priority)
+
+    def _release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _check_breaker(self, priority: str) -> None:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            metrics.GEMINI_REJECTED.inc(priority, "circuit_open")
+            raise
+
+    def _try_acquire(self, priority: str) -> bool:
+        """Admit a call at once if nobody is queued ahead of it and a token and a slot are free."""
+        budget = self._budgets[priority]
+        with self._cond:
+            if budget.waiting or not self._free_slot(priority):
+                return False
+            if self._take_token(priority, time.monotonic()):
+                return False
+            self._in_flight += 1
+            budget.admitted += 1
+            budget.waits.append(0.0)
+        metrics.GEMINI_WAIT_SECONDS.observe(0.0, priority)
+        return True
+
+    def _finish(self, error: Optional[BaseException]) -> None:
+        self._release()
+        if isinstance(error, BREAKER_ERRORS):
+            self.breaker.record_failure()
+        elif error is None or isinstance(error, Exception):
+            # Gemini answered, if not always with success (a bad request, say)
+            self.breaker.record_success()
+        else:
+            # Cancelled: tells nothing about Gemini
+            self.breaker.cancel_probe()
+
+    def run(self, priority: str, fn: Callable[[], T]) -> T:
+        """Make one upstream call: breaker check, rate budget, a concurrency slot, then ``fn``."""
+        self._check_breaker(priority)
+        try:
+            self._acquire(priority)
+        except ThrottledError:
+            self.breaker.cancel_probe()
+            raise
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(e)
+            raise
+        self._finish(None)
+        return result
+
+    async def run_async(self, priority: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """``run`` for coroutines. Only a call that has to queue waits on a worker thread."""
+        self._check_breaker(priority)
+        if not self._try_acquire(priority):
+            acquiring = asyncio.get_running_loop().run_in_executor(None, self._acquire, priority)
+            try:
+                await asyncio.shield(acquiring)
+            except ThrottledError:
+                self.breaker.cancel_probe()
+                raise
+            except asyncio.CancelledError:
+                # The worker thread may still get a slot; hand it straight back
+                self.breaker.cancel_probe()
+                acquiring.add_done_callback(
+                    lambda done: done.cancelled() or done.exception() is not None or self._release()
+                )
+                raise
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(e)
+            raise
+        self._finish(None)
+        return result
+
+    def coalesce(self, api: str, key: str, fn: Callable[[], T]) -> T:
+        """Run ``fn`` unless an identical call (same ``api`` and ``key``) is in flight, then share its result."""
+        return self.single_flight.do(f"{api}:{key}", fn, api)
+
+    async def coalesce_async(self, api: str, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        return await self.single_flight.do_async(f"{api}:{key}", fn, api)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._cond:
+            budgets = {name: budget.stats(now) for name, budget in self._budgets.items()}
+            in_flight = self._in_flight
+        return {
+            "budgets": budgets,
+            "in_flight": in_flight,
+            "max_concurrency": self.max_concurrency,
+            "circuit": self.breaker.stats(),
+            "coalesced": self.single_flight.stats()
+        }
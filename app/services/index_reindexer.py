@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from app.config import Settings
+from app.services.vector_backends.base import HnswParams
+from app.services.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+
+class ReindexInProgressError(Exception):
+    pass
+
+
+@dataclass
+class ReindexStatus:
+    status: str = "idle"  # idle, running, completed or failed
+    params: Optional[HnswParams] = None
+    copied_chunks: int = 0
+    total_chunks: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+class IndexReindexer:
+    """Rebuilds the vector index with new HNSW parameters on a background thread.
+
+    The backend builds the new index next to the live one and swaps it in, so
+    searches and ingestion carry on throughout. One rebuild runs at a time.
+    """
+
+    def __init__(self, settings: Settings, vector_store: VectorStore):
+        self.settings = settings
+        self.vector_store = vector_store
+        self._lock = threading.Lock()
+        self._status = ReindexStatus()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def supported(self) -> bool:
+        return self.vector_store.backend.index_params() is not None
+
+    def status(self) -> ReindexStatus:
+        with self._lock:
+            return replace(self._status)
+
+    def start(self, params: HnswParams) -> ReindexStatus:
+        if not self.supported:
+            raise ValueError(f"The {self.settings.vector_backend} backend searches exactly and has no index to rebuild")
+        with self._lock:
+            if self._status.status == "running":
+                raise ReindexInProgressError("A reindex is already running")
+            self._status = ReindexStatus(status="running", params=params, started_at=time.time())
+            self._thread = threading.Thread(target=self._run, args=(params,), name="reindex", daemon=True)
+            self._thread.start()
+            return replace(self._status)
+
+    def _progress(self, copied: int, total: int) -> None:
+        with self._lock:
+            self._status.copied_chunks = copied
+            self._status.total_chunks = total
+
+    def _run(self, params: HnswParams) -> None:
+        start = time.perf_counter()
+        try:
+            self.vector_store.backend.reindex(params, self.settings.reindex_batch_size, self._progress)
+        except Exception as e:
+            logger.exception("Reindex with %s failed", params)
+            with self._lock:
+                self._status.status = "failed"
+                self._status.error = str(e)
+                self._status.finished_at = time.time()
+            return
+        logger.info("Reindexed with %s in %.1f s", params, time.perf_counter() - start)
+        with self._lock:
+            self._status.status = "completed"
+            self._status.finished_at = time.time()
+
+    def shutdown(self) -> None:
+        # Closing the vector store stops a running rebuild at its next page
+        thread = self._thread
+        if thread is not None:
+            thread.join()
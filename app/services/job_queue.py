@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from uuid import uuid4
+from app.config import Settings
+from app.services.archive_ingestor import ArchiveIngestor
+from app.services.document_service import DocumentService
+from app.utils.archive_extractor import ArchiveExtractor
+
+
+class QueueFullError(Exception):
+    pass
+
+
+@dataclass
+class JobFile:
+    filename: str
+    path: Optional[str] = None
+    status: str = "pending"
+    target_document_id: Optional[str] = None
+    document_id: Optional[str] = None
+    chunks_created: Optional[int] = None
+    chunks_reused: Optional[int] = None
+    chunks_embedded: Optional[int] = None
+    duplicate: bool = False
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return round((self.finished_at - self.started_at) * 1000, 2)
+
+
+@dataclass
+class Job:
+    job_id: str
+    files: List[JobFile]
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def processed_files(self) -> int:
+        return sum(1 for f in self.files if f.status in ("completed", "failed", "skipped"))
+
+
+class IngestionJobQueue:
+    def __init__(
+        self,
+        settings: Settings,
+        document_service: DocumentService,
+        archive_ingestor: ArchiveIngestor
+    ):
+        self.settings = settings
+        self.document_service = document_service
+        self.archive_ingestor = archive_ingestor
+        self.max_pending_jobs = max(1, settings.ingestion_max_pending_jobs)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.ingestion_workers),
+            thread_name_prefix="ingestion"
+        )
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending = 0
+
+    @property
+    def pending_jobs(self) -> int:
+        return self._pending
+
+    def submit(
+        self,
+        files: List[Tuple[str, str]],
+        rejected: Optional[List[Tuple[str, str]]] = None,
+        document_id: Optional[str] = None
+    ) -> Job:
+        # document_id names the document a single uploaded file replaces
+        job_files = [
+            JobFile(filename=filename, path=path, target_document_id=document_id)
+            for path, filename in files
+        ]
+        for filename, error in rejected or []:
+            job_files.append(JobFile(filename=filename, status="skipped", error=error))
+
+        job = Job(job_id=str(uuid4()), files=job_files)
+
+        with self._lock:
+            # Backpressure: refuse new work instead of queueing without bound
+            if self._pending >= self.max_pending_jobs:
+                raise QueueFullError("Ingestion queue is full, retry later")
+            self._pending += 1
+            self._jobs[job.job_id] = job
+            self._prune()
+
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        # Let running files finish; queued jobs are dropped with their uploads
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status == "queued":
+                    job.status = "failed"
+                    for job_file in job.files:
+                        self._discard(job_file)
+
+    def _prune(self) -> None:
+        retention = self.settings.ingestion_job_retention
+        finished = [jid for jid, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(self._jobs) - retention)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _discard(job_file: JobFile) -> None:
+        if job_file.path and os.path.exists(job_file.path):
+            os.unlink(job_file.path)
+
+    def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            # Archives append (and process) their members while we iterate
+            for job_file in list(job.files):
+                if job_file.status == "pending":
+                    self._process_file(job, job_file)
+        finally:
+            statuses = {f.status for f in job.files}
+            if "failed" not in statuses:
+                job.status = "completed"
+            elif "completed" in statuses:
+                job.status = "completed_with_errors"
+            else:
+                job.status = "failed"
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+
+    def _process_file(self, job: Job, job_file: JobFile) -> None:
+        job_file.status = "processing"
+        job_file.started_at = time.time()
+        try:
+            if ArchiveExtractor.archive_extension(job_file.filename):
+                self._expand_archive(job, job_file)
+            else:
+                result = self.document_service.process_document(
+                    file_path=job_file.path,
+                    filename=job_file.filename,
+                    document_id=job_file.target_document_id
+                )
+                job_file.document_id = result.document_id
+                job_file.chunks_created = result.chunks_created
+                job_file.chunks_reused = result.chunks_reused
+                job_file.chunks_embedded = result.chunks_embedded
+                job_file.duplicate = result.duplicate
+            job_file.status = "completed"
+        except Exception as e:
+            job_file.status = "failed"
+            job_file.error = str(e)
+        finally:
+            job_file.finished_at = time.time()
+            self._discard(job_file)
+
+    def _expand_archive(self, job: Job, archive: JobFile) -> None:
+        # Members are appended as they finish, so progress grows while the archive streams
+        for result in self.archive_ingestor.ingest(archive.path, archive.filename):
+            job.files.append(JobFile(
+                filename=result.filename,
+                status=result.status,
+                document_id=result.document_id,
+                chunks_created=result.chunks_created,
+                chunks_reused=result.chunks_reused,
+                chunks_embedded=result.chunks_embedded,
+                duplicate=result.duplicate,
+                error=result.error,
+                started_at=result.started_at,
+                finished_at=result.finished_at
+            ))
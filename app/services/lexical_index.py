@@ -0,0 +1,138 @@
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i in is it its of on or "
+    "she that the their they this to was were what which who with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class LexicalIndex:
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "chunk_id TEXT PRIMARY KEY, document_id TEXT NOT NULL, length INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term TEXT NOT NULL, chunk_id TEXT NOT NULL, tf INTEGER NOT NULL, "
+            "PRIMARY KEY (term, chunk_id)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings(chunk_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks(document_id)")
+        self._conn.commit()
+
+        # Chunk lengths and owners stay in memory; postings are read per query term
+        self._chunks: Dict[str, Tuple[str, int]] = {
+            chunk_id: (document_id, length)
+            for chunk_id, document_id, length in self._conn.execute(
+                "SELECT chunk_id, document_id, length FROM chunks"
+            )
+        }
+        self._total_length = sum(length for _, length in self._chunks.values())
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def _remove_locked(self, chunk_ids: List[str]) -> None:
+        present = [cid for cid in chunk_ids if cid in self._chunks]
+        if not present:
+            return
+        for i in range(0, len(present), 500):
+            batch = present[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            self._conn.execute(f"DELETE FROM postings WHERE chunk_id IN ({placeholders})", batch)
+            self._conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch)
+        for chunk_id in present:
+            self._total_length -= self._chunks.pop(chunk_id)[1]
+
+    def add(self, document_id: str, chunk_ids: List[str], texts: List[str]) -> None:
+        with self._lock:
+            # Re-adding a chunk ID replaces its postings
+            self._remove_locked(chunk_ids)
+
+            chunk_rows = []
+            posting_rows = []
+            for chunk_id, text in zip(chunk_ids, texts):
+                terms = Counter(tokenize(text))
+                length = sum(terms.values())
+                chunk_rows.append((chunk_id, document_id, length))
+                posting_rows.extend((term, chunk_id, tf) for term, tf in terms.items())
+
+            self._conn.executemany(
+                "INSERT INTO chunks (chunk_id, document_id, length) VALUES (?, ?, ?)", chunk_rows
+            )
+            self._conn.executemany(
+                "INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)", posting_rows
+            )
+            self._conn.commit()
+
+            for chunk_id, doc_id, length in chunk_rows:
+                self._chunks[chunk_id] = (doc_id, length)
+                self._total_length += length
+
+    def remove_chunks(self, chunk_ids: List[str]) -> None:
+        with self._lock:
+            self._remove_locked(chunk_ids)
+            self._conn.commit()
+
+    def remove_document(self, document_id: str) -> None:
+        self.remove_documents([document_id])
+
+    def remove_documents(self, document_ids: List[str]) -> None:
+        # One pass over the chunk map however many documents go
+        wanted = set(document_ids)
+        with self._lock:
+            chunk_ids = [cid for cid, (doc_id, _) in self._chunks.items() if doc_id in wanted]
+            self._remove_locked(chunk_ids)
+            self._conn.commit()
+
+    def search(self, query: str, top_k: int = 5, document_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        terms = set(tokenize(query))
+        with self._lock:
+            total = len(self._chunks)
+            if not terms or not total:
+                return []
+            avg_length = self._total_length / total
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._conn.execute(
+                    "SELECT chunk_id, tf FROM postings WHERE term = ?", (term,)
+                ).fetchall()
+                if not postings:
+                    continue
+                # BM25 with the usual +1 to keep idf positive for common terms
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings:
+                    doc_id, length = self._chunks[chunk_id]
+                    if document_id and doc_id != document_id:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
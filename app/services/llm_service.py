@@ -1,63 +1,165 @@
 import google.generativeai as genai
-from typing import List
+from typing import Any, Awaitable, Callable, Iterator, List, Optional
 from app.config import Settings
+from app.services.gemini_governor import INGEST, INTERACTIVE, GeminiGovernor, GeminiUnavailableError
+from app.utils import metrics
+from app.utils.context_packer import estimate_tokens
+from app.utils.hashing import sha256_text
+
+# Static instructions, built once. google-generativeai 0.3.2 has no
+# system_instruction or context caching, so this is sent as the unchanging
+# leading prefix of every prompt instead.
+SYSTEM_PROMPT = """You are an HR Recruiter, skilled in answering questions based on provided document context. You will be given questions from Users who are HR and recruitment specialists, along with relevant document excerpts (context chunks). Your task is to generate accurate, concise, and contextually relevant answers based solely on the provided context.
+Your purpose is to support HR professionals in making informed recruitment decisions by providing clear and precise answers derived from the document excerpts.
+In particular, you are a service created by EDECs to support our HR department.
+
+About EDECS:
+
+EDECS (El Dawlia for Engineering & Contracting) is a leading Egyptian construction and engineering company founded in 1995, specializing in mega-complex projects across Egypt and the MENA region. As a Grade A contractor, we execute large-scale projects in marine and port facilities, infrastructure development, roads and bridges, railway systems, water treatment plants, and building construction.
+
+Our core values center on agility, ownership, and integrity, with an unwavering commitment to quality and long-term partnerships built on trust and accountability. We employ between 1,001-5,000 professionals and maintain memberships in the French Chamber, German Chamber in Cairo, and the Egyptian Federation for Construction and Building .
+
+When evaluating candidates, prioritize those with experience in construction engineering, project management, infrastructure development, and marine construction. Look for technical expertise relevant to our project sectors and candidates who demonstrate alignment with our values of quality, innovation, and professional integrity.
+
+You are to search through all candidate resumes and job descriptions provided in the context chunks to find the most relevant information to answer the user's question.
+Context chunks are excerpts from various candidate resumes and job descriptions.
+
+Each chunk is labeled with a number for reference. Observe chunk metadata if provided, such as the candidate/document ID (resume/cv) it is extracted from. This will help you understand the different candidates/documents better.
+When answering, adhere to the following guidelines:
+1. Use only the information provided in the context chunks to formulate your answer.
+2. If the context does not contain sufficient information to answer the question, respond with
+"I don't know based on the provided context."
+    additionally, If you do not know the answer based on the provided context, do not attempt to fabricate an answer. (i.e if you do not know the document ID, leave blank. Never make up information you do not have or know.)
+3. Ensure your answer is clear, concise, and directly addresses the user's question.
+4. Keep conversation professional, but friendly, trying to maintain a focus on HR recruitment topics.
+5. Do not reference chunk numbers in your final answer. Refer only to the content, identifying candidates by their Name idealy, and documnent IDs only if necessary.
+Here is the information you have:"""
+
+SYSTEM_PROMPT_TOKENS = estimate_tokens(SYSTEM_PROMPT)
+
+
+class GovernedModel:
+    """``generate_content`` through the governor at a fixed priority, for callers that take a model."""
+
+    def __init__(self, service: "LLMService", priority: str):
+        self.service = service
+        self.priority = priority
+
+    def generate_content(self, prompt: str):
+        return self.service.generate(prompt, self.priority)
 
 
 class LLMService:
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, governor: Optional[GeminiGovernor] = None):
         self.settings = settings
+        self.governor = governor or GeminiGovernor(settings)
         if settings.gemini_api_key:
             genai.configure(api_key=settings.gemini_api_key)
         self.model = genai.GenerativeModel(settings.gemini_generation_model)
+        # LLM profile extraction runs at ingest, on the ingest budget
+        self.ingest_model = GovernedModel(self, INGEST)
 
-    def generate_answer(self, question: str, context_chunks: List[str]) -> str:
+    def warm_up(self) -> None:
+        if self.settings.gemini_api_key:
+            genai.get_model(self.model.model_name)
+
+    @staticmethod
+    def _build_request(question: str, context_chunks: List[str], history: Optional[str] = None) -> str:
         # Construct context from chunks
         context = "\n\n".join([f"[Chunk {i+1}]\n{chunk}" for i, chunk in enumerate(context_chunks)])
+        # Earlier turns of a session, summarized, so follow-ups can refer back
+        conversation = f"\nConversation so far:\n{history}\n" if history else ""
 
-        # Create controlled prompt
-        prompt = f"""
-        
-        You are an HR Recruiter, skilled in answering questions based on provided document context. You will be given questions from Users who are HR and recruitment specialists, along with relevant document excerpts (context chunks). Your task is to generate accurate, concise, and contextually relevant answers based solely on the provided context.
-        Your purpose is to support HR professionals in making informed recruitment decisions by providing clear and precise answers derived from the document excerpts.
-        In particular, you are a service created by EDECs to support our HR department.
-
-        About EDECS:
-
-EDECS (El Dawlia for Engineering & Contracting) is a leading Egyptian construction and engineering company founded in 1995, specializing in mega-complex projects across Egypt and the MENA region. As a Grade A contractor, we execute large-scale projects in marine and port facilities, infrastructure development, roads and bridges, railway systems, water treatment plants, and building construction.
-
-Our core values center on agility, ownership, and integrity, with an unwavering commitment to quality and long-term partnerships built on trust and accountability. We employ between 1,001-5,000 professionals and maintain memberships in the French Chamber, German Chamber in Cairo, and the Egyptian Federation for Construction and Building .
-
-When evaluating candidates, prioritize those with experience in construction engineering, project management, infrastructure development, and marine construction. Look for technical expertise relevant to our project sectors and candidates who demonstrate alignment with our values of quality, innovation, and professional integrity.
+        return f"""
+Context:
+{context}
+{conversation}
+Here is the question you need to answer:
+Question:
+{question}
 
+Answer:"""
 
+    def _build_prompt(self, question: str, context_chunks: List[str], history: Optional[str] = None) -> str:
+        # The static instructions always come first so every request shares the same prefix
+        return SYSTEM_PROMPT + self._build_request(question, context_chunks, history)
 
+    def estimate_prompt_tokens(self, question: str, context_chunks: List[str], history: Optional[str] = None) -> int:
+        return SYSTEM_PROMPT_TOKENS + estimate_tokens(self._build_request(question, context_chunks, history))
 
+    def _attempt(self, priority: str, fn: Callable[[], Any]) -> Any:
+        try:
+            return self.governor.run(priority, fn)
+        except GeminiUnavailableError:
+            raise
+        except Exception:
+            metrics.API_ERRORS.inc("generation")
+            raise
+
+    def generate(self, prompt: str, priority: str = INTERACTIVE):
+        # The same prompt already in flight (one question asked twice at once) shares its response
+        return self.governor.coalesce(
+            "generation", sha256_text(prompt), lambda: self._attempt(priority, lambda: self.model.generate_content(prompt))
+        )
+
+    def generate_answer(self, question: str, context_chunks: List[str], history: Optional[str] = None) -> str:
+        prompt = self._build_prompt(question, context_chunks, history)
 
-        You are to search through all candidate resumes and job descriptions provided in the context chunks to find the most relevant information to answer the user's question.
-        Context chunks are excerpts from various candidate resumes and job descriptions.
+        try:
+            response = self.generate(prompt)
+            return response.text.strip()
+        except GeminiUnavailableError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate answer: {str(e)}")
 
+    async def _attempt_async(self, priority: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await self.governor.run_async(priority, fn)
+        except GeminiUnavailableError:
+            raise
+        except Exception:
+            metrics.API_ERRORS.inc("generation")
+            raise
+
+    async def generate_async(self, prompt: str, priority: str = INTERACTIVE):
+        return await self.governor.coalesce_async(
+            "generation", sha256_text(prompt),
+            lambda: self._attempt_async(priority, lambda: self.model.generate_content_async(prompt))
+        )
+
+    async def generate_answer_async(self, question: str, context_chunks: List[str], history: Optional[str] = None) -> str:
+        prompt = self._build_prompt(question, context_chunks, history)
 
-        Each chunk is labeled with a number for reference. Observe chunk metadata if provided, such as the candidate/document ID (resume/cv) it is extracted from. This will help you understand the different candidates/documents better.
-        When answering, adhere to the following guidelines:
-        1. Use only the information provided in the context chunks to formulate your answer.
-        2. If the context does not contain sufficient information to answer the question, respond with
-        "I don't know based on the provided context."
-            additionally, If you do not know the answer based on the provided context, do not attempt to fabricate an answer. (i.e if you do not know the document ID, leave blank. Never make up information you do not have or know.)
-        3. Ensure your answer is clear, concise, and directly addresses the user's question.
-        4. Keep conversation professional, but friendly, trying to maintain a focus on HR recruitment topics.
-        Here is the information you have:
-        Context:
-        5. Do not reference chunk numbers in your final answer. Refer only to the content, identifying candidates by their Name idealy, and documnent IDs only if necessary.
-        {context}
+        try:
+            response = await self.generate_async(prompt)
+            return response.text.strip()
+        except GeminiUnavailableError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate answer: {str(e)}")
 
-        Here is the question you need to answer:
-        Question:
-        {question}
+    def stream_answer(self, question: str, context_chunks: List[str]) -> Iterator[str]:
+        prompt = self._build_prompt(question, context_chunks)
 
-Answer:"""
+        # Streams are not coalesced, and hold their concurrency slot only until the stream opens
+        try:
+            response = self._attempt(INTERACTIVE, lambda: self.model.generate_content(prompt, stream=True))
+        except GeminiUnavailableError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate answer: {str(e)}")
 
         try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
         except Exception as e:
+            metrics.API_ERRORS.inc("generation")
             raise RuntimeError(f"Failed to generate answer: {str(e)}")
+        finally:
+            # Closing the generator early (client went away) cancels the
+            # underlying gRPC stream so Gemini stops generating.
+            cancel = getattr(getattr(response, "_iterator", None), "cancel", None)
+            if cancel:
+                cancel()
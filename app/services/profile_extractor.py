@@ -0,0 +1,349 @@
+"""Structured candidate profiles extracted from CV text at ingest time.
+
+A profile holds the fields recruiters filter on (name, years of experience,
+sectors, skills, certifications, location) so those questions can be answered
+from an indexed table instead of retrieval plus generation. Extraction is
+pluggable: ``RuleBasedProfileExtractor`` uses patterns and vocabularies and
+costs nothing; ``LLMProfileExtractor`` asks a generative model for JSON and
+falls back to the rules when the reply is unusable.
+"""
+import json
+import logging
+import re
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_EXTRACTORS = ("none", "rules", "llm")
+
+# Sector -> phrases that place a role or project in it
+SECTORS: Dict[str, Tuple[str, ...]] = {
+    "marine": (
+        "marine", "port", "ports", "harbour", "harbor", "quay", "quay wall", "jetty", "dredging",
+        "breakwater", "offshore", "berth"
+    ),
+    "infrastructure": ("infrastructure", "utilities", "earthworks"),
+    "roads_and_bridges": ("road", "roads", "highway", "bridge", "bridges", "interchange", "asphalt", "flyover"),
+    "railways": ("railway", "railways", "rail", "metro", "monorail", "tram", "lrt"),
+    "water": ("water treatment", "wastewater", "desalination", "sewage", "pumping station"),
+    "buildings": ("building", "buildings", "residential", "high-rise", "tower", "hospital", "fit-out"),
+    "oil_and_gas": ("oil", "gas", "petroleum", "refinery", "pipeline", "pipelines"),
+    "power": ("power plant", "substation", "transmission line", "solar", "wind farm"),
+}
+
+# Skills recognised anywhere in the text, besides those listed under a skills heading
+SKILLS = (
+    "autocad", "revit", "civil 3d", "navisworks", "tekla", "etabs", "sap2000", "staad pro", "primavera p6",
+    "primavera", "ms project", "sap", "excel", "bim", "bim coordination", "structural steel design",
+    "reinforced concrete", "geotechnical surveys", "port construction", "dredging operations",
+    "project scheduling", "cost estimation", "quantity surveying", "hse supervision", "marine piling",
+    "contract administration", "value engineering", "risk management", "procurement", "python"
+)
+
+# Certification -> pattern; codes such as "PMP-12345" count as the certification
+CERTIFICATIONS: Dict[str, str] = {
+    "PMP": r"\bPMP\b",
+    "PMI-RMP": r"\bPMI[- ]RMP\b",
+    "PMI-SP": r"\bPMI[- ]SP\b",
+    "PRINCE2": r"\bPRINCE ?2\b",
+    "NEBOSH": r"\bNEBOSH\b",
+    "IOSH": r"\bIOSH\b",
+    "OSHA": r"\bOSHA\b",
+    "CSWIP": r"\bCSWIP\b",
+    "LEED": r"\bLEED\b",
+    "ISO 9001": r"\bISO ?9001\b",
+    "Six Sigma": r"\bsix sigma\b",
+    "AWS": r"\bAWS\b",
+    "CCNA": r"\bCCNA\b",
+    "Chartered Engineer": r"\b(?:chartered engineer|CEng)\b",
+}
+
+CITIES = (
+    "Cairo", "Giza", "Alexandria", "Port Said", "Suez", "Ain Sokhna", "Damietta", "Ismailia", "Mansoura",
+    "Tanta", "Aswan", "Luxor", "Hurghada", "Sharm El Sheikh", "New Capital", "Dubai", "Abu Dhabi",
+    "Riyadh", "Jeddah", "Dammam", "Doha", "Kuwait", "Muscat", "Amman", "Beirut", "Casablanca", "Tunis"
+)
+
+_SECTOR_PATTERNS = {
+    sector: re.compile(r"\b(?:" + "|".join(re.escape(p) for p in phrases) + r")\b", re.IGNORECASE)
+    for sector, phrases in SECTORS.items()
+}
+_SKILL_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(s) for s in sorted(SKILLS, key=len, reverse=True)) + r")\b", re.IGNORECASE
+)
+_CERT_PATTERNS = {name: re.compile(pattern, re.IGNORECASE) for name, pattern in CERTIFICATIONS.items()}
+_CITY_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(c) for c in CITIES) + r")\b", re.IGNORECASE)
+_CITY_NAMES = {city.lower(): city for city in CITIES}
+
+_YEAR = r"(?:19|20)\d{2}"
+_RANGE = re.compile(
+    rf"\b({_YEAR})\s*(?:-|–|—|to)\s*(?:[A-Za-z]{{3,9}}\.?\s+)?({_YEAR}|present|current|now|date|today)\b",
+    re.IGNORECASE
+)
+_STATED_YEARS = re.compile(
+    r"\b(\d{1,2})\+?\s*(?:years?|yrs?)\b(?:\s+of)?(?:\s+[\w&/-]+){0,4}?\s+experience", re.IGNORECASE
+)
+_SKILLS_LINE = re.compile(r"^\s*(?:core |key |technical )?skills\s*[:\-]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+_LOCATION = re.compile(
+    r"(?i:\bbased in|\blocated in|\bresiding in|\blocation\s*:|\baddress\s*:|\bcity\s*:)"
+    r"\s*([A-Z][\w'.-]*(?:\s+[A-Z][\w'.-]*){0,2})"
+)
+_HEADINGS = {
+    "resume", "curriculum vitae", "cv", "profile", "summary", "experience", "education", "skills", "contact"
+}
+
+# Longest career counted; anything above is a parsing accident
+MAX_YEARS = 60
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+@dataclass
+class CandidateProfile:
+    document_id: str
+    name: Optional[str] = None
+    years_experience: Optional[float] = None
+    location: Optional[str] = None
+    # Sector -> years spent in roles mentioning it (0 when mentioned without dates)
+    sectors: Dict[str, float] = field(default_factory=dict)
+    skills: List[str] = field(default_factory=list)
+    certifications: List[str] = field(default_factory=list)
+    extractor: str = "rules"
+    extracted_at: float = field(default_factory=time.time)
+
+
+def assemble_text(pieces: Iterable[Tuple[str, Optional[int], Optional[int]]], max_chars: int) -> str:
+    """Rebuild document text from overlapping chunks, up to ``max_chars``.
+
+    Chunks carry their offsets into the document, so the text they share with
+    the previous chunk is skipped; chunks without offsets are joined by lines.
+    """
+    parts: List[str] = []
+    length = 0
+    end = 0
+    for text, start_char, end_char in pieces:
+        if start_char is not None and end_char is not None:
+            if end_char <= end:
+                continue
+            text = text[max(0, end - start_char):]
+            end = end_char
+        elif parts:
+            text = "\n" + text
+        parts.append(text)
+        length += len(text)
+        if length >= max_chars:
+            break
+    return "".join(parts)[:max_chars]
+
+
+def _year_spans(text: str) -> List[Tuple[int, int, int]]:
+    """(position, start year, end year) of every date range, open ranges ending this year."""
+    this_year = time.localtime().tm_year
+    spans = []
+    for match in _RANGE.finditer(text):
+        start = int(match.group(1))
+        end = this_year if not match.group(2)[0].isdigit() else int(match.group(2))
+        if start <= end <= this_year and end - start <= MAX_YEARS:
+            spans.append((match.start(), start, end))
+    return spans
+
+
+def _covered_years(spans: Iterable[Tuple[int, int]]) -> float:
+    # Overlapping roles are counted once
+    total = 0
+    covered_to: Optional[int] = None
+    for start, end in sorted(spans):
+        if covered_to is not None:
+            start = max(start, covered_to)
+        if end > start:
+            total += end - start
+        covered_to = end if covered_to is None else max(covered_to, end)
+    return float(total)
+
+
+class ProfileExtractor(ABC):
+    name = "base"
+
+    @abstractmethod
+    def extract(self, document_id: str, text: str) -> CandidateProfile:
+        ...
+
+
+class RuleBasedProfileExtractor(ProfileExtractor):
+    """Patterns and vocabularies; fast, deterministic and blind to paraphrase."""
+
+    name = "rules"
+
+    def extract(self, document_id: str, text: str) -> CandidateProfile:
+        spans = _year_spans(text)
+        stated = [int(m.group(1)) for m in _STATED_YEARS.finditer(text) if int(m.group(1)) <= MAX_YEARS]
+        years = max([_covered_years((s, e) for _, s, e in spans)] + stated) if spans or stated else None
+
+        return CandidateProfile(
+            document_id=document_id,
+            name=self._name(text),
+            years_experience=years,
+            location=self._location(text),
+            sectors=self._sectors(text, spans),
+            skills=self._skills(text),
+            certifications=[name for name, pattern in _CERT_PATTERNS.items() if pattern.search(text)],
+            extractor=self.name
+        )
+
+    @staticmethod
+    def _name(text: str) -> Optional[str]:
+        # A CV opens with the candidate's name: the first short line of capitalised words
+        for line in text.splitlines()[:5]:
+            line = line.strip()
+            if not line:
+                continue
+            words = [word for word in line.split() if not word.isdigit()]
+            if (
+                2 <= len(words) <= 4
+                and all(word[:1].isupper() and word.replace("-", "").replace("'", "").isalpha() for word in words)
+                and normalize_term(line) not in _HEADINGS
+            ):
+                return line
+            break
+        return None
+
+    @staticmethod
+    def _location(text: str) -> Optional[str]:
+        match = _LOCATION.search(text)
+        if match:
+            city = _CITY_PATTERN.match(match.group(1))
+            return _CITY_NAMES[city.group(0).lower()] if city else match.group(1).rstrip(".")
+        city = _CITY_PATTERN.search(text[:1000])
+        return _CITY_NAMES[city.group(0).lower()] if city else None
+
+    @staticmethod
+    def _sectors(text: str, spans: List[Tuple[int, int, int]]) -> Dict[str, float]:
+        # A date range opens a role that runs until the next one; each role
+        # counts towards every sector its text mentions
+        sector_spans: Dict[str, List[Tuple[int, int]]] = {}
+        bounds = [position for position, _, _ in spans] + [len(text)]
+        for (position, start, end), next_position in zip(spans, bounds[1:]):
+            role = text[position:next_position]
+            for sector, pattern in _SECTOR_PATTERNS.items():
+                if pattern.search(role):
+                    sector_spans.setdefault(sector, []).append((start, end))
+        sectors = {sector: _covered_years(s) for sector, s in sector_spans.items()}
+        for sector, pattern in _SECTOR_PATTERNS.items():
+            if sector not in sectors and pattern.search(text):
+                sectors[sector] = 0.0
+        return sectors
+
+    @staticmethod
+    def _skills(text: str) -> List[str]:
+        skills = {normalize_term(match.group(0)) for match in _SKILL_PATTERN.finditer(text)}
+        for line in _SKILLS_LINE.finditer(text):
+            for item in re.split(r"[,;|•]", line.group(1)):
+                item = normalize_term(item.strip(" ."))
+                if item and len(item) <= 40:
+                    skills.add(item)
+        return sorted(skills)
+
+
+PROFILE_PROMPT = """Extract a structured profile from the CV below. Reply with one JSON object and nothing else, with these keys:
+"name": the candidate's full name or null,
+"years_experience": total years of professional experience as a number or null,
+"location": the city the candidate is based in or null,
+"sectors": an object mapping each sector the candidate worked in to years spent in it; use only these sectors: {sectors},
+"skills": a list of short skill names,
+"certifications": a list of certification names without ID numbers.
+
+CV:
+{text}
+"""
+
+
+class LLMProfileExtractor(ProfileExtractor):
+    """Asks a generative model for the profile as JSON.
+
+    ``model`` is anything with ``generate_content(prompt)`` returning an object
+    with ``.text``, so a fake model can stand in offline. A reply that fails to
+    parse, or a failed call, falls back to ``fallback`` when one is given.
+    """
+
+    name = "llm"
+
+    def __init__(self, model, max_chars: int = 12000, fallback: Optional[ProfileExtractor] = None):
+        self.model = model
+        self.max_chars = max_chars
+        self.fallback = fallback
+
+    def build_prompt(self, text: str) -> str:
+        return PROFILE_PROMPT.format(sectors=", ".join(SECTORS), text=text[:self.max_chars])
+
+    def extract(self, document_id: str, text: str) -> CandidateProfile:
+        try:
+            response = self.model.generate_content(self.build_prompt(text))
+            return self.parse(document_id, response.text)
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            logger.warning("LLM profile extraction failed for %s, using %s: %s", document_id, self.fallback.name, e)
+            return self.fallback.extract(document_id, text)
+
+    def parse(self, document_id: str, reply: str) -> CandidateProfile:
+        # Models like to wrap JSON in a Markdown fence
+        reply = reply.strip()
+        start, end = reply.find("{"), reply.rfind("}")
+        if start < 0 or end < start:
+            raise ValueError("No JSON object in the model reply")
+        data = json.loads(reply[start:end + 1])
+
+        def text_or_none(value) -> Optional[str]:
+            if value is None:
+                return None
+            return str(value).strip() or None
+
+        def years_or_none(value) -> Optional[float]:
+            try:
+                years = float(value)
+            except (TypeError, ValueError):
+                return None
+            return years if 0 <= years <= MAX_YEARS else None
+
+        sectors: Dict[str, float] = {}
+        raw_sectors = data.get("sectors") or {}
+        if isinstance(raw_sectors, list):
+            raw_sectors = {sector: 0 for sector in raw_sectors}
+        for sector, years in raw_sectors.items():
+            key = normalize_term(str(sector)).replace(" ", "_")
+            if key in SECTORS:
+                sectors[key] = years_or_none(years) or 0.0
+
+        return CandidateProfile(
+            document_id=document_id,
+            name=text_or_none(data.get("name")),
+            years_experience=years_or_none(data.get("years_experience")),
+            location=text_or_none(data.get("location")),
+            sectors=sectors,
+            skills=sorted({normalize_term(str(s)) for s in data.get("skills") or [] if str(s).strip()}),
+            certifications=sorted({str(c).strip() for c in data.get("certifications") or [] if str(c).strip()}),
+            extractor=self.name
+        )
+
+
+def create_profile_extractor(settings: Settings, model=None) -> Optional[ProfileExtractor]:
+    """The configured extractor, or None when profiles are turned off."""
+    if settings.profile_extractor not in PROFILE_EXTRACTORS:
+        raise ValueError(
+            f"Unknown profile extractor: {settings.profile_extractor}. Supported: {list(PROFILE_EXTRACTORS)}"
+        )
+    if settings.profile_extractor == "none":
+        return None
+    rules = RuleBasedProfileExtractor()
+    if settings.profile_extractor == "rules":
+        return rules
+    if model is None:
+        raise ValueError("The llm profile extractor needs a generative model")
+    return LLMProfileExtractor(model, max_chars=settings.profile_max_chars, fallback=rules)
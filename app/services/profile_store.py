@@ -0,0 +1,208 @@
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.profile_extractor import CandidateProfile, normalize_term
+
+PROFILE_SORTS = ("experience", "name", "recent")
+
+
+@dataclass
+class ProfileFilter:
+    """All conditions must hold; list filters need every listed term."""
+    min_years_experience: Optional[float] = None
+    max_years_experience: Optional[float] = None
+    sectors: List[str] = field(default_factory=list)
+    min_sector_years: Optional[float] = None  # per listed sector
+    skills: List[str] = field(default_factory=list)
+    certifications: List[str] = field(default_factory=list)
+    location: Optional[str] = None  # substring, case-insensitive
+    name: Optional[str] = None  # substring, case-insensitive
+
+
+class ProfileStore:
+    """Candidate profiles in SQLite, with every sector, skill and certification indexed.
+
+    Scalar fields live in ``profiles``; each list entry is a row of
+    ``profile_terms`` keyed by (kind, term), so a filter on several skills is a
+    handful of index lookups however large the corpus.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "document_id TEXT PRIMARY KEY, name TEXT, years_experience REAL, location TEXT, "
+            "extractor TEXT NOT NULL, extracted_at REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profile_terms ("
+            "kind TEXT NOT NULL, term TEXT NOT NULL, document_id TEXT NOT NULL, years REAL, "
+            "PRIMARY KEY (kind, term, document_id)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_profiles_years ON profiles(years_experience, document_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_profile_terms_document ON profile_terms(document_id)")
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    @staticmethod
+    def _terms(profile: CandidateProfile) -> List[Tuple[str, str, str, Optional[float]]]:
+        terms = [("sector", sector, profile.document_id, years) for sector, years in profile.sectors.items()]
+        terms += [("skill", normalize_term(skill), profile.document_id, None) for skill in profile.skills]
+        terms += [
+            ("certification", normalize_term(cert), profile.document_id, None) for cert in profile.certifications
+        ]
+        return terms
+
+    def upsert(self, profiles: Iterable[CandidateProfile]) -> None:
+        profiles = list(profiles)
+        with self._lock:
+            self._delete(p.document_id for p in profiles)
+            self._conn.executemany(
+                "INSERT INTO profiles (document_id, name, years_experience, location, extractor, extracted_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        p.document_id, p.name, p.years_experience, p.location, p.extractor, p.extracted_at,
+                        json.dumps({"sectors": p.sectors, "skills": p.skills, "certifications": p.certifications})
+                    )
+                    for p in profiles
+                ]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO profile_terms (kind, term, document_id, years) VALUES (?, ?, ?, ?)",
+                [term for p in profiles for term in self._terms(p)]
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _row(row) -> CandidateProfile:
+        document_id, name, years, location, extractor, extracted_at, data = row
+        lists = json.loads(data)
+        return CandidateProfile(
+            document_id=document_id,
+            name=name,
+            years_experience=years,
+            location=location,
+            sectors=lists["sectors"],
+            skills=lists["skills"],
+            certifications=lists["certifications"],
+            extractor=extractor,
+            extracted_at=extracted_at
+        )
+
+    def get(self, document_id: str) -> Optional[CandidateProfile]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT document_id, name, years_experience, location, extractor, extracted_at, data "
+                "FROM profiles WHERE document_id = ?",
+                (document_id,)
+            ).fetchone()
+        return self._row(row) if row else None
+
+    def search(
+        self,
+        filters: ProfileFilter,
+        sort: str = "experience",
+        limit: int = 50,
+        offset: int = 0
+    ) -> Tuple[List[CandidateProfile], int]:
+        """Matching profiles, best first, and how many match in total."""
+        if sort not in PROFILE_SORTS:
+            raise ValueError(f"Unknown profile sort: {sort}. Supported: {list(PROFILE_SORTS)}")
+        clauses: List[str] = []
+        params: List = []
+        if filters.min_years_experience is not None:
+            clauses.append("p.years_experience >= ?")
+            params.append(filters.min_years_experience)
+        if filters.max_years_experience is not None:
+            clauses.append("p.years_experience <= ?")
+            params.append(filters.max_years_experience)
+        if filters.location:
+            clauses.append("p.location LIKE ?")
+            params.append(f"%{filters.location}%")
+        if filters.name:
+            clauses.append("p.name LIKE ?")
+            params.append(f"%{filters.name}%")
+
+        sectors = [normalize_term(sector).replace(" ", "_") for sector in filters.sectors]
+        for sector in sectors:
+            years_clause = " AND t.years >= ?" if filters.min_sector_years is not None else ""
+            clauses.append(
+                "p.document_id IN (SELECT t.document_id FROM profile_terms t "
+                f"WHERE t.kind = 'sector' AND t.term = ?{years_clause})"
+            )
+            params.append(sector)
+            if filters.min_sector_years is not None:
+                params.append(filters.min_sector_years)
+        for kind, terms in (("skill", filters.skills), ("certification", filters.certifications)):
+            for term in terms:
+                clauses.append(
+                    "p.document_id IN (SELECT t.document_id FROM profile_terms t WHERE t.kind = ? AND t.term = ?)"
+                )
+                params.extend([kind, normalize_term(term)])
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        order_params: List = []
+        if sort == "name":
+            order = "p.name IS NULL, p.name COLLATE NOCASE, p.document_id"
+        elif sort == "recent":
+            order = "p.extracted_at DESC, p.document_id"
+        elif sectors:
+            # Most experience in the requested sectors first
+            placeholders = ",".join("?" * len(sectors))
+            order = (
+                "(SELECT COALESCE(SUM(t.years), 0) FROM profile_terms t WHERE t.kind = 'sector' "
+                f"AND t.term IN ({placeholders}) AND t.document_id = p.document_id) DESC, "
+                "p.years_experience DESC, p.document_id"
+            )
+            order_params = sectors
+        else:
+            # SQLite sorts NULLs last when descending, so unknown experience goes to the end
+            order = "p.years_experience DESC, p.document_id"
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.document_id, p.name, p.years_experience, p.location, p.extractor, p.extracted_at, p.data "
+                f"FROM profiles p{where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + order_params + [limit, offset]
+            ).fetchall()
+            total = self._conn.execute(f"SELECT COUNT(*) FROM profiles p{where}", params).fetchone()[0]
+        return [self._row(row) for row in rows], total
+
+    def document_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT document_id FROM profiles")]
+
+    def _delete(self, document_ids: Iterable[str]) -> None:
+        document_ids = list(document_ids)
+        for i in range(0, len(document_ids), 500):
+            batch = document_ids[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            self._conn.execute(f"DELETE FROM profiles WHERE document_id IN ({placeholders})", batch)
+            self._conn.execute(f"DELETE FROM profile_terms WHERE document_id IN ({placeholders})", batch)
+
+    def remove(self, document_ids: List[str]) -> None:
+        with self._lock:
+            self._delete(document_ids)
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"total_profiles": self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
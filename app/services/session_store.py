@@ -0,0 +1,192 @@
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+import numpy as np
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+# Charged per session on top of its context and summary
+SESSION_OVERHEAD_BYTES = 1024
+
+# Earlier questions searched along with a follow-up, and their weight against it
+RECENT_QUESTIONS = 3
+HISTORY_WEIGHT = 0.5
+
+
+class SessionNotFoundError(Exception):
+    pass
+
+
+@dataclass
+class QuerySession:
+    session_id: str
+    document_id: Optional[str] = None
+    # Chunks retrieved by the last full search, with unit-length embeddings
+    # (one row per chunk) so follow-ups can be scored against them locally
+    chunk_ids: List[str] = field(default_factory=list)
+    chunk_texts: List[str] = field(default_factory=list)
+    embeddings: Optional[np.ndarray] = None
+    summary: str = ""
+    recent_questions: List[str] = field(default_factory=list)
+    turns: int = 0
+    searches: int = 0
+    created_at: float = field(default_factory=time.time)
+    expires_at: float = 0.0  # monotonic
+
+    @property
+    def document_ids(self) -> List[str]:
+        return list(dict.fromkeys(chunk_id.split("_chunk_")[0] for chunk_id in self.chunk_ids))
+
+    @property
+    def size_bytes(self) -> int:
+        size = SESSION_OVERHEAD_BYTES + sys.getsizeof(self.summary)
+        size += sum(sys.getsizeof(question) for question in self.recent_questions)
+        size += sum(sys.getsizeof(text) for text in self.chunk_texts)
+        size += sum(sys.getsizeof(chunk_id) for chunk_id in self.chunk_ids)
+        if self.embeddings is not None:
+            size += self.embeddings.nbytes
+        return size
+
+    def set_context(self, chunk_ids: List[str], chunk_texts: List[str], embeddings: Optional[np.ndarray]) -> None:
+        if embeddings is not None and len(embeddings):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = (embeddings / np.where(norms > 0, norms, 1)).astype(np.float32)
+        self.chunk_ids = chunk_ids
+        self.chunk_texts = chunk_texts
+        self.embeddings = embeddings
+
+    def add_turn(self, question: str, answer: str, summary_max_chars: int) -> None:
+        self.summary = update_summary(self.summary, question, answer, summary_max_chars)
+        self.recent_questions = (self.recent_questions + [question])[-RECENT_QUESTIONS:]
+        self.turns += 1
+
+
+def blend_query(question_embedding: List[float], history_embedding: Optional[List[float]]) -> List[float]:
+    """A follow-up's search vector: the question, pulled towards the questions just before it.
+
+    "Which certifications do they hold?" alone matches every CV; with the
+    previous question mixed in it finds the candidate being discussed, while
+    a question naming someone new still outweighs the history.
+    """
+    query = np.asarray(question_embedding, dtype=np.float32)
+    query = query / (np.linalg.norm(query) or 1.0)
+    if history_embedding is not None:
+        history = np.asarray(history_embedding, dtype=np.float32)
+        query = query + HISTORY_WEIGHT * history / (np.linalg.norm(history) or 1.0)
+        query = query / (np.linalg.norm(query) or 1.0)
+    return query.tolist()
+
+
+def update_summary(summary: str, question: str, answer: str, max_chars: int, answer_chars: int = 240) -> str:
+    """Append one turn as a question and the answer's first sentence, dropping the oldest turns past ``max_chars``."""
+    first_sentence = _SENTENCE_END.split(" ".join(answer.split()), 1)[0][:answer_chars]
+    turns = [line for line in summary.splitlines() if line]
+    turns.append(f"Q: {' '.join(question.split())} A: {first_sentence}")
+    while len(turns) > 1 and sum(len(turn) + 1 for turn in turns) > max_chars:
+        turns.pop(0)
+    return "\n".join(turns)[-max_chars:]
+
+
+class SessionStore:
+    """Query sessions in memory, evicted when idle past the TTL or least recently used past a memory budget.
+
+    Sizes are estimates: the cached chunk text and embeddings dominate, and
+    both are counted.
+    """
+
+    def __init__(self, ttl_seconds: float = 1800, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.expirations = 0
+
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, QuerySession]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+
+    def _drop(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._bytes -= self._sizes.pop(session_id, 0)
+
+    def _expire(self, now: float) -> None:
+        # Oldest first: the first live session ends the sweep
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.expires_at >= now:
+                break
+            self._drop(session_id)
+            self.expirations += 1
+
+    def _store(self, session: QuerySession) -> None:
+        now = time.monotonic()
+        session.expires_at = now + self.ttl_seconds
+        size = session.size_bytes
+        with self._lock:
+            self._drop(session.session_id)
+            self._sessions[session.session_id] = session
+            self._sizes[session.session_id] = size
+            self._bytes += size
+            self._expire(now)
+            while self._bytes > self.max_bytes and len(self._sessions) > 1:
+                self._drop(next(iter(self._sessions)))
+                self.evictions += 1
+
+    def create(self, document_id: Optional[str] = None) -> QuerySession:
+        session = QuerySession(session_id=uuid4().hex, document_id=document_id)
+        self._store(session)
+        return session
+
+    def get(self, session_id: str) -> QuerySession:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and session.expires_at < time.monotonic():
+                self._drop(session_id)
+                self.expirations += 1
+                session = None
+            if session is None:
+                raise SessionNotFoundError(f"Session not found or expired: {session_id}")
+            # Using a session keeps it alive; the order stays by expiry
+            session.expires_at = time.monotonic() + self.ttl_seconds
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def save(self, session: QuerySession) -> None:
+        """Store a session after a turn, renewing its TTL and re-measuring it."""
+        self._store(session)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._drop(session_id)
+            return True
+
+    def invalidate_documents(self, document_ids: List[str]) -> None:
+        # Cached chunks of changed or deleted documents may be stale; the
+        # session keeps its summary and searches again on its next turn
+        stale = set(document_ids)
+        with self._lock:
+            for session_id, session in self._sessions.items():
+                if any(chunk_id.split("_chunk_")[0] in stale for chunk_id in session.chunk_ids):
+                    session.set_context([], [], None)
+                    size = session.size_bytes
+                    self._bytes += size - self._sizes[session_id]
+                    self._sizes[session_id] = size
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
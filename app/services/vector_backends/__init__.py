@@ -0,0 +1,66 @@
+import os
+from typing import Optional
+
+from app.config import Settings
+from app.services.vector_backends.base import VectorBackend
+from app.services.vector_backends.sharded_backend import (
+    ShardLayout,
+    ShardedBackend,
+    backend_root,
+    read_layout,
+    shard_layout,
+    write_layout
+)
+
+VECTOR_BACKENDS = ("chroma", "numpy")
+
+
+def _create_single(settings: Settings) -> VectorBackend:
+    # Imported lazily so the unused backend's dependencies are never loaded
+    if settings.vector_backend == "chroma":
+        from app.services.vector_backends.chroma_backend import ChromaBackend
+        return ChromaBackend(settings)
+    if settings.vector_backend == "numpy":
+        from app.services.vector_backends.numpy_backend import NumpyBackend
+        return NumpyBackend(settings)
+    raise ValueError(f"Unknown vector backend: {settings.vector_backend}. Supported: {list(VECTOR_BACKENDS)}")
+
+
+def open_backend(settings: Settings, layout: Optional[ShardLayout]) -> VectorBackend:
+    """Open the store with an explicit layout, whatever the stored one is."""
+    if layout is None:
+        return _create_single(settings)
+    return ShardedBackend(settings, layout, _create_single)
+
+
+def _has_unsharded_data(settings: Settings) -> bool:
+    marker = "index.sqlite3" if settings.vector_backend == "numpy" else "chroma.sqlite3"
+    if not os.path.exists(os.path.join(backend_root(settings), marker)):
+        return False
+    backend = _create_single(settings)
+    try:
+        return backend.count() > 0
+    finally:
+        backend.close()
+
+
+def create_backend(settings: Settings) -> VectorBackend:
+    if settings.vector_backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Unknown vector backend: {settings.vector_backend}. Supported: {list(VECTOR_BACKENDS)}")
+    layout = shard_layout(settings)
+    stored = read_layout(backend_root(settings))
+    if stored is None and layout is not None and not _has_unsharded_data(settings):
+        # A new store: it starts out in the configured layout
+        write_layout(backend_root(settings), layout)
+        stored = layout
+    if stored != layout:
+        # Opening with another layout would hide the existing chunks, not move them
+        current = f"{stored.shard_by} sharding over {len(stored.shards)} shards" if stored else "unsharded"
+        raise ValueError(
+            f"The vector store at {backend_root(settings)} is {current}, which does not match "
+            f"VECTOR_SHARDS / VECTOR_SHARD_BY; run python -m app.tools.reshard to change it"
+        )
+    return open_backend(settings, layout)
+
+
+__all__ = ["VECTOR_BACKENDS", "ShardLayout", "ShardedBackend", "VectorBackend", "create_backend", "open_backend"]
@@ -0,0 +1,138 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.config import Settings
+
+
+class HnswParams(NamedTuple):
+    """Build (``m``, ``construction_ef``) and search (``search_ef``) parameters of an HNSW index."""
+    m: int = 16
+    construction_ef: int = 100
+    search_ef: int = 10
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "HnswParams":
+        return cls(settings.hnsw_m, settings.hnsw_construction_ef, settings.hnsw_search_ef)
+
+
+class VectorBackend(ABC):
+    """Storage and similarity search for chunk embeddings.
+
+    Every chunk has an ID, an embedding, its text and a flat metadata dict that
+    always contains ``document_id``. Scores returned by ``query`` are cosine
+    similarities, higher is better. ``path`` is the directory the backend
+    persists to.
+    """
+
+    path: str
+
+    @abstractmethod
+    def warm_up(self) -> None:
+        ...
+
+    @abstractmethod
+    def close(self) -> None:
+        ...
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: List[Dict]
+    ) -> None:
+        ...
+
+    @abstractmethod
+    def query(
+        self,
+        embedding: List[float],
+        top_k: int,
+        document_id: Optional[str] = None
+    ) -> Tuple[List[str], List[str], List[float]]:
+        ...
+
+    def query_many(
+        self,
+        embeddings: List[List[float]],
+        top_k: int,
+        document_id: Optional[str] = None
+    ) -> List[Tuple[List[str], List[str], List[float]]]:
+        # Backends that can search several vectors in one call override this
+        return [self.query(embedding, top_k, document_id) for embedding in embeddings]
+
+    @abstractmethod
+    def get_texts(self, ids: List[str]) -> Dict[str, str]:
+        ...
+
+    @abstractmethod
+    def get_embeddings(self, ids: List[str]) -> Dict[str, Sequence[float]]:
+        """Stored vectors by chunk ID; unknown IDs are left out."""
+
+    @abstractmethod
+    def get_document(
+        self,
+        document_id: str,
+        include_embeddings: bool = False
+    ) -> Tuple[List[str], List[Dict], List[List[float]]]:
+        ...
+
+    @abstractmethod
+    def find_first(self, filters: Dict[str, str]) -> Optional[Dict]:
+        """Metadata of one chunk whose metadata matches every key in ``filters``."""
+
+    @abstractmethod
+    def document_chunk_ids(self, document_id: str) -> List[str]:
+        ...
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        ...
+
+    def delete_documents(self, document_ids: List[str]) -> None:
+        """Delete every chunk of the given documents without reading them back."""
+        ids = [chunk_id for document_id in document_ids for chunk_id in self.document_chunk_ids(document_id)]
+        self.delete(ids)
+
+    @abstractmethod
+    def iter_all(self, page_size: int = 1000) -> Iterator[Tuple[List[str], List[str], List[Dict]]]:
+        """Pages of (ids, texts, metadatas) covering every stored chunk."""
+
+    def iter_records(
+        self,
+        page_size: int = 1000
+    ) -> Iterator[Tuple[List[str], List[List[float]], List[str], List[Dict]]]:
+        """Pages of (ids, embeddings, texts, metadatas): everything needed to copy the store."""
+        # Generic fallback through per-document reads; backends override it
+        for ids, texts, metadatas in self.iter_all(page_size):
+            embeddings: Dict[str, List[float]] = {}
+            for document_id in {metadata["document_id"] for metadata in metadatas}:
+                doc_ids, _, doc_embeddings = self.get_document(document_id, include_embeddings=True)
+                embeddings.update(zip(doc_ids, doc_embeddings))
+            yield ids, [embeddings[chunk_id] for chunk_id in ids], texts, metadatas
+
+    def index_params(self) -> Optional[HnswParams]:
+        """Parameters the search index was built with; None for exact search."""
+        return None
+
+    def reindex(
+        self,
+        params: HnswParams,
+        batch_size: int = 1000,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> None:
+        """Rebuild the search index with ``params`` while searches and writes go on.
+
+        ``progress`` is called with (chunks copied, chunks to copy) as the
+        rebuild advances.
+        """
+        raise NotImplementedError(f"The {type(self).__name__} has no index to rebuild")
+
+    @abstractmethod
+    def drop(self) -> None:
+        """Delete everything this backend stores. The backend is closed afterwards."""
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
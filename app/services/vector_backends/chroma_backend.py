@@ -0,0 +1,350 @@
+import base64
+import logging
+import threading
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from app.config import Settings
+from app.services.vector_backends.base import HnswParams, VectorBackend
+from app.utils.text_codec import TextCodec
+
+logger = logging.getLogger(__name__)
+
+# Chunk text is the Chroma document, stored once; metadata holds only IDs,
+# hashes and numbers, so the document_id/category filters scan small rows.
+# The flag says whether the document is base85 zstd, and is always written
+# because Chroma merges metadata on upsert.
+TEXT_ZSTD_KEY = "text_zstd"
+
+# Earlier layouts: a truncated second copy of the text ...
+LEGACY_TEXT_KEY = "chunk_text"
+# ... and, later, the text kept in metadata instead of the document. Chroma
+# cannot drop a metadata key on upsert, so an overwritten chunk may still
+# carry it; the document wins, and compact_chroma or a reindex clears it
+METADATA_TEXT_KEY = "text"
+
+# A reindex builds "<name>_reindex", then renames the live collection to
+# "<name>_retired" and the new one to "<name>"
+REINDEX_SUFFIX = "_reindex"
+RETIRED_SUFFIX = "_retired"
+
+# How long a replaced collection is kept so searches already running on it finish
+RETIRE_GRACE_SECONDS = 5.0
+
+
+def collection_metadata(params: HnswParams) -> Dict:
+    return {
+        "hnsw:space": "cosine",
+        "hnsw:M": params.m,
+        "hnsw:construction_ef": params.construction_ef,
+        "hnsw:search_ef": params.search_ef,
+    }
+
+
+def read_params(metadata: Optional[Dict]) -> HnswParams:
+    # Keys left out mean Chroma's defaults, which HnswParams mirrors
+    metadata = metadata or {}
+    defaults = HnswParams()
+    return HnswParams(
+        int(metadata.get("hnsw:M", defaults.m)),
+        int(metadata.get("hnsw:construction_ef", defaults.construction_ef)),
+        int(metadata.get("hnsw:search_ef", defaults.search_ef))
+    )
+
+
+def pack_text(codec: TextCodec, text: str, metadata: Dict) -> Tuple[str, Dict]:
+    """The Chroma document and metadata to store for one chunk."""
+    packed = {key: value for key, value in metadata.items() if key not in (LEGACY_TEXT_KEY, METADATA_TEXT_KEY)}
+    encoded = codec.encode(text)
+    packed[TEXT_ZSTD_KEY] = isinstance(encoded, bytes)
+    if isinstance(encoded, bytes):
+        # Documents must be strings; base85 adds a quarter
+        return base64.b85encode(encoded).decode("ascii"), packed
+    return encoded, packed
+
+
+def unpack_text(metadata: Optional[Dict], document: Optional[str]) -> Tuple[str, Dict]:
+    metadata = dict(metadata or {})
+    metadata.pop(LEGACY_TEXT_KEY, None)
+    compressed = metadata.pop(TEXT_ZSTD_KEY, False)
+    metadata_text = metadata.pop(METADATA_TEXT_KEY, None)
+    if document is None:
+        # Written while the text was kept in metadata
+        document = metadata_text or ""
+    if compressed:
+        return TextCodec.decode(base64.b85decode(document)), metadata
+    return document, metadata
+
+
+class ChromaBackend(VectorBackend):
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.path = settings.chromadb_path
+        self.codec = TextCodec(settings.chunk_text_compression, settings.chunk_text_compression_level)
+        self.client = chromadb.PersistentClient(
+            path=settings.chromadb_path,
+            settings=ChromaSettings(anonymized_telemetry=False)
+        )
+        # Writes are mirrored into the collection a reindex is building, under
+        # this lock so a copied page and a concurrent delete cannot interleave
+        self._write_lock = threading.Lock()
+        self._reindex_lock = threading.Lock()
+        self._shadow = None
+        self._closing = threading.Event()
+        self.collection = self._open_collection(settings.collection_name, HnswParams.from_settings(settings))
+
+    def _open_collection(self, name: str, params: HnswParams):
+        names = {collection.name for collection in self.client.list_collections()}
+        if name not in names and name + RETIRED_SUFFIX in names:
+            # A reindex stopped between its two renames: the old collection is still whole
+            self.client.get_collection(name + RETIRED_SUFFIX).modify(name=name)
+            names.add(name)
+        elif name + RETIRED_SUFFIX in names:
+            self.client.delete_collection(name + RETIRED_SUFFIX)
+        if name + REINDEX_SUFFIX in names:
+            self.client.delete_collection(name + REINDEX_SUFFIX)
+
+        if name not in names:
+            return self.client.create_collection(name=name, metadata=collection_metadata(params))
+        # get_or_create would overwrite the stored parameters without rebuilding anything
+        collection = self.client.get_collection(name)
+        built = read_params(collection.metadata)
+        if built != params:
+            logger.warning(
+                "Collection %s was built with %s, not the configured %s; POST /index/reindex to rebuild it",
+                name, built, params
+            )
+        return collection
+
+    def warm_up(self) -> None:
+        # Querying with a stored vector forces Chroma to load the HNSW segment
+        sample = self.collection.peek(limit=1)
+        if sample['embeddings']:
+            self.collection.query(query_embeddings=[sample['embeddings'][0]], n_results=1)
+
+    def close(self) -> None:
+        # PersistentClient writes through to SQLite on every call, so there is
+        # nothing to flush; dropping the handles releases the index memory.
+        # A running reindex gives up at its next page.
+        self._closing.set()
+        with self._reindex_lock:
+            self.collection = None
+            self.client = None
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: List[Dict]
+    ) -> None:
+        packed = [pack_text(self.codec, text, metadata) for text, metadata in zip(texts, metadatas)]
+        documents = [document for document, _ in packed]
+        metadatas = [metadata for _, metadata in packed]
+        with self._write_lock:
+            for collection in self._writable():
+                collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def _writable(self) -> list:
+        return [self.collection] if self._shadow is None else [self.collection, self._shadow]
+
+    def query(
+        self,
+        embedding: List[float],
+        top_k: int,
+        document_id: Optional[str] = None
+    ) -> Tuple[List[str], List[str], List[float]]:
+        return self.query_many([embedding], top_k, document_id)[0]
+
+    def query_many(
+        self,
+        embeddings: List[List[float]],
+        top_k: int,
+        document_id: Optional[str] = None
+    ) -> List[Tuple[List[str], List[str], List[float]]]:
+        if not embeddings:
+            return []
+
+        # Prepare query filter: if document_id is provided, filter; else, search all
+        where_filter = {"document_id": document_id} if document_id else None
+
+        # One call for every query vector
+        results = self.collection.query(
+            query_embeddings=embeddings,
+            n_results=top_k,
+            where=where_filter,
+            include=["metadatas", "documents", "distances"]
+        )
+
+        ids = results['ids'] or [[] for _ in embeddings]
+        metadatas = results['metadatas'] or [[] for _ in embeddings]
+        documents = results['documents'] or [[] for _ in embeddings]
+        distances = results['distances'] or [[] for _ in embeddings]
+        return [
+            (chunk_ids, self._texts(chunk_metadatas, chunk_documents), [1 - dist for dist in dists])
+            for chunk_ids, chunk_metadatas, chunk_documents, dists in zip(ids, metadatas, documents, distances)
+        ]
+
+    @staticmethod
+    def _texts(metadatas: List[Optional[Dict]], documents: Optional[List[Optional[str]]]) -> List[str]:
+        documents = documents or [None] * len(metadatas)
+        return [unpack_text(metadata, document)[0] for metadata, document in zip(metadatas, documents)]
+
+    def get_texts(self, ids: List[str]) -> Dict[str, str]:
+        if not ids:
+            return {}
+        results = self.collection.get(ids=ids, include=["metadatas", "documents"])
+        return dict(zip(results['ids'], self._texts(results['metadatas'], results['documents'])))
+
+    def get_embeddings(self, ids: List[str]) -> Dict[str, Sequence[float]]:
+        if not ids:
+            return {}
+        results = self.collection.get(ids=ids, include=["embeddings"])
+        return dict(zip(results['ids'], results['embeddings']))
+
+    def get_document(
+        self,
+        document_id: str,
+        include_embeddings: bool = False
+    ) -> Tuple[List[str], List[Dict], List[List[float]]]:
+        include = ["metadatas", "embeddings"] if include_embeddings else ["metadatas"]
+        results = self.collection.get(where={"document_id": document_id}, include=include)
+        metadatas = [unpack_text(metadata, None)[1] for metadata in results['metadatas'] or []]
+        return results['ids'], metadatas, results.get('embeddings') or []
+
+    def find_first(self, filters: Dict[str, str]) -> Optional[Dict]:
+        conditions = [{key: value} for key, value in filters.items()]
+        where = {"$and": conditions} if len(conditions) > 1 else conditions[0]
+
+        results = self.collection.get(where=where, limit=1, include=["metadatas"])
+        if not results['ids']:
+            return None
+        return unpack_text(results['metadatas'][0], None)[1]
+
+    def document_chunk_ids(self, document_id: str) -> List[str]:
+        return self.collection.get(where={"document_id": document_id}, include=[])['ids']
+
+    def delete(self, ids: List[str]) -> None:
+        if ids:
+            with self._write_lock:
+                for collection in self._writable():
+                    collection.delete(ids=ids)
+
+    def delete_documents(self, document_ids: List[str]) -> None:
+        # Chroma resolves the filter to IDs itself; nothing is read back
+        with self._write_lock:
+            for collection in self._writable():
+                for i in range(0, len(document_ids), 500):
+                    collection.delete(where={"document_id": {"$in": document_ids[i:i + 500]}})
+
+    def iter_all(self, page_size: int = 1000) -> Iterator[Tuple[List[str], List[str], List[Dict]]]:
+        offset = 0
+        while True:
+            results = self.collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            if not results['ids']:
+                return
+            unpacked = [
+                unpack_text(metadata, document)
+                for metadata, document in zip(results['metadatas'], results['documents'])
+            ]
+            yield results['ids'], [text for text, _ in unpacked], [metadata for _, metadata in unpacked]
+            offset += len(results['ids'])
+
+    def iter_records(
+        self,
+        page_size: int = 1000
+    ) -> Iterator[Tuple[List[str], List[List[float]], List[str], List[Dict]]]:
+        offset = 0
+        while True:
+            results = self.collection.get(
+                include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset
+            )
+            if not results['ids']:
+                return
+            unpacked = [
+                unpack_text(metadata, document)
+                for metadata, document in zip(results['metadatas'], results['documents'])
+            ]
+            yield (
+                results['ids'],
+                results['embeddings'],
+                [text for text, _ in unpacked],
+                [metadata for _, metadata in unpacked]
+            )
+            offset += len(results['ids'])
+
+    def index_params(self) -> Optional[HnswParams]:
+        return read_params(self.collection.metadata)
+
+    def reindex(
+        self,
+        params: HnswParams,
+        batch_size: int = 1000,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> None:
+        if not self._reindex_lock.acquire(blocking=False):
+            raise RuntimeError("A reindex is already running")
+        try:
+            self._rebuild(params, max(1, batch_size), progress)
+        finally:
+            self._reindex_lock.release()
+
+    def _rebuild(self, params: HnswParams, batch_size: int, progress: Optional[Callable[[int, int], None]]) -> None:
+        name = self.collection.name
+        shadow = self.client.create_collection(name=name + REINDEX_SUFFIX, metadata=collection_metadata(params))
+        with self._write_lock:
+            # Chunks written from here on reach both collections
+            self._shadow = shadow
+            ids = self.collection.get(include=[])['ids']
+        try:
+            for i in range(0, len(ids), batch_size):
+                if self._closing.is_set():
+                    raise RuntimeError("The vector store was closed during the reindex")
+                with self._write_lock:
+                    results = self.collection.get(
+                        ids=ids[i:i + batch_size], include=["embeddings", "metadatas", "documents"]
+                    )
+                    if results['ids']:
+                        # Chunks in an earlier layout are moved to the current one on the way;
+                        # compressed documents are copied as they are
+                        documents, metadatas = [], []
+                        for metadata, document in zip(results['metadatas'], results['documents']):
+                            if document is not None and METADATA_TEXT_KEY not in metadata and LEGACY_TEXT_KEY not in metadata:
+                                documents.append(document)
+                                metadatas.append(metadata)
+                                continue
+                            text, rest = unpack_text(metadata, document)
+                            document, metadata = pack_text(self.codec, text, rest)
+                            documents.append(document)
+                            metadatas.append(metadata)
+                        shadow.upsert(
+                            ids=results['ids'], embeddings=results['embeddings'],
+                            documents=documents, metadatas=metadatas
+                        )
+                if progress is not None:
+                    progress(min(i + batch_size, len(ids)), len(ids))
+            with self._write_lock:
+                # Searches read self.collection once per call, so each one sees
+                # either the old index or the new one, never neither
+                retired = self.collection
+                retired.modify(name=name + RETIRED_SUFFIX)
+                shadow.modify(name=name)
+                self.collection = shadow
+                self._shadow = None
+        except BaseException:
+            with self._write_lock:
+                self._shadow = None
+            self.client.delete_collection(shadow.name)
+            raise
+
+        self._closing.wait(RETIRE_GRACE_SECONDS)
+        if self.client is not None:
+            # Left in place if closed first; the next start removes it
+            self.client.delete_collection(retired.name)
+
+    def drop(self) -> None:
+        self.client.delete_collection(self.collection.name)
+        self.close()
+
+    def count(self) -> int:
+        return self.collection.count()
@@ -0,0 +1,533 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+import numpy as np
+
+from app.config import Settings
+from app.services.vector_backends.base import VectorBackend
+from app.utils.text_codec import TextCodec
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DTYPES = {"float32", "float16"}
+
+# Rows converted to float32 at a time when scanning a float16 segment; small
+# enough that each converted block stays in cache
+SCAN_BLOCK_ROWS = 8192
+
+
+@dataclass
+class _Segment:
+    segment_id: int
+    filename: str
+    vectors: np.ndarray  # (rows, dim), memory-mapped and read-only
+    ids: List[Optional[str]]  # None once a row is tombstoned
+    doc_codes: np.ndarray  # int32 document code per row
+    alive: np.ndarray  # bool per row
+
+    @property
+    def rows(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dead(self) -> int:
+        return self.rows - int(np.count_nonzero(self.alive))
+
+
+class NumpyBackend(VectorBackend):
+    """Exact cosine search over append-only, memory-mapped segment files.
+
+    Vectors are L2-normalised on insert so a dot product is the cosine
+    similarity. Each segment is a raw ``rows x dim`` file that only ever grows;
+    deletes and overwrites tombstone the old row, and a segment is rewritten
+    without its dead rows once they pass ``numpy_compaction_ratio``. IDs, text
+    and metadata live in SQLite, whose ``chunks`` table is the source of truth
+    for which rows are alive.
+    """
+
+    def __init__(self, settings: Settings):
+        if settings.numpy_dtype not in SUPPORTED_DTYPES:
+            raise ValueError(
+                f"Unsupported numpy_dtype: {settings.numpy_dtype}. Supported: {sorted(SUPPORTED_DTYPES)}"
+            )
+
+        self.settings = settings
+        self.path = settings.numpy_index_path
+        self.segment_rows = settings.numpy_segment_rows
+        self.compaction_ratio = settings.numpy_compaction_ratio
+        # Text is stored as TEXT, or as a zstd BLOB when compression is on
+        self.codec = TextCodec(settings.chunk_text_compression, settings.chunk_text_compression_level)
+
+        Path(self.path).mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(self.path, "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments (segment_id INTEGER PRIMARY KEY, filename TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "chunk_id TEXT PRIMARY KEY, segment_id INTEGER NOT NULL, row INTEGER NOT NULL, "
+            "document_id TEXT NOT NULL, text TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks(document_id)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_chunks_content_hash "
+            "ON chunks(json_extract(metadata, '$.content_hash'))"
+        )
+        self._conn.commit()
+
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        self.dim: Optional[int] = int(meta["dim"]) if "dim" in meta else None
+        # An existing index keeps the precision it was built with
+        self.dtype = np.dtype(meta.get("dtype", settings.numpy_dtype))
+        if self.dtype.name != settings.numpy_dtype:
+            logger.warning("Vector index at %s is %s; ignoring numpy_dtype=%s",
+                           self.path, self.dtype.name, settings.numpy_dtype)
+
+        self._doc_codes: Dict[str, int] = {}
+        self._locations: Dict[str, Tuple[int, int]] = {}
+        self._segments: List[_Segment] = []
+        self._load()
+
+    # Loading
+
+    def _segment_path(self, filename: str) -> str:
+        return os.path.join(self.path, filename)
+
+    def _map(self, filename: str, rows: int) -> np.ndarray:
+        if not rows:
+            return np.empty((0, self.dim or 0), dtype=self.dtype)
+        return np.memmap(self._segment_path(filename), dtype=self.dtype, mode="r", shape=(rows, self.dim))
+
+    def _doc_code(self, document_id: str) -> int:
+        code = self._doc_codes.get(document_id)
+        if code is None:
+            code = self._doc_codes[document_id] = len(self._doc_codes)
+        return code
+
+    def _load(self) -> None:
+        referenced = set()
+        segments: Dict[int, _Segment] = {}
+        row_bytes = (self.dim or 0) * self.dtype.itemsize
+        for segment_id, filename in self._conn.execute(
+            "SELECT segment_id, filename FROM segments ORDER BY segment_id"
+        ):
+            referenced.add(filename)
+            path = self._segment_path(filename)
+            rows = 0
+            if row_bytes and os.path.exists(path):
+                size = os.path.getsize(path)
+                rows = size // row_bytes
+                # A torn append leaves a partial row that was never committed;
+                # cut it off so the next append starts on a row boundary
+                if size != rows * row_bytes:
+                    os.truncate(path, rows * row_bytes)
+            segments[segment_id] = _Segment(
+                segment_id=segment_id,
+                filename=filename,
+                vectors=self._map(filename, rows),
+                ids=[None] * rows,
+                doc_codes=np.full(rows, -1, dtype=np.int32),
+                alive=np.zeros(rows, dtype=bool)
+            )
+
+        for chunk_id, segment_id, row, document_id in self._conn.execute(
+            "SELECT chunk_id, segment_id, row, document_id FROM chunks"
+        ):
+            segment = segments[segment_id]
+            segment.ids[row] = chunk_id
+            segment.doc_codes[row] = self._doc_code(document_id)
+            segment.alive[row] = True
+            self._locations[chunk_id] = (segment_id, row)
+
+        self._segments = list(segments.values())
+
+        # Files left behind by an interrupted compaction
+        for name in os.listdir(self.path):
+            if name.endswith(".vec") and name not in referenced:
+                os.remove(self._segment_path(name))
+
+    # Writes
+
+    def _new_segment(self) -> _Segment:
+        segment_id = max((s.segment_id for s in self._segments), default=-1) + 1
+        filename = f"{segment_id:06d}-{uuid4().hex[:8]}.vec"
+        open(self._segment_path(filename), "wb").close()
+        self._conn.execute("INSERT INTO segments (segment_id, filename) VALUES (?, ?)", (segment_id, filename))
+        segment = _Segment(
+            segment_id=segment_id,
+            filename=filename,
+            vectors=self._map(filename, 0),
+            ids=[],
+            doc_codes=np.empty(0, dtype=np.int32),
+            alive=np.empty(0, dtype=bool)
+        )
+        self._segments = self._segments + [segment]
+        return segment
+
+    def _append(self, segment: _Segment, vectors: np.ndarray, ids: List[str], codes: List[int]) -> _Segment:
+        with open(self._segment_path(segment.filename), "ab") as f:
+            f.write(vectors.astype(self.dtype).tobytes())
+        rows = segment.rows + len(ids)
+        # Readers keep using the segment object they picked up, so build a new one
+        return _Segment(
+            segment_id=segment.segment_id,
+            filename=segment.filename,
+            vectors=self._map(segment.filename, rows),
+            ids=segment.ids + list(ids),
+            doc_codes=np.concatenate([segment.doc_codes, np.asarray(codes, dtype=np.int32)]),
+            alive=np.concatenate([segment.alive, np.ones(len(ids), dtype=bool)])
+        )
+
+    def _replace_segment(self, segment: _Segment) -> None:
+        self._segments = [segment if s.segment_id == segment.segment_id else s for s in self._segments]
+
+    def _tombstone(self, chunk_id: str) -> None:
+        location = self._locations.pop(chunk_id, None)
+        if location is None:
+            return
+        segment_id, row = location
+        for segment in self._segments:
+            if segment.segment_id == segment_id:
+                segment.alive[row] = False
+                segment.ids[row] = None
+                return
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: List[Dict]
+    ) -> None:
+        if not ids:
+            return
+        # The last occurrence of a repeated ID wins, as with Chroma
+        positions = list({chunk_id: i for i, chunk_id in enumerate(ids)}.values())
+        ids = [ids[i] for i in positions]
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32)[positions])
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [("dim", str(self.dim)), ("dtype", self.dtype.name)]
+                )
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+
+            codes = [self._doc_code(metadatas[i]["document_id"]) for i in positions]
+            rows = []
+            start = 0
+            while start < len(ids):
+                segment = self._segments[-1] if self._segments else None
+                if segment is None or segment.rows >= self.segment_rows:
+                    segment = self._new_segment()
+                end = min(len(ids), start + self.segment_rows - segment.rows)
+                for offset, i in enumerate(positions[start:end]):
+                    rows.append((
+                        ids[start + offset], segment.segment_id, segment.rows + offset,
+                        metadatas[i]["document_id"], self.codec.encode(texts[i]), json.dumps(metadatas[i])
+                    ))
+                self._replace_segment(
+                    self._append(segment, vectors[start:end], ids[start:end], codes[start:end])
+                )
+                start = end
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_id, segment_id, row, document_id, text, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+            # Overwritten chunks: tombstone the previous row, then point at the new one
+            for chunk_id, segment_id, row, *_ in rows:
+                self._tombstone(chunk_id)
+                self._locations[chunk_id] = (segment_id, row)
+
+    def delete(self, ids: List[str]) -> None:
+        if not ids:
+            return
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch)
+            self._conn.commit()
+            for chunk_id in ids:
+                self._tombstone(chunk_id)
+            self.compact()
+
+    def compact(self, force: bool = False) -> int:
+        """Rewrite segments whose tombstoned share passed the compaction ratio.
+
+        Returns the number of rows reclaimed.
+        """
+        reclaimed = 0
+        with self._lock:
+            for segment in list(self._segments):
+                if not segment.dead or (not force and segment.dead < segment.rows * self.compaction_ratio):
+                    continue
+                reclaimed += segment.dead
+                self._compact_segment(segment)
+        return reclaimed
+
+    def _compact_segment(self, segment: _Segment) -> None:
+        live = np.flatnonzero(segment.alive)
+        old_path = self._segment_path(segment.filename)
+
+        if not len(live):
+            self._conn.execute("DELETE FROM segments WHERE segment_id = ?", (segment.segment_id,))
+            self._conn.commit()
+            self._segments = [s for s in self._segments if s.segment_id != segment.segment_id]
+            os.remove(old_path)
+            return
+
+        # Write the live rows to a new file; the SQLite commit is the switch-over
+        filename = f"{segment.segment_id:06d}-{uuid4().hex[:8]}.vec"
+        with open(self._segment_path(filename), "wb") as f:
+            for start in range(0, len(live), SCAN_BLOCK_ROWS):
+                f.write(np.ascontiguousarray(segment.vectors[live[start:start + SCAN_BLOCK_ROWS]]).tobytes())
+
+        ids = [segment.ids[row] for row in live]
+        self._conn.executemany(
+            "UPDATE chunks SET row = ? WHERE chunk_id = ?",
+            [(new_row, chunk_id) for new_row, chunk_id in enumerate(ids)]
+        )
+        self._conn.execute(
+            "UPDATE segments SET filename = ? WHERE segment_id = ?", (filename, segment.segment_id)
+        )
+        self._conn.commit()
+
+        self._replace_segment(_Segment(
+            segment_id=segment.segment_id,
+            filename=filename,
+            vectors=self._map(filename, len(ids)),
+            ids=ids,
+            doc_codes=segment.doc_codes[live],
+            alive=np.ones(len(ids), dtype=bool)
+        ))
+        for new_row, chunk_id in enumerate(ids):
+            self._locations[chunk_id] = (segment.segment_id, new_row)
+        # In-flight readers still hold the old mapping; unlinking does not invalidate it
+        os.remove(old_path)
+
+    # Reads
+
+    def _scan(self, vectors: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        # (rows, dim) x (dim, n) -> (rows, n) similarities
+        if self.dtype == np.float32:
+            return np.asarray(vectors @ queries)
+        scores = np.empty((len(vectors), queries.shape[1]), dtype=np.float32)
+        for start in range(0, len(vectors), SCAN_BLOCK_ROWS):
+            block = vectors[start:start + SCAN_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ queries
+        return scores
+
+    def warm_up(self) -> None:
+        # Touch every page of the mapped segments so the first query does not fault them in
+        if self.dim is not None:
+            self.query(np.ones(self.dim, dtype=np.float32).tolist(), top_k=1)
+
+    def close(self) -> None:
+        with self._lock:
+            self._segments = []
+            self._conn.close()
+
+    def query(
+        self,
+        embedding: List[float],
+        top_k: int,
+        document_id: Optional[str] = None
+    ) -> Tuple[List[str], List[str], List[float]]:
+        return self.query_many([embedding], top_k, document_id)[0]
+
+    def query_many(
+        self,
+        embeddings: List[List[float]],
+        top_k: int,
+        document_id: Optional[str] = None
+    ) -> List[Tuple[List[str], List[str], List[float]]]:
+        empty = [([], [], []) for _ in embeddings]
+        if self.dim is None or top_k <= 0 or not embeddings:
+            return empty
+        # One matrix product per segment scores every query at once
+        queries = self._normalize(np.asarray(embeddings, dtype=np.float32)).T
+
+        code = None
+        if document_id:
+            code = self._doc_codes.get(document_id)
+            if code is None:
+                return empty
+
+        candidates: List[List[Tuple[float, str]]] = [[] for _ in embeddings]
+        for segment in self._segments:
+            vectors = segment.vectors
+            mask = segment.alive[:len(vectors)]
+            if code is not None:
+                rows = np.flatnonzero(mask & (segment.doc_codes[:len(vectors)] == code))
+                if not len(rows):
+                    continue
+                scores = vectors[rows].astype(np.float32) @ queries
+            else:
+                rows = np.flatnonzero(mask)
+                if not len(rows):
+                    continue
+                scores = self._scan(vectors, queries)
+                scores = scores[rows] if len(rows) < len(scores) else scores
+
+            k = min(top_k, len(scores))
+            best = np.argpartition(-scores, k - 1, axis=0)[:k]
+            for j, column in enumerate(best.T):
+                for i in column:
+                    chunk_id = segment.ids[rows[i]]
+                    if chunk_id is not None:
+                        candidates[j].append((float(scores[i, j]), chunk_id))
+
+        ranked = [sorted(c, key=lambda item: item[0], reverse=True)[:top_k] for c in candidates]
+        texts = self.get_texts(list({chunk_id for c in ranked for _, chunk_id in c}))
+        return [
+            (
+                [chunk_id for _, chunk_id in c],
+                [texts.get(chunk_id, "") for _, chunk_id in c],
+                [score for score, _ in c]
+            )
+            for c in ranked
+        ]
+
+    def get_texts(self, ids: List[str]) -> Dict[str, str]:
+        texts: Dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                for chunk_id, text in self._conn.execute(
+                    f"SELECT chunk_id, text FROM chunks WHERE chunk_id IN ({placeholders})", batch
+                ):
+                    texts[chunk_id] = self.codec.decode(text)
+        return texts
+
+    def get_embeddings(self, ids: List[str]) -> Dict[str, Sequence[float]]:
+        # Rows straight from the memory-mapped segments, no SQLite round trip
+        with self._lock:
+            segments = {s.segment_id: s for s in self._segments}
+            locations = [(chunk_id, self._locations.get(chunk_id)) for chunk_id in ids]
+        return {
+            chunk_id: segments[location[0]].vectors[location[1]].astype(np.float32)
+            for chunk_id, location in locations
+            if location is not None
+        }
+
+    def get_document(
+        self,
+        document_id: str,
+        include_embeddings: bool = False
+    ) -> Tuple[List[str], List[Dict], List[List[float]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id, segment_id, row, metadata FROM chunks WHERE document_id = ?", (document_id,)
+            ).fetchall()
+            segments = {s.segment_id: s for s in self._segments}
+
+        ids = [chunk_id for chunk_id, *_ in rows]
+        metadatas = [json.loads(metadata) for *_, metadata in rows]
+        embeddings = []
+        if include_embeddings:
+            embeddings = [
+                segments[segment_id].vectors[row].astype(np.float32).tolist()
+                for _, segment_id, row, _ in rows
+            ]
+        return ids, metadatas, embeddings
+
+    def find_first(self, filters: Dict[str, str]) -> Optional[Dict]:
+        clauses = []
+        values = []
+        for key, value in filters.items():
+            if not key.isidentifier():
+                raise ValueError(f"Invalid metadata key: {key}")
+            clauses.append("document_id = ?" if key == "document_id" else f"json_extract(metadata, '$.{key}') = ?")
+            values.append(value)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT metadata FROM chunks WHERE {' AND '.join(clauses)} LIMIT 1", values
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def document_chunk_ids(self, document_id: str) -> List[str]:
+        with self._lock:
+            return [
+                chunk_id for (chunk_id,) in self._conn.execute(
+                    "SELECT chunk_id FROM chunks WHERE document_id = ?", (document_id,)
+                )
+            ]
+
+    def iter_all(self, page_size: int = 1000) -> Iterator[Tuple[List[str], List[str], List[Dict]]]:
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, chunk_id, text, metadata FROM chunks WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, page_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            yield [r[1] for r in rows], [self.codec.decode(r[2]) for r in rows], [json.loads(r[3]) for r in rows]
+
+    def iter_records(
+        self,
+        page_size: int = 1000
+    ) -> Iterator[Tuple[List[str], List[List[float]], List[str], List[Dict]]]:
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, chunk_id, segment_id, row, text, metadata FROM chunks "
+                    "WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, page_size)
+                ).fetchall()
+                segments = {s.segment_id: s for s in self._segments}
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            yield (
+                [r[1] for r in rows],
+                [segments[r[2]].vectors[r[3]].astype(np.float32).tolist() for r in rows],
+                [self.codec.decode(r[4]) for r in rows],
+                [json.loads(r[5]) for r in rows]
+            )
+
+    def drop(self) -> None:
+        with self._lock:
+            filenames = [s.filename for s in self._segments]
+            self._segments = []
+            self._locations = {}
+            self._conn.close()
+        for name in filenames + ["index.sqlite3", "index.sqlite3-wal", "index.sqlite3-shm"]:
+            path = self._segment_path(name)
+            if os.path.exists(path):
+                os.remove(path)
+        if not os.listdir(self.path):
+            # A shard's own directory; a shared one still holds other files
+            os.rmdir(self.path)
+
+    def count(self) -> int:
+        return len(self._locations)
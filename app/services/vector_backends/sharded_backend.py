@@ -0,0 +1,362 @@
+import hashlib
+import heapq
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.config import Settings
+from app.services.vector_backends.base import HnswParams, VectorBackend
+from app.utils.document_category import DOCUMENT_CATEGORIES
+
+SHARD_BY = ("document", "category")
+LAYOUT_FILENAME = "shard_layout.json"
+ROUTES_FILENAME = "shard_routes.sqlite3"
+
+
+class ShardLayout(NamedTuple):
+    shard_by: str
+    shards: Tuple[str, ...]
+
+
+def backend_root(settings: Settings) -> str:
+    return settings.numpy_index_path if settings.vector_backend == "numpy" else settings.chromadb_path
+
+
+def shard_layout(settings: Settings) -> Optional[ShardLayout]:
+    """The layout the settings ask for; None for a single, unsharded collection."""
+    if settings.vector_shard_by not in SHARD_BY:
+        raise ValueError(f"Unknown vector_shard_by: {settings.vector_shard_by}. Supported: {list(SHARD_BY)}")
+    if settings.vector_shard_by == "category":
+        return ShardLayout("category", DOCUMENT_CATEGORIES)
+    if settings.vector_shards <= 1:
+        return None
+    n = settings.vector_shards
+    # The count is part of the name, so resharding never writes into a live shard
+    return ShardLayout("document", tuple(f"shard_{i}_of_{n}" for i in range(n)))
+
+
+def shard_settings(settings: Settings, name: str) -> Settings:
+    # Chroma shards are collections side by side; NumPy shards are subdirectories
+    if settings.vector_backend == "numpy":
+        return settings.model_copy(update={"numpy_index_path": os.path.join(settings.numpy_index_path, name)})
+    return settings.model_copy(update={"collection_name": f"{settings.collection_name}_{name}"})
+
+
+def read_layout(root: str) -> Optional[ShardLayout]:
+    path = os.path.join(root, LAYOUT_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    return ShardLayout(data["shard_by"], tuple(data["shards"]))
+
+
+def write_layout(root: str, layout: Optional[ShardLayout]) -> None:
+    path = os.path.join(root, LAYOUT_FILENAME)
+    if layout is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    os.makedirs(root, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"shard_by": layout.shard_by, "shards": list(layout.shards)}, f)
+    os.replace(tmp_path, path)
+
+
+def document_of(chunk_id: str) -> str:
+    return chunk_id.rsplit("_chunk_", 1)[0]
+
+
+def hash_shard(document_id: str, shards: int) -> int:
+    # Stable across processes and Python versions, unlike hash()
+    digest = hashlib.blake2b(document_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+class ShardRoutes:
+    """Which shard holds each document, for layouts where that is not a pure function of its ID."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS routes (document_id TEXT PRIMARY KEY, shard TEXT NOT NULL)")
+        self._conn.commit()
+        self._routes: Dict[str, str] = dict(self._conn.execute("SELECT document_id, shard FROM routes"))
+
+    def get(self, document_id: str) -> Optional[str]:
+        return self._routes.get(document_id)
+
+    def add(self, routes: Dict[str, str]) -> None:
+        new = {doc: shard for doc, shard in routes.items() if doc not in self._routes}
+        if not new:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO routes (document_id, shard) VALUES (?, ?)", new.items())
+            self._conn.commit()
+            self._routes.update(new)
+
+    def remove(self, document_ids: List[str]) -> None:
+        with self._lock:
+            for i in range(0, len(document_ids), 500):
+                batch = document_ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(f"DELETE FROM routes WHERE document_id IN ({placeholders})", batch)
+            self._conn.commit()
+            for document_id in document_ids:
+                self._routes.pop(document_id, None)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ShardedBackend(VectorBackend):
+    """Chunks spread over several backends of one kind, a whole document per shard.
+
+    Documents go to a shard by a hash of their ID, or by their ``category``
+    metadata, so every shard's HNSW index stays a fraction of the whole.
+    Searches run on all shards at once and the per-shard top-k lists are
+    merged; a search within one document goes to its shard alone. Under
+    category sharding a document stays in the shard it was first written to,
+    even if a replacement reads as a different category.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        layout: ShardLayout,
+        create_shard: Callable[[Settings], VectorBackend]
+    ):
+        self.settings = settings
+        self.layout = layout
+        self.path = backend_root(settings)
+        os.makedirs(self.path, exist_ok=True)
+
+        self.names = list(layout.shards)
+        self.shards: Dict[str, VectorBackend] = {
+            name: create_shard(shard_settings(settings, name)) for name in self.names
+        }
+        self._routes: Optional[ShardRoutes] = None
+        if layout.shard_by == "category":
+            self._routes = ShardRoutes(os.path.join(self.path, ROUTES_FILENAME))
+        # Searches fan out on their own threads, one per shard
+        self._executor = ThreadPoolExecutor(max_workers=len(self.names), thread_name_prefix="shard-search")
+
+    # Routing
+
+    def _write_shard(self, document_id: str, metadata: Dict) -> str:
+        if self._routes is None:
+            return self.names[hash_shard(document_id, len(self.names))]
+        known = self._routes.get(document_id)
+        if known is not None:
+            return known
+        category = metadata.get("category")
+        return category if category in self.shards else self.names[0]
+
+    def _owners(self, document_id: str) -> List[str]:
+        """Shards that may hold ``document_id``: its own, or all when unknown."""
+        if self._routes is None:
+            return [self.names[hash_shard(document_id, len(self.names))]]
+        known = self._routes.get(document_id)
+        return [known] if known is not None else self.names
+
+    def _group_ids(self, ids: List[str]) -> Dict[str, List[str]]:
+        groups: Dict[str, List[str]] = {}
+        for chunk_id in ids:
+            for name in self._owners(document_of(chunk_id)):
+                groups.setdefault(name, []).append(chunk_id)
+        return groups
+
+    def _fan_out(self, names: List[str], call: Callable[[VectorBackend], object]) -> List:
+        if len(names) == 1:
+            return [call(self.shards[names[0]])]
+        futures = [self._executor.submit(call, self.shards[name]) for name in names]
+        return [future.result() for future in futures]
+
+    def shard_counts(self) -> Dict[str, int]:
+        return {name: shard.count() for name, shard in self.shards.items()}
+
+    # VectorBackend
+
+    def warm_up(self) -> None:
+        self._fan_out(self.names, lambda shard: shard.warm_up())
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for shard in self.shards.values():
+            shard.close()
+        if self._routes is not None:
+            self._routes.close()
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: List[Dict]
+    ) -> None:
+        groups: Dict[str, List[int]] = {}
+        routes: Dict[str, str] = {}
+        for i, metadata in enumerate(metadatas):
+            name = routes.get(metadata["document_id"])
+            if name is None:
+                name = routes[metadata["document_id"]] = self._write_shard(metadata["document_id"], metadata)
+            groups.setdefault(name, []).append(i)
+        if self._routes is not None:
+            # Routes first: a route to a shard without the chunks only costs a wasted lookup
+            self._routes.add(routes)
+        for name, positions in groups.items():
+            self.shards[name].upsert(
+                [ids[i] for i in positions],
+                [embeddings[i] for i in positions],
+                [texts[i] for i in positions],
+                [metadatas[i] for i in positions]
+            )
+
+    def query(
+        self,
+        embedding: List[float],
+        top_k: int,
+        document_id: Optional[str] = None
+    ) -> Tuple[List[str], List[str], List[float]]:
+        return self.query_many([embedding], top_k, document_id)[0]
+
+    def query_many(
+        self,
+        embeddings: List[List[float]],
+        top_k: int,
+        document_id: Optional[str] = None
+    ) -> List[Tuple[List[str], List[str], List[float]]]:
+        if not embeddings:
+            return []
+        names = self._owners(document_id) if document_id else self.names
+        per_shard = self._fan_out(names, lambda shard: shard.query_many(embeddings, top_k, document_id))
+        if len(per_shard) == 1:
+            return per_shard[0]
+
+        # Each shard's list is its own top-k, so the global top-k is among them
+        merged = []
+        for j in range(len(embeddings)):
+            candidates = [
+                (score, chunk_id, text)
+                for results in per_shard
+                for chunk_id, text, score in zip(*results[j])
+            ]
+            best = heapq.nlargest(top_k, candidates, key=itemgetter(0))
+            merged.append((
+                [chunk_id for _, chunk_id, _ in best],
+                [text for _, _, text in best],
+                [score for score, _, _ in best]
+            ))
+        return merged
+
+    def get_texts(self, ids: List[str]) -> Dict[str, str]:
+        texts: Dict[str, str] = {}
+        for name, shard_ids in self._group_ids(ids).items():
+            texts.update(self.shards[name].get_texts(shard_ids))
+        return texts
+
+    def get_embeddings(self, ids: List[str]) -> Dict[str, Sequence[float]]:
+        embeddings: Dict[str, Sequence[float]] = {}
+        for name, shard_ids in self._group_ids(ids).items():
+            embeddings.update(self.shards[name].get_embeddings(shard_ids))
+        return embeddings
+
+    def get_document(
+        self,
+        document_id: str,
+        include_embeddings: bool = False
+    ) -> Tuple[List[str], List[Dict], List[List[float]]]:
+        ids: List[str] = []
+        metadatas: List[Dict] = []
+        embeddings: List[List[float]] = []
+        for name in self._owners(document_id):
+            shard_ids, shard_metadatas, shard_embeddings = self.shards[name].get_document(
+                document_id, include_embeddings
+            )
+            ids.extend(shard_ids)
+            metadatas.extend(shard_metadatas)
+            embeddings.extend(shard_embeddings)
+        return ids, metadatas, embeddings
+
+    def find_first(self, filters: Dict[str, str]) -> Optional[Dict]:
+        names = self._owners(filters["document_id"]) if "document_id" in filters else self.names
+        for name in names:
+            found = self.shards[name].find_first(filters)
+            if found is not None:
+                return found
+        return None
+
+    def document_chunk_ids(self, document_id: str) -> List[str]:
+        return [
+            chunk_id
+            for name in self._owners(document_id)
+            for chunk_id in self.shards[name].document_chunk_ids(document_id)
+        ]
+
+    def delete(self, ids: List[str]) -> None:
+        for name, shard_ids in self._group_ids(ids).items():
+            self.shards[name].delete(shard_ids)
+
+    def delete_documents(self, document_ids: List[str]) -> None:
+        groups: Dict[str, List[str]] = {}
+        for document_id in document_ids:
+            for name in self._owners(document_id):
+                groups.setdefault(name, []).append(document_id)
+        for name, shard_documents in groups.items():
+            self.shards[name].delete_documents(shard_documents)
+        if self._routes is not None:
+            self._routes.remove(document_ids)
+
+    def iter_all(self, page_size: int = 1000) -> Iterator[Tuple[List[str], List[str], List[Dict]]]:
+        return chain.from_iterable(self.shards[name].iter_all(page_size) for name in self.names)
+
+    def iter_records(
+        self,
+        page_size: int = 1000
+    ) -> Iterator[Tuple[List[str], List[List[float]], List[str], List[Dict]]]:
+        return chain.from_iterable(self.shards[name].iter_records(page_size) for name in self.names)
+
+    def index_params(self) -> Optional[HnswParams]:
+        # Shards are rebuilt in order, so the last one has new parameters only once all do
+        return self.shards[self.names[-1]].index_params()
+
+    def reindex(
+        self,
+        params: HnswParams,
+        batch_size: int = 1000,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> None:
+        # One shard at a time, so only one extra index is held in memory
+        counts = self.shard_counts()
+        total = sum(counts.values())
+        done = 0
+        for name in self.names:
+            report = None
+            if progress is not None:
+                report = lambda copied, _, before=done: progress(before + copied, total)
+            self.shards[name].reindex(params, batch_size, report)
+            done += counts[name]
+
+    def drop(self) -> None:
+        self._executor.shutdown(wait=True)
+        for shard in self.shards.values():
+            shard.drop()
+        if self._routes is not None:
+            self._routes.close()
+            for suffix in ("", "-wal", "-shm"):
+                path = os.path.join(self.path, ROUTES_FILENAME + suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+        if read_layout(self.path) == self.layout:
+            write_layout(self.path, None)
+
+    def count(self) -> int:
+        return sum(shard.count() for shard in self.shards.values())
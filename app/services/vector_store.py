@@ -1,54 +1,113 @@
-import chromadb
-from chromadb.config import Settings as ChromaSettings
-from typing import List, Dict, Optional, Tuple
-from uuid import uuid4
+import dataclasses
+import logging
+import os
+import time
+from typing import List, Dict, Optional, Sequence, Tuple
 from app.config import Settings
+from app.services.document_catalog import (
+    STATE_DELETING, STATE_INGESTING, STATE_READY, DocumentCatalog, DocumentRecord
+)
+from app.services.lexical_index import LexicalIndex
+from app.services.profile_extractor import CandidateProfile
+from app.services.profile_store import ProfileFilter, ProfileStore
+from app.services.vector_backends import ShardedBackend, VectorBackend, create_backend
+
+LEXICAL_INDEX_FILENAME = "lexical_index.sqlite3"
+CATALOG_FILENAME = "document_catalog.sqlite3"
+PROFILES_FILENAME = "candidate_profiles.sqlite3"
+
+logger = logging.getLogger(__name__)
 
 
 class VectorStore:
    
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, backend: Optional[VectorBackend] = None):
       
         self.settings = settings
-        self.client = chromadb.PersistentClient(
-            path=settings.chromadb_path,
-            settings=ChromaSettings(anonymized_telemetry=False)
-        )
-        self.collection = self.client.get_or_create_collection(
-            name=settings.collection_name,
-            metadata={"hnsw:space": "cosine"}
-        )
+        self.backend = backend or create_backend(settings)
+        # BM25 index persisted next to the vector data and updated alongside it
+        self.lexical_index = LexicalIndex(os.path.join(self.backend.path, LEXICAL_INDEX_FILENAME))
+        # One row per document, written before its chunks and made ready after
+        self.catalog = DocumentCatalog(os.path.join(self.backend.path, CATALOG_FILENAME))
+        # Structured CV fields, extracted at ingest time
+        self.profiles = ProfileStore(os.path.join(self.backend.path, PROFILES_FILENAME))
+        self._reconcile()
+        rebuild_lexical = not len(self.lexical_index)
+        rebuild_catalog = not len(self.catalog)
+        if (rebuild_lexical or rebuild_catalog) and self.backend.count():
+            self._backfill(rebuild_lexical, rebuild_catalog)
+
+    def _reconcile(self) -> None:
+        # Documents whose ingest or delete was cut short by a crash: a replaced
+        # one may mix chunks of both versions, so each is dropped entirely
+        unfinished = self.catalog.unfinished()
+        if unfinished:
+            logger.warning("Removing %d documents left incomplete by an interrupted ingest or delete", len(unfinished))
+            self.delete_documents(unfinished)
+
+    def _backfill(self, lexical: bool, catalog: bool) -> None:
+        # One-off pass for stores created before the lexical index or the
+        # catalog existed; filenames and sizes were never stored, so they stay empty
+        records: Dict[str, DocumentRecord] = {}
+        now = time.time()
+        for ids, texts, metadatas in self.backend.iter_all():
+            by_document: Dict[str, Tuple[List[str], List[str]]] = {}
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                doc_ids, doc_texts = by_document.setdefault(metadata["document_id"], ([], []))
+                doc_ids.append(chunk_id)
+                doc_texts.append(text)
+                if catalog:
+                    record = records.get(metadata["document_id"])
+                    if record is None:
+                        record = records[metadata["document_id"]] = DocumentRecord(
+                            document_id=metadata["document_id"],
+                            filename=None,
+                            content_hash=metadata.get("content_hash"),
+                            chunk_count=0,
+                            byte_size=None,
+                            ingested_at=now
+                        )
+                    record.chunk_count += 1
+            if lexical:
+                for document_id, (doc_ids, doc_texts) in by_document.items():
+                    self.lexical_index.add(document_id, doc_ids, doc_texts)
+        if catalog:
+            self.catalog.upsert(records.values())
+
+    def warm_up(self) -> None:
+        self.backend.warm_up()
+
+    def close(self) -> None:
+        self.backend.close()
+        self.lexical_index.close()
+        self.catalog.close()
+        self.profiles.close()
 
     def add_chunks(
         self,
         document_id: str,
         chunks: List[str],
-        embeddings: List[List[float]]
+        embeddings: List[List[float]],
+        start_index: int = 0,
+        extra_metadatas: Optional[List[Dict]] = None
     ) -> List[str]:
        
         if len(chunks) != len(embeddings):
             raise ValueError("Number of chunks must match number of embeddings")
 
         # Generate unique chunk IDs
-        chunk_ids = [f"{document_id}_chunk_{i}" for i in range(len(chunks))]
-
-        # Prepare metadata
-        metadatas = [
-            {
-                "document_id": document_id,
-                "chunk_index": i,
-                "chunk_text": chunk[:1000]  # Store truncated text in metadata
-            }
-            for i, chunk in enumerate(chunks)
-        ]
-
-        # Add to ChromaDB
-        self.collection.add(
-            ids=chunk_ids,
-            embeddings=embeddings,
-            documents=chunks,
-            metadatas=metadatas
-        )
+        indices = range(start_index, start_index + len(chunks))
+        chunk_ids = [f"{document_id}_chunk_{i}" for i in indices]
+
+        # Prepare metadata; the text itself is stored once, by the backend
+        metadatas = [{"document_id": document_id, "chunk_index": i} for i in indices]
+        if extra_metadatas:
+            for metadata, extra in zip(metadatas, extra_metadatas):
+                metadata.update(extra)
+
+        # Upsert so a replaced document can overwrite its chunks in place
+        self.backend.upsert(chunk_ids, embeddings, chunks, metadatas)
+        self.lexical_index.add(document_id, chunk_ids, chunks)
 
         return chunk_ids
 
@@ -58,36 +117,128 @@ class VectorStore:
         top_k: int = 5,
         document_id: Optional[str] = None
     ) -> Tuple[List[str], List[str], List[float]]:
-       
-        # Prepare query filter: if document_id is provided, filter; else, search all
-        where_filter = {"document_id": document_id} if document_id else None
+        return self.backend.query(query_embedding, top_k=top_k, document_id=document_id)
+
+    def search_many(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 5,
+        document_id: Optional[str] = None
+    ) -> List[Tuple[List[str], List[str], List[float]]]:
+        return self.backend.query_many(query_embeddings, top_k=top_k, document_id=document_id)
+
+    def lexical_search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        document_id: Optional[str] = None
+    ) -> Tuple[List[str], List[str], List[float]]:
+        hits = self.lexical_index.search(query_text, top_k=top_k, document_id=document_id)
+        chunk_ids = [chunk_id for chunk_id, _ in hits]
+        texts = self.get_chunk_texts(chunk_ids)
+        return chunk_ids, [texts.get(cid, "") for cid in chunk_ids], [score for _, score in hits]
+
+    def get_chunk_texts(self, chunk_ids: List[str]) -> Dict[str, str]:
+        if not chunk_ids:
+            return {}
+        return self.backend.get_texts(chunk_ids)
+
+    def get_chunk_embeddings(self, chunk_ids: List[str]) -> Dict[str, Sequence[float]]:
+        if not chunk_ids:
+            return {}
+        return self.backend.get_embeddings(chunk_ids)
+
+    def begin_document(self, record: DocumentRecord) -> None:
+        """Record a document as ingesting, before any of its chunks are written."""
+        self.catalog.upsert([dataclasses.replace(record, state=STATE_INGESTING)])
+
+    def register_document(self, record: DocumentRecord) -> None:
+        self.catalog.upsert([dataclasses.replace(record, state=STATE_READY)])
 
-        # Query ChromaDB (global if where_filter is None)
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k,
-            where=where_filter
-        )
+    def get_document_record(self, document_id: str) -> Optional[DocumentRecord]:
+        return self.catalog.get(document_id)
 
-        # Extract results
-        chunk_ids = results['ids'][0] if results['ids'] else []
-        chunk_texts = results['documents'][0] if results['documents'] else []
-        distances = results['distances'][0] if results['distances'] else []
-        similarity_scores = [1 - dist for dist in distances]
+    def get_document_records(self, document_ids: List[str]) -> Dict[str, DocumentRecord]:
+        return self.catalog.get_many(document_ids)
 
-        return chunk_ids, chunk_texts, similarity_scores
+    def list_documents(self, limit: int = 100, offset: int = 0) -> Tuple[List[DocumentRecord], int]:
+        return self.catalog.list(limit=limit, offset=offset)
+
+    def save_profile(self, profile: CandidateProfile) -> None:
+        self.profiles.upsert([profile])
+
+    def get_profile(self, document_id: str) -> Optional[CandidateProfile]:
+        return self.profiles.get(document_id)
+
+    def search_profiles(
+        self,
+        filters: ProfileFilter,
+        sort: str = "experience",
+        limit: int = 50,
+        offset: int = 0
+    ) -> Tuple[List[CandidateProfile], int]:
+        return self.profiles.search(filters, sort=sort, limit=limit, offset=offset)
+
+    def find_document_by_hash(self, content_hash: str, document_id: Optional[str] = None) -> Optional[DocumentRecord]:
+        return self.catalog.find_by_hash(content_hash, document_id)
+
+    def count_document_chunks(self, document_id: str) -> int:
+        return len(self.backend.document_chunk_ids(document_id))
+
+    def get_document_chunks(
+        self,
+        document_id: str
+    ) -> Tuple[List[str], List[Dict], List[List[float]]]:
+        return self.backend.get_document(document_id, include_embeddings=True)
+
+    def delete_chunks(self, chunk_ids: List[str]) -> None:
+        if chunk_ids:
+            self.backend.delete(chunk_ids)
+            self.lexical_index.remove_chunks(chunk_ids)
+
+    def restore_chunks(
+        self,
+        document_id: str,
+        chunk_ids: List[str],
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict],
+        record: Optional[DocumentRecord] = None
+    ) -> None:
+        """Put a document's chunks and catalog row back as they were read, dropping chunk IDs written since."""
+        kept = set(chunk_ids)
+        self.delete_chunks([cid for cid in self.backend.document_chunk_ids(document_id) if cid not in kept])
+        if chunk_ids:
+            self.backend.upsert(chunk_ids, embeddings, texts, metadatas)
+            self.lexical_index.add(document_id, chunk_ids, texts)
+        if record is not None:
+            self.register_document(record)
+        else:
+            # The document had no catalog row before the replacement began
+            self.catalog.remove([document_id])
 
     def delete_document(self, document_id: str) -> None:
-        # Get all chunks for document
-        results = self.collection.get(
-            where={"document_id": document_id}
-        )
+        self.delete_documents([document_id])
 
-        if results['ids']:
-            self.collection.delete(ids=results['ids'])
+    def delete_documents(self, document_ids: List[str]) -> None:
+        # Rows are marked first and removed last, so a delete cut short is
+        # finished at the next startup rather than leaving orphaned vectors
+        if not document_ids:
+            return
+        self.catalog.mark(document_ids, STATE_DELETING)
+        self.backend.delete_documents(document_ids)
+        self.lexical_index.remove_documents(document_ids)
+        self.profiles.remove(document_ids)
+        self.catalog.remove(document_ids)
 
     def get_collection_stats(self) -> Dict:
-        return {
-            "total_chunks": self.collection.count(),
-            "collection_name": self.settings.collection_name
+        stats = {
+            "total_chunks": self.backend.count(),
+            "collection_name": self.settings.collection_name,
+            "vector_backend": self.settings.vector_backend,
+            **self.catalog.stats(),
+            **self.profiles.stats()
         }
+        if isinstance(self.backend, ShardedBackend):
+            stats["shards"] = self.backend.shard_counts()
+        return stats
@@ -0,0 +1,168 @@
+"""Rewrite an existing Chroma store in the compact chunk layout, in place.
+
+Chunk text is kept once, as the Chroma document, optionally zstd-compressed;
+the old truncated ``chunk_text`` copy and any text left in metadata by the
+interim layout are dropped, so metadata holds only IDs and numbers. Records
+are copied batch by batch into a staging collection that then replaces the
+original, and the space the old records held is reclaimed. Stop the API first: writes made during the copy
+would be lost.
+
+    python -m app.tools.compact_chroma [--compression zstd] [--batch-size 500]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import time
+from typing import List, Optional, Tuple
+
+from app.config import Settings
+from app.services.vector_backends.chroma_backend import ChromaBackend, pack_text, unpack_text
+from app.utils.text_codec import TEXT_COMPRESSIONS, TextCodec
+
+STAGING_SUFFIX = "_compact"
+
+
+def disk_usage(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def sample_queries(backend: ChromaBackend, count: int) -> List[Tuple[List[float], str]]:
+    # Stored vectors make realistic queries; each also filters on its own document
+    sample = backend.collection.get(limit=count, include=["embeddings", "metadatas"])
+    return [
+        (embedding, metadata["document_id"])
+        for embedding, metadata in zip(sample["embeddings"] or [], sample["metadatas"] or [])
+    ]
+
+
+def measure_latency(backend: ChromaBackend, queries: List[Tuple[List[float], str]], top_k: int) -> Tuple[float, float]:
+    """Median milliseconds per query, unfiltered and filtered by document_id."""
+    backend.warm_up()
+    unfiltered, filtered = [], []
+    for embedding, document_id in queries:
+        start = time.perf_counter()
+        backend.query(embedding, top_k=top_k)
+        unfiltered.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        backend.query(embedding, top_k=top_k, document_id=document_id)
+        filtered.append((time.perf_counter() - start) * 1000)
+    if not queries:
+        return 0.0, 0.0
+    return statistics.median(unfiltered), statistics.median(filtered)
+
+
+def migrate(client, name: str, codec: TextCodec, batch_size: int = 500) -> int:
+    """Copy ``name`` into the compact layout and swap it in. Returns the record count."""
+    staging_name = f"{name}{STAGING_SUFFIX}"
+    existing = {collection.name for collection in client.list_collections()}
+    if name not in existing:
+        if staging_name in existing:
+            # A previous run stopped between dropping the original and renaming
+            staging = client.get_collection(staging_name)
+            staging.modify(name=name)
+            return staging.count()
+        raise ValueError(f"Collection not found: {name}")
+    if staging_name in existing:
+        # Left over from a run that stopped mid-copy; the original is intact
+        client.delete_collection(staging_name)
+
+    source = client.get_collection(name)
+    staging = client.create_collection(staging_name, metadata=source.metadata)
+
+    copied = 0
+    while True:
+        batch = source.get(
+            include=["embeddings", "metadatas", "documents"],
+            limit=batch_size,
+            offset=copied
+        )
+        if not batch["ids"]:
+            break
+        documents, metadatas = [], []
+        for metadata, document in zip(batch["metadatas"], batch["documents"]):
+            text, rest = unpack_text(metadata, document)
+            document, metadata = pack_text(codec, text, rest)
+            documents.append(document)
+            metadatas.append(metadata)
+        staging.add(ids=batch["ids"], embeddings=batch["embeddings"], documents=documents, metadatas=metadatas)
+        copied += len(batch["ids"])
+        print(f"  copied {copied} chunks", flush=True)
+
+    if staging.count() != source.count():
+        raise RuntimeError(
+            f"Copied {staging.count()} of {source.count()} chunks; {name} left unchanged"
+        )
+
+    client.delete_collection(name)
+    staging.modify(name=name)
+    return copied
+
+
+def reclaim_space(path: str) -> None:
+    conn = sqlite3.connect(os.path.join(path, "chroma.sqlite3"))
+    try:
+        # Dropping a collection leaves its documents in the full-text index;
+        # its rowids are record IDs, so anything without a document is stale
+        conn.execute(
+            "DELETE FROM embedding_fulltext_search WHERE rowid NOT IN "
+            "(SELECT id FROM embedding_metadata WHERE key = 'chroma:document')"
+        )
+        conn.commit()
+        # Chroma never shrinks its SQLite file on its own
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rewrite a Chroma store in the compact chunk layout")
+    parser.add_argument("--path", help="Chroma directory (default: CHROMADB_PATH)")
+    parser.add_argument("--collection", help="Collection name (default: COLLECTION_NAME)")
+    parser.add_argument(
+        "--compression",
+        choices=TEXT_COMPRESSIONS,
+        help="Chunk text compression (default: CHUNK_TEXT_COMPRESSION)"
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50, help="Queries timed before and after")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.path:
+        overrides["chromadb_path"] = args.path
+    if args.collection:
+        overrides["collection_name"] = args.collection
+    if args.compression:
+        overrides["chunk_text_compression"] = args.compression
+    settings = Settings(vector_backend="chroma", **overrides)
+    codec = TextCodec(settings.chunk_text_compression, settings.chunk_text_compression_level)
+
+    before_size = disk_usage(settings.chromadb_path)
+    backend = ChromaBackend(settings)
+    queries = sample_queries(backend, args.queries)
+    before_latency = measure_latency(backend, queries, args.top_k)
+
+    print(f"Migrating {settings.chromadb_path} ({settings.collection_name}), compression={codec.compression}")
+    count = migrate(backend.client, settings.collection_name, codec, args.batch_size)
+    backend.close()
+    reclaim_space(settings.chromadb_path)
+
+    after_size = disk_usage(settings.chromadb_path)
+    after_latency = measure_latency(ChromaBackend(settings), queries, args.top_k)
+
+    print(f"{count} chunks rewritten")
+    print(f"{'':<22} {'before':>10} {'after':>10}")
+    print(f"{'disk size (MiB)':<22} {before_size / 2 ** 20:10.1f} {after_size / 2 ** 20:10.1f}")
+    print(f"{'query p50 (ms)':<22} {before_latency[0]:10.2f} {after_latency[0]:10.2f}")
+    print(f"{'filtered p50 (ms)':<22} {before_latency[1]:10.2f} {after_latency[1]:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Extract candidate profiles for documents already in the store.
+
+Documents ingested before profiles existed, or while extraction was off or
+failing, get one from their stored chunks; nothing is re-embedded. With
+``--force`` every CV is extracted again, e.g. after switching to the LLM
+extractor. Job descriptions are skipped.
+
+    python -m app.tools.extract_profiles [--extractor rules|llm] [--force] [--workers 4]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from app.config import Settings
+from app.services.profile_extractor import PROFILE_EXTRACTORS, CandidateProfile, assemble_text, create_profile_extractor
+from app.services.vector_store import VectorStore
+from app.utils.document_category import detect_category
+
+
+def document_text(store: VectorStore, document_id: str, max_chars: int) -> Optional[str]:
+    """The opening text of a stored CV, or None for any other document."""
+    ids, metadatas, _ = store.backend.get_document(document_id)
+    if not ids:
+        return None
+    ordered = sorted(zip(ids, metadatas), key=lambda item: item[1].get("chunk_index", 0))
+    texts = store.get_chunk_texts([chunk_id for chunk_id, _ in ordered])
+    pieces = [
+        (texts.get(chunk_id, ""), metadata.get("start_char"), metadata.get("end_char"))
+        for chunk_id, metadata in ordered
+    ]
+    # Stores from before categories were recorded are classified as at ingestion
+    category = ordered[0][1].get("category") or detect_category("\n".join(text for text, _, _ in pieces[:8]))
+    if category != "resume":
+        return None
+    return assemble_text(pieces, max_chars)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Extract candidate profiles for stored documents")
+    parser.add_argument(
+        "--extractor",
+        choices=[name for name in PROFILE_EXTRACTORS if name != "none"],
+        help="Profile extractor (default: PROFILE_EXTRACTOR)"
+    )
+    parser.add_argument("--force", action="store_true", help="Re-extract documents that already have a profile")
+    parser.add_argument("--workers", type=int, default=4, help="Documents extracted at once")
+    args = parser.parse_args(argv)
+
+    overrides = {"profile_extractor": args.extractor} if args.extractor else {}
+    settings = Settings(**overrides)
+    model = None
+    if settings.profile_extractor == "llm":
+        from app.services.llm_service import LLMService
+        model = LLMService(settings).ingest_model
+    extractor = create_profile_extractor(settings, model)
+    if extractor is None:
+        parser.error("PROFILE_EXTRACTOR is none; pass --extractor")
+
+    store = VectorStore(settings)
+    try:
+        done = set() if args.force else set(store.profiles.document_ids())
+        document_ids: List[str] = []
+        offset = 0
+        while True:
+            records, total = store.list_documents(limit=1000, offset=offset)
+            document_ids += [r.document_id for r in records if r.document_id not in done]
+            offset += len(records)
+            if not records or offset >= total:
+                break
+        print(f"{len(document_ids)} documents to check with the {extractor.name} extractor")
+
+        def extract(document_id: str) -> Optional[CandidateProfile]:
+            text = document_text(store, document_id, settings.profile_max_chars)
+            return extractor.extract(document_id, text) if text is not None else None
+
+        start = time.perf_counter()
+        extracted = skipped = 0
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            for profile in pool.map(extract, document_ids):
+                if profile is None:
+                    skipped += 1
+                    continue
+                store.save_profile(profile)
+                extracted += 1
+                if extracted % 100 == 0:
+                    print(f"  {extracted} profiles", flush=True)
+        print(
+            f"{extracted} profiles extracted, {skipped} documents skipped (not CVs) "
+            f"in {time.perf_counter() - start:.1f} s"
+        )
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
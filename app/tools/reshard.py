@@ -0,0 +1,134 @@
+"""Move an existing vector store into another shard layout.
+
+Every chunk is copied, embedding and all, from the current layout into the
+one given on the command line, so nothing is re-embedded. The new layout is
+recorded only once the copy is complete and verified; until then the API
+keeps opening the old one. Stop the API first: writes made during the copy
+would be lost. Afterwards set VECTOR_SHARDS / VECTOR_SHARD_BY to match.
+
+    python -m app.tools.reshard --shards 4
+    python -m app.tools.reshard --shard-by category
+    python -m app.tools.reshard --shards 1 --drop-source
+"""
+import argparse
+from typing import Dict, List, Optional
+
+from app.config import Settings
+from app.services.vector_backends import VECTOR_BACKENDS, ShardedBackend, VectorBackend, open_backend
+from app.services.vector_backends.sharded_backend import (
+    SHARD_BY,
+    ShardLayout,
+    backend_root,
+    read_layout,
+    shard_layout,
+    write_layout
+)
+from app.utils.document_category import detect_category
+
+# Chunks per document read when classifying it, as at ingestion
+CATEGORY_SAMPLE_CHUNKS = 8
+
+
+def describe(layout: Optional[ShardLayout]) -> str:
+    if layout is None:
+        return "unsharded"
+    return f"{layout.shard_by} sharding ({', '.join(layout.shards)})"
+
+
+def document_categories(source: VectorBackend, batch_size: int) -> Dict[str, str]:
+    """Categories for documents stored before chunks carried one."""
+    openings: Dict[str, Dict[int, str]] = {}
+    for _, texts, metadatas in source.iter_all(batch_size):
+        for text, metadata in zip(texts, metadatas):
+            if "category" not in metadata and metadata["chunk_index"] < CATEGORY_SAMPLE_CHUNKS:
+                openings.setdefault(metadata["document_id"], {})[metadata["chunk_index"]] = text
+    return {
+        document_id: detect_category("\n".join(chunks[i] for i in sorted(chunks)))
+        for document_id, chunks in openings.items()
+    }
+
+
+def copy(source: VectorBackend, target: VectorBackend, categories: Dict[str, str], batch_size: int) -> int:
+    copied = 0
+    for ids, embeddings, texts, metadatas in source.iter_records(batch_size):
+        for metadata in metadatas:
+            if "category" not in metadata and metadata["document_id"] in categories:
+                metadata["category"] = categories[metadata["document_id"]]
+        target.upsert(ids, embeddings, texts, metadatas)
+        copied += len(ids)
+        print(f"  copied {copied} chunks", flush=True)
+    return copied
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Move the vector store into another shard layout")
+    parser.add_argument("--backend", choices=VECTOR_BACKENDS, help="Vector backend (default: VECTOR_BACKEND)")
+    parser.add_argument("--shards", type=int, help="Number of document shards (default: VECTOR_SHARDS)")
+    parser.add_argument("--shard-by", choices=SHARD_BY, help="Shard key (default: VECTOR_SHARD_BY)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--drop-source",
+        action="store_true",
+        help="Delete the old layout's data once the copy is verified"
+    )
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.backend:
+        overrides["vector_backend"] = args.backend
+    if args.shards is not None:
+        overrides["vector_shards"] = args.shards
+    if args.shard_by:
+        overrides["vector_shard_by"] = args.shard_by
+    settings = Settings(**overrides)
+    root = backend_root(settings)
+
+    source_layout = read_layout(root)
+    target_layout = shard_layout(settings)
+    if source_layout == target_layout:
+        print(f"{root} is already {describe(target_layout)}; nothing to do")
+        return
+
+    print(f"Resharding {root}: {describe(source_layout)} -> {describe(target_layout)}")
+    source = open_backend(settings, source_layout)
+    target = open_backend(settings, target_layout)
+    if target.count():
+        # Left over from an interrupted run; start from scratch
+        target.drop()
+        target = open_backend(settings, target_layout)
+
+    categories = {}
+    if target_layout is not None and target_layout.shard_by == "category":
+        categories = document_categories(source, args.batch_size)
+    copied = copy(source, target, categories, args.batch_size)
+
+    if target.count() != source.count():
+        raise RuntimeError(
+            f"Copied {target.count()} of {source.count()} chunks; {describe(source_layout)} left in use"
+        )
+    write_layout(root, target_layout)
+    counts = target.shard_counts() if isinstance(target, ShardedBackend) else {}
+    target.close()
+
+    if args.drop_source:
+        source.drop()
+        if settings.vector_backend == "chroma":
+            from app.tools.compact_chroma import reclaim_space
+            reclaim_space(root)
+    else:
+        source.close()
+
+    print(f"{copied} chunks copied; now {describe(target_layout)}")
+    for name, count in counts.items():
+        print(f"  {name:<24} {count:>8}")
+    if target_layout is not None and target_layout.shard_by == "category":
+        print("Set VECTOR_SHARD_BY=category before restarting the API")
+    else:
+        print(f"Set VECTOR_SHARD_BY=document VECTOR_SHARDS={len(target_layout.shards) if target_layout else 1} "
+              "before restarting the API")
+    if not args.drop_source:
+        print("The old layout's data is kept; it is not read again and can be deleted by hand")
+
+
+if __name__ == "__main__":
+    main()
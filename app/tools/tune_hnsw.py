@@ -0,0 +1,181 @@
+"""Measure HNSW recall and latency on the stored embeddings.
+
+A sample of stored chunk embeddings is held out as queries. Their exact top-k
+neighbours among the rest, found by brute force, are the ground truth. An HNSW
+index is then built over the rest for every M / construction_ef in the grid and
+searched at every search_ef, giving recall@k, per-query latency and build
+time. The indexes are built with hnswlib, the library Chroma runs on, so the
+times are the index's own; the live collection is measured too, with Chroma's
+overhead included. Pick parameters, then apply them with POST /index/reindex.
+
+    python -m app.tools.tune_hnsw [--k 10] [--m 8 16 32] [--search-ef 10 50 100 200]
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.config import Settings
+from app.services.vector_backends import create_backend
+from app.services.vector_backends.base import HnswParams, VectorBackend
+
+
+class TuningResult(NamedTuple):
+    params: HnswParams
+    recall: float
+    p50_ms: float
+    p95_ms: float
+    build_s: float
+
+
+def load_embeddings(backend: VectorBackend, limit: Optional[int], batch_size: int = 1000) -> np.ndarray:
+    pages: List[np.ndarray] = []
+    loaded = 0
+    for _, embeddings, _, _ in backend.iter_records(batch_size):
+        pages.append(np.asarray(embeddings, dtype=np.float32))
+        loaded += len(embeddings)
+        if limit is not None and loaded >= limit:
+            break
+    if not pages:
+        return np.zeros((0, 0), dtype=np.float32)
+    vectors = np.concatenate(pages)[:limit]
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int, block: int = 256) -> np.ndarray:
+    """Row indices of each query's k most similar vectors, best first."""
+    results = []
+    for i in range(0, len(queries), block):
+        scores = queries[i:i + block] @ vectors.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        results.append(np.take_along_axis(top, order, axis=1))
+    return np.concatenate(results)
+
+
+def recall_at_k(found: Sequence[Sequence[int]], truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return statistics.mean(len(set(row[:k]) & set(expected.tolist())) / k for row, expected in zip(found, truth))
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def sweep(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    ms: Sequence[int],
+    construction_efs: Sequence[int],
+    search_efs: Sequence[int]
+) -> Iterator[TuningResult]:
+    """One result per parameter combination; an index is built once per M / construction_ef."""
+    import hnswlib
+
+    truth = exact_neighbours(vectors, queries, k)
+    for m in ms:
+        for construction_ef in construction_efs:
+            index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+            start = time.perf_counter()
+            index.init_index(max_elements=len(vectors), ef_construction=construction_ef, M=m)
+            index.add_items(vectors, np.arange(len(vectors)))
+            build_s = time.perf_counter() - start
+            # Searches one query at a time on one thread, as each API request does
+            index.set_num_threads(1)
+            for search_ef in search_efs:
+                # hnswlib, like Chroma, searches with at least k candidates
+                index.set_ef(max(search_ef, k))
+                found, timings = [], []
+                for query in queries:
+                    start = time.perf_counter()
+                    labels, _ = index.knn_query(query, k=k)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    found.append(labels[0].tolist())
+                yield TuningResult(
+                    HnswParams(m, construction_ef, search_ef),
+                    recall_at_k(found, truth),
+                    statistics.median(timings),
+                    _percentile(timings, 0.95),
+                    build_s
+                )
+
+
+def measure_live(backend: VectorBackend, vectors: np.ndarray, queries: np.ndarray, k: int) -> TuningResult:
+    """Recall and latency of the live collection, searched through the backend."""
+    truth = exact_neighbours(vectors, queries, k)
+    ids: Dict[str, int] = {}
+    row = 0
+    for page_ids, _, _, _ in backend.iter_records():
+        for chunk_id in page_ids:
+            ids[chunk_id] = row
+            row += 1
+    found, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        chunk_ids, _, _ = backend.query(query.tolist(), k)
+        timings.append((time.perf_counter() - start) * 1000)
+        found.append([ids.get(chunk_id, -1) for chunk_id in chunk_ids])
+    return TuningResult(
+        backend.index_params(),
+        recall_at_k(found, truth),
+        statistics.median(timings),
+        _percentile(timings, 0.95),
+        0.0
+    )
+
+
+def print_header(k: int) -> None:
+    print(f"{'M':>4} {'constr_ef':>10} {'search_ef':>10} {'recall@' + str(k):>10} {'p50 ms':>8} {'p95 ms':>8} {'build s':>8}")
+
+
+def print_result(result: TuningResult) -> None:
+    m, construction_ef, search_ef = result.params
+    print(
+        f"{m:>4} {construction_ef:>10} {search_ef:>10} {result.recall:10.3f} "
+        f"{result.p50_ms:8.3f} {result.p95_ms:8.3f} {result.build_s:8.1f}",
+        flush=True
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    settings = Settings()
+    parser = argparse.ArgumentParser(description="Measure HNSW recall and latency on the stored embeddings")
+    parser.add_argument("--k", type=int, default=settings.top_k, help="Neighbours per query (default: TOP_K)")
+    parser.add_argument("--queries", type=int, default=200, help="Stored embeddings held out as queries")
+    parser.add_argument("--max-vectors", type=int, help="Load at most this many stored embeddings")
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    backend = create_backend(settings)
+    try:
+        vectors = load_embeddings(backend, args.max_vectors)
+        if len(vectors) <= args.queries + args.k:
+            parser.error(f"Need more than {args.queries + args.k} stored chunks, found {len(vectors)}")
+        rng = np.random.default_rng(args.seed)
+        held_out = rng.choice(len(vectors), args.queries, replace=False)
+        queries = vectors[held_out]
+        indexed = np.delete(vectors, held_out, axis=0)
+        print(f"{len(indexed)} stored embeddings x {vectors.shape[1]} dims, {len(queries)} held-out queries, k={args.k}")
+
+        if backend.index_params() is not None and args.max_vectors is None:
+            print("\nLive collection (Chroma overhead included)")
+            print_header(args.k)
+            print_result(measure_live(backend, vectors, queries, args.k))
+
+        print("\nParameter sweep (index search time only)")
+        print_header(args.k)
+        for result in sweep(indexed, queries, args.k, args.m, args.construction_ef, args.search_ef):
+            print_result(result)
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
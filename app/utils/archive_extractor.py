@@ -0,0 +1,99 @@
+import gzip
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Tuple
+from app.utils.chunker import Chunk, TextChunker
+from app.utils.text_extractor import TextExtractor
+
+COMPRESSED_EXTENSIONS = {'.zip', '.tar', '.tar.gz', '.tgz', '.gz'}
+
+
+class ArchiveLimitError(ValueError):
+    pass
+
+
+class ArchiveExtractor:
+    def __init__(
+        self,
+        max_members: int = 1000,
+        max_member_bytes: int = 50 * 1024 * 1024,
+        max_total_bytes: int = 500 * 1024 * 1024
+    ):
+        self.max_members = max_members
+        self.max_member_bytes = max_member_bytes
+        self.max_total_bytes = max_total_bytes
+
+    @staticmethod
+    def archive_extension(filename: str) -> Optional[str]:
+        name = filename.lower()
+        # Check multi-part suffixes before their single-part tails
+        for ext in sorted(COMPRESSED_EXTENSIONS, key=len, reverse=True):
+            if name.endswith(ext):
+                return ext
+        return None
+
+    def _read_limited(self, stream: IO[bytes], name: str, remaining: int) -> bytes:
+        # Read one byte past the limit so a lying header cannot slip through
+        limit = min(self.max_member_bytes, remaining)
+        data = stream.read(limit + 1)
+        if len(data) > limit:
+            if limit == remaining:
+                raise ArchiveLimitError(
+                    f"Archive exceeds the uncompressed size limit of {self.max_total_bytes} bytes"
+                )
+            raise ArchiveLimitError(
+                f"Archive member {name} exceeds the size limit of {self.max_member_bytes} bytes"
+            )
+        return data
+
+    def _check_count(self, count: int) -> None:
+        if count > self.max_members:
+            raise ArchiveLimitError(f"Archive contains more than {self.max_members} files")
+
+    def iter_members(self, archive_path: str, filename: str) -> Iterator[Tuple[str, bytes]]:
+        # Members are read straight from the archive; nothing is written to disk
+        ext = self.archive_extension(filename)
+        total = 0
+
+        if ext == '.zip':
+            with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+                infos = [info for info in zip_ref.infolist() if not info.is_dir()]
+                self._check_count(len(infos))
+                for info in infos:
+                    with zip_ref.open(info) as member:
+                        data = self._read_limited(member, info.filename, self.max_total_bytes - total)
+                    total += len(data)
+                    yield info.filename, data
+
+        elif ext in {'.tar', '.tar.gz', '.tgz'}:
+            with tarfile.open(archive_path, 'r:*') as tar_ref:
+                count = 0
+                # Stream members in order instead of loading the full index up front
+                for info in tar_ref:
+                    if not info.isfile():
+                        continue
+                    count += 1
+                    self._check_count(count)
+                    member = tar_ref.extractfile(info)
+                    if member is None:
+                        continue
+                    with member:
+                        data = self._read_limited(member, info.name, self.max_total_bytes - total)
+                    total += len(data)
+                    yield info.name, data
+
+        elif ext == '.gz':
+            # Assume the .gz contains a single file
+            with gzip.open(archive_path, 'rb') as member:
+                name = Path(filename).stem
+                yield name, self._read_limited(member, name, self.max_total_bytes)
+
+        else:
+            raise ValueError(f"Unsupported compressed file type: {filename}")
+
+
+def extract_and_chunk(data: bytes, filename: str, chunk_size: int, overlap: int) -> List[Chunk]:
+    # Module-level so it can run in a process pool
+    pages = TextExtractor.iter_pages_from_bytes(data, Path(filename).suffix)
+    return list(TextChunker(chunk_size=chunk_size, overlap=overlap).chunk_pages(pages))
@@ -1,6 +1,70 @@
-from typing import List
+from collections import deque
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
 import re
 
+import numpy as np
+
+WORD = re.compile(r'\S+')
+
+# str.isspace() for every code point up to U+3000, the last whitespace
+# character; the extra False entry stands in for everything above it
+_MAX_SPACE = 0x3000
+_IS_SPACE = np.array([chr(i).isspace() for i in range(_MAX_SPACE + 1)] + [False])
+
+_FULL_STOP, _EXCLAMATION, _QUESTION = ord('.'), ord('!'), ord('?')
+
+# (start, end, tokens, page number); offsets are into the document text
+_Sentence = Tuple[int, int, int, int]
+
+
+@dataclass
+class Chunk:
+    text: str
+    page_number: int
+    # Character offsets into the document text (pages joined with "\n")
+    start_char: Optional[int] = None
+    end_char: Optional[int] = None
+
+
+class _TextWindow:
+    # The pages still referenced by pending sentences, addressed by document offset
+    def __init__(self):
+        self._pages: Deque[Tuple[int, str]] = deque()
+
+    def append(self, start: int, text: str) -> None:
+        self._pages.append((start, text))
+
+    def discard_before(self, offset: int) -> None:
+        while len(self._pages) > 1 and self._pages[0][0] + len(self._pages[0][1]) < offset:
+            self._pages.popleft()
+
+    def slice(self, start: int, end: int) -> str:
+        parts = []
+        for page_start, text in self._pages:
+            if page_start >= end:
+                break
+            if page_start + len(text) < start:
+                continue
+            parts.append(text[max(0, start - page_start):end - page_start])
+        # Pages are separated by one "\n" in the document text
+        return "\n".join(parts)
+
+
+def _word_offsets(text: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Word = maximal run of non-whitespace, exactly as str.split() sees it
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+    word = np.zeros(len(codes) + 2, dtype=np.int8)
+    word[1:-1] = ~np.take(_IS_SPACE, codes, mode='clip')
+    edges = np.diff(word)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    # A sentence ends at whitespace preceded by . ! or ?, i.e. after a word ending in one
+    last = codes[ends - 1]
+    sentence_ends = (last == _FULL_STOP) | (last == _EXCLAMATION) | (last == _QUESTION)
+    return starts, ends, sentence_ends
+
 
 class TextChunker:
     def __init__(self, chunk_size: int = 600, overlap: int = 100):
@@ -11,33 +75,126 @@ class TextChunker:
         self.overlap = overlap
 
     @staticmethod
-    def _estimate_tokens(text: str) -> int:
-        # Simple approximation: split on whitespace
-        return len(text.split())
+    def _iter_sentences(pages: Iterable[Tuple[int, str]], window: _TextWindow) -> Iterator[_Sentence]:
+        # Sentence offsets and word counts come straight from each page's word
+        # offsets. A sentence may continue across pages, which behave as if
+        # joined with "\n".
+        offset = 0
+        # Leading whitespace belongs to the first sentence, so a first page
+        # holding only whitespace still counts as that sentence's page
+        leading_page = None
+        first = True
+        pending_start = None
+        pending_end = 0
+        pending_tokens = 0
+        pending_page = 0
+        # Whether the last word so far ends a sentence and is followed by whitespace
+        ends_sentence = False
+        space_after = False
 
-    def chunk_text(self, text: str) -> List[str]:
-        # Split into sentences for better semantic boundaries
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        for page_number, page_text in pages:
+            if first:
+                leading_page = page_number if page_text else None
+                first = False
+            else:
+                # The "\n" between pages
+                space_after = True
+            window.append(offset, page_text)
+            starts, ends, sentence_ends = _word_offsets(page_text)
+            if not len(starts):
+                offset += len(page_text) + 1
+                continue
+
+            if pending_start is None:
+                pending_start = offset + int(starts[0])
+                pending_page = page_number if leading_page is None else leading_page
+                leading_page = None
+
+            trailing = 0
+            last_words = np.flatnonzero(sentence_ends)
+            if len(last_words):
+                first_words = np.empty_like(last_words)
+                first_words[0] = 0
+                first_words[1:] = last_words[:-1] + 1
+                sentence_starts = (starts[first_words] + offset).tolist()
+                sentence_stops = (ends[last_words] + offset).tolist()
+                tokens = (last_words - first_words + 1).tolist()
+
+                # The first sentence picks up whatever the previous pages left open
+                yield pending_start, sentence_stops[0], pending_tokens + tokens[0], pending_page
+                yield from zip(sentence_starts[1:], sentence_stops[1:], tokens[1:], repeat(page_number))
+
+                pending_start = None
+                pending_tokens = 0
+                trailing = int(last_words[-1]) + 1
 
-        chunks = []
-        current_chunk = []
+            if trailing < len(starts):
+                if pending_start is None:
+                    pending_start = offset + int(starts[trailing])
+                    pending_page = page_number
+                pending_tokens += len(starts) - trailing
+                pending_end = offset + int(ends[-1])
+
+            ends_sentence = bool(sentence_ends[-1])
+            space_after = int(ends[-1]) < len(page_text)
+            offset += len(page_text) + 1
+
+        if pending_start is not None:
+            yield pending_start, pending_end, pending_tokens, pending_page
+        elif ends_sentence and space_after:
+            # An empty last sentence; it carries no text but, like any
+            # sentence, can close a chunk that overlap has pushed past chunk_size
+            yield offset - 1, offset - 1, 0, page_number
+
+    @staticmethod
+    def _make_chunk(sentences: List[_Sentence], window: _TextWindow) -> Optional[Chunk]:
+        # Sentences are joined with single spaces, as the chunk text always was
+        spans = [(start, end) for start, end, tokens, _ in sentences if tokens]
+        if not spans:
+            return None
+
+        # One slice of the document for the whole chunk, then one per sentence
+        start_char, end_char = spans[0][0], spans[-1][1]
+        region = window.slice(start_char, end_char)
+        return Chunk(
+            text=' '.join([region[start - start_char:end - start_char] for start, end in spans]),
+            page_number=sentences[0][3],
+            start_char=start_char,
+            end_char=end_char
+        )
+
+    def _split_sentence(self, sentence: _Sentence, window: _TextWindow) -> Iterator[Chunk]:
+        # Word-based chunks for a sentence longer than chunk_size
+        start, end, _, page_number = sentence
+        words = list(WORD.finditer(window.slice(start, end)))
+        for i in range(0, len(words), self.chunk_size - self.overlap):
+            chunk_words = words[i:i + self.chunk_size]
+            yield Chunk(
+                text=' '.join([word.group() for word in chunk_words]),
+                page_number=page_number,
+                start_char=start + chunk_words[0].start(),
+                end_char=start + chunk_words[-1].end()
+            )
+
+    def chunk_pages(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Chunk]:
+        window = _TextWindow()
+        current_chunk: List[_Sentence] = []
         current_size = 0
 
-        for sentence in sentences:
-            sentence_tokens = self._estimate_tokens(sentence)
+        for sentence in self._iter_sentences(pages, window):
+            sentence_tokens = sentence[2]
 
             # If single sentence exceeds chunk_size, split it by words
             if sentence_tokens > self.chunk_size:
                 if current_chunk:
-                    chunks.append(' '.join(current_chunk))
+                    chunk = self._make_chunk(current_chunk, window)
+                    if chunk:
+                        yield chunk
                     current_chunk = []
                     current_size = 0
 
-                # Split large sentence into word-based chunks
-                words = sentence.split()
-                for i in range(0, len(words), self.chunk_size - self.overlap):
-                    word_chunk = words[i:i + self.chunk_size]
-                    chunks.append(' '.join(word_chunk))
+                yield from self._split_sentence(sentence, window)
+                window.discard_before(sentence[1])
                 continue
 
             # Add sentence to current chunk
@@ -47,27 +204,32 @@ class TextChunker:
             else:
                 # Save current chunk
                 if current_chunk:
-                    chunks.append(' '.join(current_chunk))
-
-                # Start new chunk with overlap
-                overlap_chunk = []
-                overlap_size = 0
+                    chunk = self._make_chunk(current_chunk, window)
+                    if chunk:
+                        yield chunk
 
                 # Add sentences from the end for overlap
-                for sent in reversed(current_chunk):
-                    sent_tokens = self._estimate_tokens(sent)
-                    if overlap_size + sent_tokens <= self.overlap:
-                        overlap_chunk.insert(0, sent)
-                        overlap_size += sent_tokens
-                    else:
+                overlap_size = 0
+                overlap_start = len(current_chunk)
+                while overlap_start > 0:
+                    sent_tokens = current_chunk[overlap_start - 1][2]
+                    if overlap_size + sent_tokens > self.overlap:
                         break
+                    overlap_size += sent_tokens
+                    overlap_start -= 1
 
                 # Start new chunk with overlap + current sentence
-                current_chunk = overlap_chunk + [sentence]
+                current_chunk = current_chunk[overlap_start:] + [sentence]
                 current_size = overlap_size + sentence_tokens
 
+                # Pages before the new chunk are no longer needed
+                window.discard_before(current_chunk[0][0])
+
         # Add final chunk
         if current_chunk:
-            chunks.append(' '.join(current_chunk))
+            chunk = self._make_chunk(current_chunk, window)
+            if chunk:
+                yield chunk
 
-        return [chunk.strip() for chunk in chunks if chunk.strip()]
+    def chunk_text(self, text: str) -> List[str]:
+        return [chunk.text for chunk in self.chunk_pages([(1, text)])]
@@ -0,0 +1,131 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Rough size of a Gemini token for English text
+CHARS_PER_TOKEN = 4
+
+# Shorter suffix/prefix matches between neighbouring chunks are coincidence,
+# not chunk overlap
+MIN_OVERLAP_CHARS = 20
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _overlap_length(head: str, tail: str) -> int:
+    # Longest prefix of `tail` that is also a suffix of `head`, via the KMP
+    # prefix function over tail + separator + end of head
+    if not tail:
+        return 0
+    window = head[-len(tail):]
+    text = tail + "\0" + window
+    prefix = [0] * len(text)
+    for i in range(1, len(text)):
+        k = prefix[i - 1]
+        while k and text[i] != text[k]:
+            k = prefix[k - 1]
+        if text[i] == text[k]:
+            k += 1
+        prefix[i] = k
+    return prefix[-1] if prefix[-1] >= min(MIN_OVERLAP_CHARS, len(tail)) else 0
+
+
+def _parse_chunk_id(chunk_id: str) -> Tuple[str, Optional[int]]:
+    document_id, sep, index = chunk_id.rpartition("_chunk_")
+    if not sep or not index.isdigit():
+        return chunk_id, None
+    return document_id, int(index)
+
+
+@dataclass
+class _Passage:
+    document_id: str
+    last_index: Optional[int]
+    rank: int
+    text: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+class ContextPacker:
+    """Turns ranked chunks into the passages sent to the LLM.
+
+    Consecutive chunks of the same document are stitched back together without
+    the text they share through chunk overlap, repeated or contained passages
+    are dropped, and passages are added best-ranked first until the token
+    budget is spent.
+    """
+
+    def __init__(self, token_budget: int = 4000):
+        self.token_budget = token_budget
+
+    def pack(self, chunk_ids: List[str], chunk_texts: List[str]) -> List[str]:
+        passages = self._merge(chunk_ids, chunk_texts)
+        passages = self._drop_contained(passages)
+        return self._fit(passages)
+
+    @staticmethod
+    def _merge(chunk_ids: List[str], chunk_texts: List[str]) -> List[_Passage]:
+        # Chunks arrive in rank order; a passage keeps the rank of its best chunk
+        by_document: Dict[str, List[Tuple[Optional[int], int, str, str]]] = {}
+        for rank, (chunk_id, text) in enumerate(zip(chunk_ids, chunk_texts)):
+            document_id, index = _parse_chunk_id(chunk_id)
+            by_document.setdefault(document_id, []).append((index, rank, chunk_id, text.strip()))
+
+        passages: List[_Passage] = []
+        for document_id, chunks in by_document.items():
+            chunks.sort(key=lambda c: (c[0] is None, c[0] if c[0] is not None else c[1]))
+            current: Optional[_Passage] = None
+            for index, rank, chunk_id, text in chunks:
+                if (
+                    current is not None
+                    and index is not None
+                    and current.last_index is not None
+                    and index - current.last_index <= 1
+                ):
+                    if index != current.last_index:
+                        overlap = _overlap_length(current.text, text)
+                        rest = text[overlap:]
+                        current.text = current.text + rest if overlap or not rest else f"{current.text} {rest}"
+                        current.last_index = index
+                    current.rank = min(current.rank, rank)
+                    current.chunk_ids.append(chunk_id)
+                    continue
+                current = _Passage(document_id, index, rank, text, [chunk_id])
+                passages.append(current)
+
+        passages.sort(key=lambda p: p.rank)
+        return passages
+
+    @staticmethod
+    def _drop_contained(passages: List[_Passage]) -> List[_Passage]:
+        # The same span can come back under another document (shared JD
+        # boilerplate, a resume uploaded twice); keep only the first copy
+        normalized = [" ".join(p.text.split()) for p in passages]
+        kept = []
+        for i, passage in enumerate(passages):
+            if not normalized[i]:
+                continue
+            contained = any(
+                j != i and normalized[i] in normalized[j] and (len(normalized[j]) > len(normalized[i]) or j < i)
+                for j in range(len(passages))
+            )
+            if not contained:
+                kept.append(passage)
+        return kept
+
+    def _fit(self, passages: List[_Passage]) -> List[str]:
+        packed = []
+        remaining = self.token_budget
+        for passage in passages:
+            tokens = estimate_tokens(passage.text)
+            if tokens <= remaining:
+                packed.append(passage.text)
+                remaining -= tokens
+            elif not packed:
+                # Never send an empty context: cut the best passage at a word boundary
+                cut = passage.text[:remaining * CHARS_PER_TOKEN].rsplit(" ", 1)[0]
+                packed.append(cut)
+                remaining -= estimate_tokens(cut)
+        return packed
@@ -0,0 +1,32 @@
+import re
+
+DOCUMENT_CATEGORIES = ("resume", "job_description")
+
+# Phrases typical of a job posting; a resume rarely uses them
+_JOB_MARKERS = re.compile(
+    r"\b(responsibilities|requirements|qualifications|job description|is hiring|we are hiring|"
+    r"we are looking for|the role|the successful candidate|candidates? (?:should|must)|"
+    r"what we offer|how to apply|apply now|reports? to)\b",
+    re.IGNORECASE
+)
+# Section headings and phrasing typical of a resume or CV
+_RESUME_MARKERS = re.compile(
+    r"\b(curriculum vitae|resume|cv|work experience|professional experience|education|"
+    r"certifications?|languages|references|objective|profile|worked on|worked at|skills)\b",
+    re.IGNORECASE
+)
+
+# The opening of a document is enough to tell the two apart
+SAMPLE_CHARS = 4000
+
+
+def detect_category(text: str) -> str:
+    """Classify a document as a resume or a job description from its opening text.
+
+    Rule-based and cheap: whichever kind of marker occurs more often wins, and
+    ties go to ``resume``, by far the more common upload.
+    """
+    sample = text[:SAMPLE_CHARS]
+    job = len(_JOB_MARKERS.findall(sample))
+    resume = len(_RESUME_MARKERS.findall(sample))
+    return "job_description" if job > resume else "resume"
@@ -0,0 +1,240 @@
+"""Process-wide counters and histograms in the Prometheus text format.
+
+Kept dependency-free: the app needs a handful of metrics, not a client library.
+Label values are passed positionally, in the order of ``labelnames``.
+"""
+import bisect
+import math
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+
+_enabled = True
+
+
+def set_enabled(enabled: bool) -> None:
+    """Turn recording on or off for every metric; off makes updates no-ops."""
+    global _enabled
+    _enabled = enabled
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels: str) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not _enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            series = self._series.get(labels)
+            return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._series.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each pipeline stage.",
+    ["stage"]
+))
+TIME_TO_FIRST_TOKEN_SECONDS = REGISTRY.register(Histogram(
+    "rag_time_to_first_token_seconds",
+    "Time from the start of generation to the first streamed token."
+))
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "rag_http_requests_total",
+    "HTTP requests by endpoint and status code.",
+    ["method", "endpoint", "status"]
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "rag_http_request_duration_seconds",
+    "HTTP request latency until the response headers are sent.",
+    ["method", "endpoint"]
+))
+DOCUMENTS_INGESTED = REGISTRY.register(Counter(
+    "rag_documents_ingested_total",
+    "Documents stored."
+))
+CHUNKS_INGESTED = REGISTRY.register(Counter(
+    "rag_chunks_ingested_total",
+    "Chunks stored, by whether their embedding was computed or reused.",
+    ["embedding"]
+))
+DOCUMENT_CHUNKS = REGISTRY.register(Histogram(
+    "rag_document_chunks",
+    "Chunks per stored document.",
+    buckets=SIZE_BUCKETS
+))
+PROMPT_TOKENS = REGISTRY.register(Histogram(
+    "rag_prompt_tokens",
+    "Estimated prompt tokens per generation request.",
+    buckets=SIZE_BUCKETS
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "rag_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ["cache", "result"]
+))
+API_ERRORS = REGISTRY.register(Counter(
+    "rag_api_errors_total",
+    "Failed Gemini API calls, including attempts that were retried.",
+    ["api"]
+))
+API_RETRIES = REGISTRY.register(Counter(
+    "rag_api_retries_total",
+    "Gemini API calls retried after a retryable error.",
+    ["api"]
+))
+GEMINI_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "rag_gemini_queue_depth",
+    "Gemini calls waiting for a rate budget token or a concurrency slot.",
+    ["budget"]
+))
+GEMINI_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "rag_gemini_wait_seconds",
+    "Time a Gemini call waited for its rate budget and a concurrency slot.",
+    ["budget"]
+))
+GEMINI_REJECTED = REGISTRY.register(Counter(
+    "rag_gemini_rejected_total",
+    "Gemini calls failed fast, by budget and reason (circuit_open or throttled).",
+    ["budget", "reason"]
+))
+GEMINI_COALESCED = REGISTRY.register(Counter(
+    "rag_gemini_coalesced_total",
+    "Gemini calls that shared the result of an identical call already in flight.",
+    ["api"]
+))
+GEMINI_CIRCUIT_OPEN = REGISTRY.register(Gauge(
+    "rag_gemini_circuit_open",
+    "1 while the Gemini circuit breaker is open or probing, else 0."
+))
@@ -0,0 +1,165 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DIVERSITY_MODES = ("none", "mmr")
+DOCUMENT_AGGREGATIONS = ("max", "sum")
+
+
+def _document_id(chunk_id: str) -> str:
+    return chunk_id.rsplit("_chunk_", 1)[0]
+
+
+def normalize_scores(scores: Sequence[float]) -> np.ndarray:
+    """Min-max scale scores to [0, 1]: the fallback relevance when there is no query vector."""
+    values = np.asarray(scores, dtype=np.float32)
+    if not len(values):
+        return values
+    low, high = values.min(), values.max()
+    if high - low < 1e-9:
+        return np.ones_like(values)
+    return (values - low) / (high - low)
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def mmr(relevance: np.ndarray, embeddings: np.ndarray, k: int, lambda_: float) -> List[int]:
+    """Maximal Marginal Relevance: pick ``k`` indices, trading relevance for novelty.
+
+    Each step takes the candidate maximising
+    ``lambda * relevance - (1 - lambda) * max similarity to those already picked``.
+    The running maximum similarity is updated with one matrix-vector product
+    per pick, so the cost is O(k * n * dim) rather than the full n x n matrix.
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    unit = _unit(embeddings)
+
+    redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected: List[int] = []
+    for _ in range(k):
+        if selected:
+            gain = lambda_ * relevance - (1.0 - lambda_) * redundancy
+        else:
+            gain = relevance.astype(np.float32, copy=True)
+        gain[~available] = -np.inf
+        best = int(np.argmax(gain))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, unit @ unit[best], out=redundancy)
+    return selected
+
+
+def group_by_document(
+    chunk_ids: List[str],
+    relevance: np.ndarray,
+    aggregation: str = "max"
+) -> Tuple[List[str], np.ndarray, List[List[int]]]:
+    """Candidate documents, their scores and their chunk positions, best chunk first.
+
+    A document scores as its best chunk, or with ``sum`` as all of its chunks
+    together, so several good matches outrank a single lucky one.
+    """
+    members: Dict[str, List[int]] = {}
+    for i, chunk_id in enumerate(chunk_ids):
+        members.setdefault(_document_id(chunk_id), []).append(i)
+    document_ids = list(members)
+    positions = []
+    scores = np.empty(len(document_ids), dtype=np.float32)
+    for j, document_id in enumerate(document_ids):
+        chunks = sorted(members[document_id], key=lambda i: relevance[i], reverse=True)
+        positions.append(chunks)
+        scores[j] = relevance[chunks].sum() if aggregation == "sum" else relevance[chunks[0]]
+    return document_ids, scores, positions
+
+
+class ResultReranker:
+    """Reorders an oversized candidate pool into the chunks sent on for packing.
+
+    With MMR the pool is diversified so near-duplicate chunks from one CV do
+    not crowd out other candidates. With document grouping ``top_k`` counts
+    documents, each contributing up to ``chunks_per_document`` chunks; MMR
+    then applies between documents and among each document's chunks.
+    """
+
+    def __init__(
+        self,
+        diversity: str = "none",
+        mmr_lambda: float = 0.5,
+        group_by_document: bool = False,
+        aggregation: str = "max",
+        chunks_per_document: int = 1
+    ):
+        if diversity not in DIVERSITY_MODES:
+            raise ValueError(f"Unknown retrieval diversity: {diversity}. Supported: {list(DIVERSITY_MODES)}")
+        if aggregation not in DOCUMENT_AGGREGATIONS:
+            raise ValueError(
+                f"Unknown document score aggregation: {aggregation}. Supported: {list(DOCUMENT_AGGREGATIONS)}"
+            )
+        self.diversity = diversity
+        self.mmr_lambda = mmr_lambda
+        self.group_by_document = group_by_document
+        self.aggregation = aggregation
+        self.chunks_per_document = max(1, chunks_per_document)
+
+    @property
+    def enabled(self) -> bool:
+        return self.diversity != "none" or self.group_by_document
+
+    @property
+    def needs_embeddings(self) -> bool:
+        return self.diversity == "mmr"
+
+    def rerank(
+        self,
+        chunk_ids: List[str],
+        scores: Sequence[float],
+        embeddings: Optional[np.ndarray],
+        top_k: int,
+        query_embedding: Optional[Sequence[float]] = None
+    ) -> List[int]:
+        """Positions in the pool of the chunks to keep, in their new order.
+
+        Relevance is each chunk's cosine similarity to the query, on the same
+        scale as the similarity between chunks that MMR penalises. Without a
+        query vector (lexical retrieval) the retrieval scores are rescaled
+        to [0, 1] instead.
+        """
+        has_embeddings = embeddings is not None and len(embeddings) == len(chunk_ids)
+        if has_embeddings and query_embedding is not None:
+            relevance = _unit(embeddings) @ _unit(np.asarray(query_embedding, dtype=np.float32))
+        else:
+            relevance = normalize_scores(scores)
+        diversify = self.diversity == "mmr" and has_embeddings
+        if not self.group_by_document:
+            if diversify:
+                return mmr(relevance, embeddings, top_k, self.mmr_lambda)
+            return list(range(min(top_k, len(chunk_ids))))
+
+        _, document_relevance, positions = group_by_document(chunk_ids, relevance, self.aggregation)
+        if self.aggregation == "sum" and len(document_relevance):
+            # Back on the scale of one chunk, which MMR compares it against
+            document_relevance = document_relevance * (relevance.max() / max(document_relevance.max(), 1e-9))
+        if diversify:
+            # Each document is represented by its best chunk, so MMR skips
+            # near-identical CVs rather than chunks of the same one
+            representatives = embeddings[[chunks[0] for chunks in positions]]
+            documents = mmr(document_relevance, representatives, top_k, self.mmr_lambda)
+        else:
+            documents = np.argsort(-document_relevance, kind="stable")[:top_k].tolist()
+
+        kept: List[int] = []
+        for j in documents:
+            chunks = positions[j]
+            if diversify and self.chunks_per_document > 1 and len(chunks) > 1:
+                picks = mmr(relevance[chunks], embeddings[chunks], self.chunks_per_document, self.mmr_lambda)
+                kept.extend(chunks[p] for p in picks)
+            else:
+                kept.extend(chunks[:self.chunks_per_document])
+        return kept
@@ -0,0 +1,51 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+def retry_with_backoff(
+    fn: Callable[[], T],
+    retry_on: Tuple[Type[BaseException], ...],
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    on_retry: Optional[Callable[[BaseException], None]] = None
+) -> T:
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except retry_on as e:
+            if attempt >= max_retries:
+                raise
+            if on_retry:
+                on_retry(e)
+            # Exponential backoff with full jitter
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            time.sleep(random.uniform(0, delay))
+            attempt += 1
+
+
+async def retry_with_backoff_async(
+    fn: Callable[[], Awaitable[T]],
+    retry_on: Tuple[Type[BaseException], ...],
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    on_retry: Optional[Callable[[BaseException], None]] = None
+) -> T:
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except retry_on as e:
+            if attempt >= max_retries:
+                raise
+            if on_retry:
+                on_retry(e)
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            await asyncio.sleep(random.uniform(0, delay))
+            attempt += 1
@@ -0,0 +1,42 @@
+from typing import Union
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed when chunk text compression is enabled
+    zstandard = None
+
+TEXT_COMPRESSIONS = ("none", "zstd")
+
+
+class TextCodec:
+    """Encodes chunk text for storage: plain ``str`` or zstd-compressed ``bytes``.
+
+    Decoding goes by the stored type, so a store can hold a mix of both while
+    the setting changes or a migration is under way.
+    """
+
+    def __init__(self, compression: str = "none", level: int = 3):
+        if compression not in TEXT_COMPRESSIONS:
+            raise ValueError(f"Unknown text compression: {compression}. Supported: {list(TEXT_COMPRESSIONS)}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("chunk_text_compression=zstd requires the zstandard package (pip install zstandard)")
+
+        self.compression = compression
+        self.level = level
+
+    @property
+    def compressed(self) -> bool:
+        return self.compression == "zstd"
+
+    def encode(self, text: str) -> Union[str, bytes]:
+        if not self.compressed:
+            return text
+        return zstandard.compress(text.encode("utf-8"), self.level)
+
+    @staticmethod
+    def decode(value: Union[str, bytes]) -> str:
+        if isinstance(value, str):
+            return value
+        if zstandard is None:
+            raise RuntimeError("Stored chunk text is zstd-compressed; install the zstandard package to read it")
+        return zstandard.decompress(value).decode("utf-8")
@@ -1,28 +1,110 @@
+import io
 import pdfplumber
-from typing import Optional
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
 from pathlib import Path
 
+SUPPORTED_EXTENSIONS = {'.pdf', '.txt'}
+
+# Lines per block when streaming plain text files
+TXT_BLOCK_LINES = 2000
+
 
 class TextExtractor:
     @staticmethod
-    def extract_from_pdf(file_path: str) -> str:
+    def iter_pdf_pages(file_path: Union[str, BinaryIO]) -> Iterator[Tuple[int, str]]:
+        found_text = False
         try:
             with pdfplumber.open(file_path) as pdf:
-                text_parts = []
-                for page in pdf.pages:
+                for page_number, page in enumerate(pdf.pages, start=1):
                     page_text = page.extract_text()
+                    # Drop the parsed layout and text map so memory stays flat across pages
+                    page.flush_cache()
+                    if hasattr(page, "get_textmap"):
+                        page.get_textmap.cache_clear()
                     if page_text:
-                        text_parts.append(page_text)
+                        found_text = found_text or bool(page_text.strip())
+                        yield page_number, page_text
+
+        except Exception as e:
+            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
 
-                full_text = "\n".join(text_parts)
+        if not found_text:
+            raise ValueError("Failed to extract text from PDF: PDF contains no extractable text")
 
-                if not full_text.strip():
-                    raise ValueError("PDF contains no extractable text")
+    @staticmethod
+    def _decode_line(line: bytes) -> str:
+        try:
+            return line.decode('utf-8')
+        except UnicodeDecodeError:
+            return line.decode('latin-1')
 
-                return full_text
+    @classmethod
+    def iter_txt_pages(cls, file_path: str) -> Iterator[Tuple[int, str]]:
+        # Text files have no pages: everything is page 1, yielded in line blocks.
+        # Each block drops its final newline because consumers join pages with "\n".
+        found_text = False
+        try:
+            with open(file_path, 'rb') as f:
+                block = []
+                for line in f:
+                    block.append(cls._decode_line(line))
+                    if len(block) >= TXT_BLOCK_LINES:
+                        text = ''.join(block)
+                        found_text = found_text or bool(text.strip())
+                        yield 1, text[:-1] if text.endswith('\n') else text
+                        block = []
+                if block:
+                    text = ''.join(block)
+                    found_text = found_text or bool(text.strip())
+                    yield 1, text
 
         except Exception as e:
-            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+            raise ValueError(f"Failed to extract text from TXT: {str(e)}")
+
+        if not found_text:
+            raise ValueError("Failed to extract text from TXT: TXT file is empty")
+
+    @classmethod
+    def iter_pages(cls, file_path: str, file_extension: str) -> Iterator[Tuple[int, str]]:
+        ext = file_extension.lower().lstrip('.')
+
+        extractors = {
+            'pdf': cls.iter_pdf_pages,
+            'txt': cls.iter_txt_pages
+        }
+
+        extractor = extractors.get(ext)
+        if not extractor:
+            raise ValueError(f"Unsupported file format: {ext}. Supported formats: {list(extractors.keys())}")
+
+        return extractor(file_path)
+
+    @staticmethod
+    def extract_from_txt_bytes(data: bytes) -> str:
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            text = data.decode('latin-1')
+
+        if not text.strip():
+            raise ValueError("TXT file is empty")
+
+        return text
+
+    @classmethod
+    def iter_pages_from_bytes(cls, data: bytes, file_extension: str) -> Iterator[Tuple[int, str]]:
+        ext = file_extension.lower().lstrip('.')
+
+        if ext == 'pdf':
+            return cls.iter_pdf_pages(io.BytesIO(data))
+        if ext == 'txt':
+            return iter([(1, cls.extract_from_txt_bytes(data))])
+
+        raise ValueError(f"Unsupported file format: {ext}. Supported formats: ['pdf', 'txt']")
+
+    @classmethod
+    def extract_from_pdf(cls, file_path: Union[str, BinaryIO]) -> str:
+        return "\n".join(text for _, text in cls.iter_pdf_pages(file_path))
 
     @staticmethod
     def extract_from_txt(file_path: str) -> str:
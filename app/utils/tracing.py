@@ -0,0 +1,245 @@
+"""Timing spans for pipeline stages.
+
+Every span feeds the ``rag_stage_duration_seconds`` histogram. A request sent
+with the debug header also collects its own spans in a ``RequestTrace``, which
+the middleware returns as a ``Server-Timing`` header. Stages nest (chunking
+pulls pages from extraction), and each span is charged only its own time, not
+that of the spans inside it. With metrics off and no trace requested, ``span``
+returns a shared no-op.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+from app.utils import metrics
+
+T = TypeVar("T")
+
+DEBUG_HEADER = b"x-debug-timing"
+
+
+class RequestTrace:
+    """Stage totals for one request, in the order the stages first ran."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        # Worker threads of the same request may add concurrently
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def breakdown_ms(self) -> Dict[str, float]:
+        with self._lock:
+            return {stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()}
+
+    def server_timing(self, total_seconds: float) -> str:
+        parts = [f"{stage};dur={ms}" for stage, ms in self.breakdown_ms().items()]
+        parts.append(f"total;dur={round(total_seconds * 1000, 2)}")
+        return ", ".join(parts)
+
+
+_request_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+_local = threading.local()
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _request_trace.get()
+
+
+def _child_times() -> list:
+    # Per thread: time spent in nested spans, one slot per open span
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def record(stage: str, seconds: float, trace: Optional[RequestTrace] = None) -> None:
+    """Record a stage measured elsewhere, e.g. one spread over a stream."""
+    metrics.STAGE_SECONDS.observe(seconds, stage)
+    trace = trace or _request_trace.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+class _Span:
+    __slots__ = ("stage", "trace", "start")
+
+    def __init__(self, stage: str, trace: Optional[RequestTrace]):
+        self.stage = stage
+        self.trace = trace
+
+    def __enter__(self) -> "_Span":
+        _child_times().append(0.0)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        elapsed = time.perf_counter() - self.start
+        stack = _child_times()
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        record(self.stage, elapsed - children, self.trace)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+class _AsyncSpan:
+    """A span around awaits. Other tasks run on the thread meanwhile, so it
+    stays off the per-thread nesting stack: it is never a parent or a child."""
+
+    __slots__ = ("stage", "trace", "start")
+
+    def __init__(self, stage: str, trace: Optional[RequestTrace]):
+        self.stage = stage
+        self.trace = trace
+
+    def __enter__(self) -> "_AsyncSpan":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        record(self.stage, time.perf_counter() - self.start, self.trace)
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage: str):
+    """Context manager timing one stage."""
+    trace = _request_trace.get()
+    if trace is None and not metrics.enabled():
+        return _NOOP_SPAN
+    return _Span(stage, trace)
+
+
+def async_span(stage: str):
+    """Context manager timing one stage of a coroutine, across its awaits."""
+    trace = _request_trace.get()
+    if trace is None and not metrics.enabled():
+        return _NOOP_SPAN
+    return _AsyncSpan(stage, trace)
+
+
+def timed_iter(stage: str, iterable: Iterable[T]) -> Iterator[T]:
+    """Time the work done producing items, recorded once when iteration ends."""
+    trace = _request_trace.get()
+    if trace is None and not metrics.enabled():
+        return iter(iterable)
+    return _timed_iter(stage, iter(iterable), trace)
+
+
+def _timed_iter(stage: str, iterator: Iterator[T], trace: Optional[RequestTrace]) -> Iterator[T]:
+    total = 0.0
+    try:
+        while True:
+            stack = _child_times()
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                total += elapsed - children
+            yield item
+    finally:
+        record(stage, total, trace)
+
+
+def bind(fn: Callable[..., T]) -> Callable[..., T]:
+    """Carry the current request trace into calls made on a worker thread."""
+    trace = _request_trace.get()
+    if trace is None:
+        return fn
+
+    def bound(*args, **kwargs):
+        token = _request_trace.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _request_trace.reset(token)
+    return bound
+
+
+class TracingMiddleware:
+    """HTTP request metrics, plus the stage breakdown for requests that ask for it.
+
+    A request with ``X-Debug-Timing: 1`` gets a ``Server-Timing`` header listing
+    the time spent in each stage. Streamed responses send their headers before
+    the answer is generated, so they report generation stages in their final
+    event instead.
+    """
+
+    def __init__(self, app, debug_timing: bool = True):
+        self.app = app
+        self.debug_timing = debug_timing
+
+    def _wants_trace(self, scope) -> bool:
+        if not self.debug_timing:
+            return False
+        for name, value in scope["headers"]:
+            if name == DEBUG_HEADER:
+                return value.strip().lower() not in (b"", b"0", b"false", b"no")
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = RequestTrace() if self._wants_trace(scope) else None
+        if trace is None and not metrics.enabled():
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        method = scope["method"]
+        responded = False
+
+        def observe(status: int) -> float:
+            elapsed = time.perf_counter() - start
+            # The router stores the matched endpoint in the scope; its name
+            # keeps path parameters such as job IDs out of the labels
+            endpoint = getattr(scope.get("endpoint"), "__name__", "unmatched")
+            metrics.HTTP_REQUESTS.inc(method, endpoint, str(status))
+            metrics.HTTP_REQUEST_SECONDS.observe(elapsed, method, endpoint)
+            return elapsed
+
+        async def send_with_timing(message):
+            nonlocal responded
+            if message["type"] == "http.response.start":
+                responded = True
+                elapsed = observe(message["status"])
+                if trace is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", trace.server_timing(elapsed).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        token = _request_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            if not responded:
+                observe(500)
+            raise
+        finally:
+            _request_trace.reset(token)
@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import Settings
+from app.services.document_service import DocumentService
+from app.services.gemini_governor import GeminiGovernor
+from app.utils.chunker import Chunk
+from app.utils.hashing import sha256_text
+from benchmarks.corpus import COMPANIES, FIRST_NAMES, LAST_NAMES, SKILLS
+from benchmarks.fakes import FakeEmbeddingService, FakeLLMService
+
+
+def _service(data_dir: str, args) -> DocumentService:
+    settings = Settings(
+        chromadb_path=os.path.join(data_dir, "chroma"),
+        embedding_cache_enabled=False,
+        answer_cache_enabled=False,
+        profile_extractor="none",
+        retrieval_mode=args.retrieval_mode,
+        # Let the fake backend's latency, not the governor, be the limit
+        gemini_max_concurrency=args.gemini_max_concurrency,
+        vector_store_workers=args.vector_store_workers
+    )
+    governor = GeminiGovernor(settings)
+    return DocumentService(
+        settings,
+        embedding_service=FakeEmbeddingService(settings, call_latency=0.0, item_latency=0.0, governor=governor),
+        llm_service=FakeLLMService(settings, governor=governor, latency=args.llm_latency, token_latency=0.0)
+    )
+
+
+def _ingest(service: DocumentService, rng: random.Random, documents: int) -> None:
+    for i in range(documents):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        chunks = [
+            Chunk(f"{name} worked at {rng.choice(COMPANIES)} on {rng.choice(SKILLS)} and {rng.choice(SKILLS)}.", 1),
+            Chunk(f"{name} is applying for the site engineer position.", 1),
+        ]
+        service.process_chunks(chunks, sha256_text("".join(chunk.text for chunk in chunks)))
+
+
+def _modes(service: DocumentService) -> Dict[str, Callable[[str], Awaitable]]:
+    async def blocking(question: str):
+        # What /documents/query did before: a synchronous call inside the async endpoint
+        return service.query_documents(question)
+
+    async def threadpool(question: str):
+        return await run_in_threadpool(service.query_documents, question)
+
+    async def native(question: str):
+        return await service.query_documents_async(question)
+
+    return {"blocking": blocking, "threadpool": threadpool, "async": native}
+
+
+async def _load(query: Callable[[str], Awaitable], concurrency: int, duration: float, rng: random.Random):
+    """``concurrency`` clients asking back to back; also samples how late the event loop runs."""
+    latencies: List[float] = []
+    lag: List[float] = []
+    deadline = time.perf_counter() + duration
+    running = True
+
+    async def client(n: int) -> None:
+        i = 0
+        while time.perf_counter() < deadline:
+            question = f"Who has worked on {rng.choice(SKILLS)} at {rng.choice(COMPANIES)}? ({n}.{i})"
+            start = time.perf_counter()
+            await query(question)
+            latencies.append(time.perf_counter() - start)
+            i += 1
+
+    async def ticker() -> None:
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag.append(time.perf_counter() - start - 0.01)
+
+    tick = asyncio.ensure_future(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    running = False
+    await tick
+    return len(latencies) / elapsed, latencies, lag
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent query throughput: blocking, thread-pool and async endpoints")
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds of load per level")
+    parser.add_argument("--embed-latency", type=float, default=0.1, help="Simulated seconds per embedding call")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Simulated seconds per generation")
+    parser.add_argument("--retrieval-mode", default="vector", choices=["vector", "lexical", "hybrid"])
+    parser.add_argument("--gemini-max-concurrency", type=int, default=1000)
+    parser.add_argument("--vector-store-workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as data_dir:
+        service = _service(data_dir, args)
+        _ingest(service, rng, args.documents)
+        service.embedding_service.call_latency = args.embed_latency
+
+        print(
+            f"{args.documents} documents, embedding {args.embed_latency}s + generation {args.llm_latency}s "
+            f"per query, {args.duration}s per level"
+        )
+        print(f"{'mode':<11} {'clients':>7} {'q/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'loop lag max ms':>16}")
+        for label, query in _modes(service).items():
+            for concurrency in args.concurrency:
+                throughput, latencies, lag = asyncio.run(_load(query, concurrency, args.duration, rng))
+                ordered = sorted(latencies)
+                p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+                print(
+                    f"{label:<11} {concurrency:>7} {throughput:7.1f} {statistics.median(latencies) * 1000:8.0f} "
+                    f"{p95 * 1000:8.0f} {max(lag, default=0.0) * 1000:16.0f}"
+                )
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
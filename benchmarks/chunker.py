@@ -0,0 +1,143 @@
+import argparse
+import random
+import re
+import time
+from typing import Iterable, Iterator, List, Tuple
+
+from app.utils.chunker import Chunk, TextChunker
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+WORDS = (
+    "managed", "delivered", "python", "kubernetes", "team", "of", "engineers", "built",
+    "pipelines", "for", "the", "and", "migration", "reduced", "latency", "by", "percent"
+)
+
+
+class ReferenceChunker:
+    """The previous string-based chunker: re-splits the carried text on every
+    page and counts words with str.split() per sentence."""
+
+    def __init__(self, chunk_size: int = 600, overlap: int = 100):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    @staticmethod
+    def _iter_sentences(pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[str, int]]:
+        carry = None
+        carry_page = None
+        for page_number, page_text in pages:
+            if carry is None:
+                buffer, buffer_page = page_text, page_number
+            elif carry == "":
+                buffer, buffer_page = page_text.lstrip(), page_number
+            else:
+                buffer, buffer_page = carry + "\n" + page_text, carry_page
+
+            sentences = SENTENCE_BOUNDARY.split(buffer)
+            for i, sentence in enumerate(sentences[:-1]):
+                yield sentence, buffer_page if i == 0 else page_number
+
+            carry = sentences[-1]
+            carry_page = buffer_page if len(sentences) == 1 else page_number
+
+        if carry is not None:
+            yield carry, carry_page
+
+    def chunk_pages(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Chunk]:
+        current: List[Tuple[str, int, int]] = []
+        size = 0
+        for sentence, page_number in self._iter_sentences(pages):
+            tokens = len(sentence.split())
+            if tokens > self.chunk_size:
+                if current:
+                    text = ' '.join(s for s, _, _ in current).strip()
+                    if text:
+                        yield Chunk(text, current[0][2])
+                    current, size = [], 0
+                words = sentence.split()
+                for i in range(0, len(words), self.chunk_size - self.overlap):
+                    yield Chunk(' '.join(words[i:i + self.chunk_size]), page_number)
+                continue
+
+            if size + tokens <= self.chunk_size:
+                current.append((sentence, tokens, page_number))
+                size += tokens
+                continue
+
+            if current:
+                text = ' '.join(s for s, _, _ in current).strip()
+                if text:
+                    yield Chunk(text, current[0][2])
+            overlap_size = 0
+            start = len(current)
+            while start > 0 and overlap_size + current[start - 1][1] <= self.overlap:
+                overlap_size += current[start - 1][1]
+                start -= 1
+            current = current[start:] + [(sentence, tokens, page_number)]
+            size = overlap_size + tokens
+
+        if current:
+            text = ' '.join(s for s, _, _ in current).strip()
+            if text:
+                yield Chunk(text, current[0][2])
+
+
+def _prose_pages(rng: random.Random, megabytes: float, page_chars: int) -> List[Tuple[int, str]]:
+    # Resume-like text: short sentences, paragraphs and page breaks
+    pages = []
+    total = 0
+    while total < megabytes * 1_000_000:
+        lines = []
+        length = 0
+        while length < page_chars:
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 30))) + rng.choice(".!?.")
+                for _ in range(rng.randint(1, 6))
+            ]
+            lines.append(" ".join(sentences))
+            length += len(lines[-1]) + 1
+        pages.append((len(pages) + 1, "\n".join(lines)))
+        total += length
+    return pages
+
+
+def _run_on_pages(rng: random.Random, megabytes: float, page_chars: int) -> List[Tuple[int, str]]:
+    # Skill lists and tables: no sentence ends, so one sentence spans every page
+    words_per_page = page_chars // 8
+    count = max(1, int(megabytes * 1_000_000 / page_chars))
+    return [(i + 1, " ".join(rng.choice(WORDS) for _ in range(words_per_page))) for i in range(count)]
+
+
+def _time(label: str, chunker, pages: List[Tuple[int, str]], megabytes: float) -> List[Tuple[str, int]]:
+    start = time.perf_counter()
+    chunks = [(c.text, c.page_number) for c in chunker.chunk_pages(pages)]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<10} {elapsed:8.3f} s  {megabytes / elapsed:7.1f} MB/s  chunks={len(chunks)}")
+    return chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offset-based chunker vs the previous string-based one")
+    parser.add_argument("--megabytes", type=float, default=8.0)
+    parser.add_argument("--run-on-megabytes", type=float, default=1.0,
+                        help="Size of the run-on input; the reference is quadratic on it")
+    parser.add_argument("--page-chars", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    inputs = [
+        ("prose", _prose_pages(rng, args.megabytes, args.page_chars), args.megabytes),
+        ("run-on", _run_on_pages(rng, args.run_on_megabytes, args.page_chars), args.run_on_megabytes),
+    ]
+    for name, pages, megabytes in inputs:
+        print(f"{name}: {megabytes:.1f} MB in {len(pages)} pages")
+        reference = _time("reference", ReferenceChunker(), pages, megabytes)
+        offsets = _time("offsets", TextChunker(), pages, megabytes)
+        # Same chunk text and page numbers as before, character for character
+        assert offsets == reference, f"{name}: chunker output differs from the reference"
+
+
+if __name__ == "__main__":
+    main()
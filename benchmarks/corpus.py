@@ -0,0 +1,158 @@
+"""Synthetic resumes and job descriptions, written as PDF and TXT files.
+
+    python -m benchmarks.corpus --out ./corpus --documents 200 [--pdf-ratio 0.5]
+"""
+import argparse
+import os
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from benchmarks.pdf_writer import build_pdf
+
+FIRST_NAMES = ["Amira", "Omar", "Lina", "Karim", "Sara", "Youssef", "Nour", "Hassan", "Mona", "Tarek"]
+LAST_NAMES = ["Haddad", "Mansour", "Khalil", "Saleh", "Fahmy", "Nasser", "Rizk", "Zaki", "Farouk", "Aziz"]
+SKILLS = [
+    "structural steel design", "reinforced concrete", "geotechnical surveys", "port construction",
+    "dredging operations", "project scheduling", "cost estimation", "HSE supervision",
+    "BIM coordination", "marine piling", "quantity surveying", "contract administration"
+]
+COMPANIES = ["Orascom", "Hassan Allam", "Arab Contractors", "Petrojet", "Redcon", "Elsewedy", "Concord"]
+CERT_PREFIXES = ["PMP", "NEBOSH", "CSWIP", "PRINCE2", "ISO9001", "AWS-SAA"]
+TITLES = ["site engineer", "project manager", "planning engineer", "QA/QC engineer", "quantity surveyor"]
+CITIES = ["Cairo", "Alexandria", "Port Said", "Suez", "Ain Sokhna", "Damietta"]
+DUTIES = [
+    "prepared method statements and reviewed shop drawings",
+    "coordinated subcontractors and tracked daily progress",
+    "ran inspections against the quality plan",
+    "reported weekly cost and schedule variance to the client",
+    "supervised crews of up to forty workers on night shifts",
+    "resolved design clashes with the consultant",
+]
+
+# Roughly 45 lines of 9 pt text fit on a page of the generated PDFs
+LINES_PER_PAGE = 45
+
+
+@dataclass
+class SyntheticDocument:
+    filename: str
+    kind: str  # resume or job
+    pages: List[str]
+    questions: List[str]
+    # Resumes: the structured fields the text was generated from
+    profile: Optional[Dict] = None
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.pages)
+
+
+def _paginate(lines: List[str]) -> List[str]:
+    return [
+        "\n".join(lines[i:i + LINES_PER_PAGE])
+        for i in range(0, len(lines), LINES_PER_PAGE)
+    ]
+
+
+def _resume(rng: random.Random, index: int) -> SyntheticDocument:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index}"
+    title = rng.choice(TITLES)
+    skills = rng.sample(SKILLS, 4)
+    cert = f"{rng.choice(CERT_PREFIXES)}-{rng.randrange(10000, 99999)}"
+    city = rng.choice(CITIES)
+    lines = [
+        f"{name}",
+        f"{title.title()} based in {city}.",
+        f"Core skills: {', '.join(skills)}.",
+        "",
+        "Experience",
+    ]
+    year = 2024
+    for _ in range(rng.randint(3, 8)):
+        span = rng.randint(1, 5)
+        company = rng.choice(COMPANIES)
+        lines.append(f"{year - span}-{year}: {title.title()} at {company}, {rng.choice(CITIES)}.")
+        for _ in range(rng.randint(3, 6)):
+            lines.append(f"Worked on {rng.choice(skills)} and {rng.choice(DUTIES)}.")
+        year -= span
+    lines += ["", "Certifications", f"{cert}. Languages: Arabic, English."]
+    questions = [
+        f"Which candidate holds certificate {cert}?",
+        f"Find a {title} experienced in {skills[0]} and {skills[1]}.",
+    ]
+    profile = {
+        "name": name,
+        "location": city,
+        "years_experience": 2024 - year,
+        "skills": skills,
+        "certification": cert.split("-")[0],
+    }
+    return SyntheticDocument(f"resume_{index:05d}", "resume", _paginate(lines), questions, profile)
+
+
+def _job(rng: random.Random, index: int) -> SyntheticDocument:
+    title = rng.choice(TITLES)
+    company = rng.choice(COMPANIES)
+    skills = rng.sample(SKILLS, 3)
+    reference = f"JOB-{index:05d}-{rng.randrange(1000, 9999)}"
+    lines = [
+        f"{company} is hiring a {title} ({reference}) in {rng.choice(CITIES)}.",
+        "",
+        "Responsibilities",
+    ]
+    lines += [f"The role {rng.choice(DUTIES)}." for _ in range(rng.randint(5, 12))]
+    lines += ["", "Requirements"]
+    lines += [f"At least {rng.randint(2, 15)} years of {skill}." for skill in skills]
+    questions = [
+        f"What are the requirements for job {reference}?",
+        f"Which openings at {company} need {skills[0]}?",
+    ]
+    return SyntheticDocument(f"job_{index:05d}", "job", _paginate(lines), questions)
+
+
+def generate(count: int, seed: int = 0, start: int = 0) -> List[SyntheticDocument]:
+    """``count`` documents, about four resumes per job description.
+
+    Indices start at ``start`` so separate calls yield distinct content.
+    """
+    rng = random.Random(seed * 1_000_003 + start)
+    return [
+        _job(rng, start + i) if rng.random() < 0.2 else _resume(rng, start + i)
+        for i in range(count)
+    ]
+
+
+def write_files(documents: List[SyntheticDocument], out_dir: str, pdf_ratio: float = 0.5, seed: int = 0) -> List[str]:
+    """Write each document as a PDF or a TXT file. Returns the paths in order."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for document in documents:
+        if rng.random() < pdf_ratio:
+            path = os.path.join(out_dir, f"{document.filename}.pdf")
+            data = build_pdf(document.pages)
+        else:
+            path = os.path.join(out_dir, f"{document.filename}.txt")
+            data = document.text.encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic resume and job description corpus")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--pdf-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = write_files(generate(args.documents, args.seed), args.out, args.pdf_ratio, args.seed)
+    size = sum(os.path.getsize(path) for path in paths)
+    print(f"Wrote {len(paths)} files ({size / 2 ** 20:.1f} MiB) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import time
+
+from app.config import Settings
+from benchmarks.fakes import FakeEmbeddingService
+
+
+def _run(label: str, settings: Settings, texts, call_latency: float) -> float:
+    service = FakeEmbeddingService(settings, call_latency=call_latency)
+    start = time.perf_counter()
+    embeddings = service.generate_embeddings_batch(texts)
+    elapsed = time.perf_counter() - start
+    service.close()
+    assert len(embeddings) == len(texts)
+    print(f"{label:<34} {elapsed:8.3f} s  upstream calls={service.calls}")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serial vs batched embedding against a fake embedder")
+    parser.add_argument("--chunks", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per upstream call")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    texts = [f"Chunk {i}: experience in marine construction and port facilities." for i in range(args.chunks)]
+
+    serial = _run(
+        "serial (batch=1, concurrency=1)",
+        Settings(embedding_batch_size=1, embedding_max_concurrency=1, embedding_cache_enabled=False),
+        texts,
+        args.latency
+    )
+    batched = _run(
+        f"batched (batch={args.batch_size}, concurrency={args.concurrency})",
+        Settings(
+            embedding_batch_size=args.batch_size,
+            embedding_max_concurrency=args.concurrency,
+            embedding_cache_enabled=False
+        ),
+        texts,
+        args.latency
+    )
+    print(f"speed-up: {serial / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
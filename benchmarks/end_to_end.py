@@ -0,0 +1,442 @@
+"""Offline end-to-end benchmark: ingestion and queries through the FastAPI app.
+
+Gemini is replaced by the deterministic fakes in ``benchmarks.fakes``, so runs
+are free, repeatable and need no API key. Each scenario reports throughput,
+latency percentiles and the time spent in every pipeline stage, and
+``--output`` writes everything as JSON for comparison between commits:
+
+    python -m benchmarks.end_to_end --documents 100 --output before.json
+    python -m benchmarks.end_to_end --documents 100 --compare before.json
+"""
+import argparse
+import asyncio
+import functools
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+import zipfile
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+import httpx
+import numpy as np
+
+from app.config import Settings
+from app.main import app
+from app.services.container import ServiceContainer
+from app.services.document_service import RETRIEVAL_MODES, DocumentService
+from app.services.gemini_governor import GeminiGovernor
+from benchmarks import corpus
+from benchmarks.fakes import FakeEmbeddingService, FakeLLMService
+
+SCENARIOS = ("single", "bulk", "archive", "query")
+FINISHED_JOB_STATES = {"completed", "completed_with_errors", "failed"}
+
+
+class StageTimer:
+    """Wall time per pipeline stage, summed over calls and threads.
+
+    Stages nest (chunking pulls pages from extraction), so each stage is
+    charged only its own time, not that of the stages it calls.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._seconds: Dict[str, float] = defaultdict(float)
+        self._calls: Dict[str, int] = defaultdict(int)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._seconds.clear()
+            self._calls.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {"seconds": round(seconds, 4), "calls": self._calls[stage]}
+                for stage, seconds in sorted(self._seconds.items())
+            }
+
+    def _measure(self, stage: str, calls: int, fn: Callable, *args, **kwargs):
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self._seconds[stage] += elapsed - children
+                self._calls[stage] += calls
+
+    def wrap(self, stage: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            return self._measure(stage, 1, fn, *args, **kwargs)
+        return timed
+
+    def wrap_async(self, stage: str, fn: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        # Other coroutines run on the thread during the awaits, so an async
+        # stage is timed whole and kept out of the nesting stack
+        @functools.wraps(fn)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._seconds[stage] += time.perf_counter() - start
+                    self._calls[stage] += 1
+        return timed
+
+    def wrap_iter(self, stage: str, fn: Callable[..., Iterable]) -> Callable[..., Iterator]:
+        # Generators do their work in next(), so that is what gets timed
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            iterator = iter(fn(*args, **kwargs))
+            calls = 1
+            while True:
+                try:
+                    item = self._measure(stage, calls, next, iterator)
+                except StopIteration:
+                    return
+                calls = 0
+                yield item
+        return timed
+
+
+def instrument(service: DocumentService, timer: StageTimer) -> None:
+    """Route the service's pipeline steps through ``timer``."""
+    service.text_extractor.iter_pages = timer.wrap_iter("extract", service.text_extractor.iter_pages)
+    service.chunker.chunk_pages = timer.wrap_iter("chunk", service.chunker.chunk_pages)
+
+    embedding_service = service.embedding_service
+    for name in ("generate_embeddings_batch", "generate_query_embedding", "generate_query_embeddings"):
+        setattr(embedding_service, name, timer.wrap("embed", getattr(embedding_service, name)))
+
+    vector_store = service.vector_store
+    for name in ("add_chunks", "register_document"):
+        setattr(vector_store, name, timer.wrap("store", getattr(vector_store, name)))
+
+    service._retrieve = timer.wrap("retrieve", service._retrieve)
+    service._retrieve_many = timer.wrap("retrieve", service._retrieve_many)
+    service._pack_context = timer.wrap("pack", service._pack_context)
+    service.llm_service.generate_answer = timer.wrap("generate", service.llm_service.generate_answer)
+    # /documents/query takes the async path
+    embedding_service.generate_query_embedding_async = timer.wrap_async(
+        "embed", embedding_service.generate_query_embedding_async
+    )
+    service.llm_service.generate_answer_async = timer.wrap_async("generate", service.llm_service.generate_answer_async)
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "mean": round(float(np.mean(values)), 2),
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2),
+        "max": round(float(np.max(values)), 2),
+    }
+
+
+def _media_type(path: str) -> str:
+    return "application/pdf" if path.endswith(".pdf") else "text/plain"
+
+
+def _ingest_result(files: List[Dict], wall: float, latencies: Optional[List[float]] = None) -> Dict:
+    completed = [f for f in files if f["status"] == "completed"]
+    chunks = sum(f.get("chunks_created") or 0 for f in completed)
+    result = {
+        "documents": len(completed),
+        "failed": len(files) - len(completed),
+        "chunks": chunks,
+        "wall_seconds": round(wall, 3),
+        "docs_per_sec": round(len(completed) / wall, 2) if wall else 0.0,
+        "chunks_per_sec": round(chunks / wall, 2) if wall else 0.0,
+    }
+    if latencies is not None:
+        result["latency_ms"] = _percentiles(latencies)
+    return result
+
+
+async def _wait_for_job(client: httpx.AsyncClient, job_id: str, poll_interval: float = 0.01) -> Dict:
+    while True:
+        response = await client.get(f"/jobs/{job_id}")
+        response.raise_for_status()
+        job = response.json()
+        if job["status"] in FINISHED_JOB_STATES:
+            return job
+        await asyncio.sleep(poll_interval)
+
+
+async def run_single(client: httpx.AsyncClient, paths: List[str]) -> Dict:
+    """Upload files one at a time, each waited on until its job finishes."""
+    files, latencies = [], []
+    start = time.perf_counter()
+    for path in paths:
+        upload_start = time.perf_counter()
+        with open(path, "rb") as f:
+            response = await client.post(
+                "/documents/upload",
+                files={"file": (os.path.basename(path), f.read(), _media_type(path))}
+            )
+        response.raise_for_status()
+        job = await _wait_for_job(client, response.json()["job_id"])
+        latencies.append((time.perf_counter() - upload_start) * 1000)
+        files.extend(job["files"])
+    return _ingest_result(files, time.perf_counter() - start, latencies)
+
+
+async def run_bulk(client: httpx.AsyncClient, paths: List[str]) -> Dict:
+    """All files in one bulk upload job."""
+    uploads = []
+    for path in paths:
+        with open(path, "rb") as f:
+            uploads.append(("files", (os.path.basename(path), f.read(), _media_type(path))))
+
+    start = time.perf_counter()
+    response = await client.post("/documents/bulk_upload", files=uploads)
+    response.raise_for_status()
+    job = await _wait_for_job(client, response.json()["job_id"])
+    return _ingest_result(job["files"], time.perf_counter() - start)
+
+
+async def run_archive(client: httpx.AsyncClient, paths: List[str]) -> Dict:
+    """All files zipped into one archive, ingested by the streaming archive path."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for path in paths:
+            archive.write(path, os.path.basename(path))
+
+    start = time.perf_counter()
+    response = await client.post(
+        "/documents/upload",
+        params={"stream": "true"},
+        files={"file": ("corpus.zip", buffer.getvalue(), "application/zip")}
+    )
+    response.raise_for_status()
+    files = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+    return _ingest_result(files, time.perf_counter() - start)
+
+
+async def run_queries(
+    client: httpx.AsyncClient,
+    questions: List[str],
+    concurrency: int,
+    retrieval_mode: Optional[str]
+) -> Dict:
+    """Send ``questions`` to /documents/query with up to ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def ask(question: str) -> None:
+        nonlocal errors
+        async with semaphore:
+            query_start = time.perf_counter()
+            response = await client.post(
+                "/documents/query",
+                json={"question": question, "retrieval_mode": retrieval_mode}
+            )
+            if response.status_code != 200:
+                errors += 1
+                return
+            latencies.append((time.perf_counter() - query_start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ask(question) for question in questions))
+    wall = time.perf_counter() - start
+    return {
+        "queries": len(questions),
+        "errors": errors,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "queries_per_sec": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_ms": _percentiles(latencies),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+        return commit + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _run(args: argparse.Namespace, data_dir: str, timer: StageTimer) -> Dict[str, Dict]:
+    results: Dict[str, Dict] = {}
+    # Each ingest scenario gets its own documents; repeats would be skipped as duplicates
+    batches = {
+        name: corpus.generate(args.documents, args.seed, start=i * args.documents)
+        for i, name in enumerate(("single", "bulk", "archive"))
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        runners = {"single": run_single, "bulk": run_bulk, "archive": run_archive}
+        for name, runner in runners.items():
+            if name not in args.scenarios:
+                continue
+            paths = corpus.write_files(batches[name], os.path.join(data_dir, name), args.pdf_ratio, args.seed)
+            timer.reset()
+            results[name] = await runner(client, paths)
+            results[name]["stages"] = timer.snapshot()
+
+        if "query" in args.scenarios:
+            if not any(name in results for name in runners):
+                # Queries need something to search
+                paths = corpus.write_files(batches["bulk"], os.path.join(data_dir, "query"), args.pdf_ratio, args.seed)
+                await run_bulk(client, paths)
+            questions = [q for batch in batches.values() for document in batch for q in document.questions]
+            rng = np.random.default_rng(args.seed)
+            questions = [questions[i] for i in rng.integers(0, len(questions), args.queries)]
+
+            timer.reset()
+            results["query"] = await run_queries(client, questions, args.concurrency, args.retrieval_mode)
+            results["query"]["stages"] = timer.snapshot()
+    return results
+
+
+def _print_results(results: Dict[str, Dict]) -> None:
+    for name, result in results.items():
+        if "docs_per_sec" in result:
+            summary = (
+                f"{result['documents']} docs ({result['failed']} failed), {result['chunks']} chunks, "
+                f"{result['docs_per_sec']} docs/s, {result['chunks_per_sec']} chunks/s"
+            )
+        else:
+            summary = f"{result['queries']} queries ({result['errors']} failed), {result['queries_per_sec']} q/s"
+        print(f"\n[{name}] {summary} in {result['wall_seconds']} s")
+
+        latency = result.get("latency_ms")
+        if latency:
+            print(f"  latency ms: p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} max={latency['max']}")
+        for stage, timing in result["stages"].items():
+            print(f"  {stage:<10} {timing['seconds']:9.3f} s  {timing['calls']:7d} calls")
+
+
+def _compare(results: Dict[str, Dict], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')})")
+    metrics = [
+        ("docs_per_sec", None), ("chunks_per_sec", None), ("queries_per_sec", None),
+        ("latency_ms", "p50"), ("latency_ms", "p95"), ("latency_ms", "p99"),
+    ]
+    for name, result in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for key, sub in metrics:
+            new, old = result.get(key), previous.get(key)
+            if sub is not None:
+                new, old = (new or {}).get(sub), (old or {}).get(sub)
+            if new is None or not old:
+                continue
+            label = f"{key}.{sub}" if sub else key
+            print(f"  {name:<8} {label:<16} {old:10.2f} -> {new:10.2f}  ({(new - old) / old * 100:+.1f}%)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline end-to-end ingestion and query benchmark")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--documents", type=int, default=50, help="Documents per ingest scenario")
+    parser.add_argument("--pdf-ratio", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="Queries in flight at once")
+    parser.add_argument("--retrieval-mode", choices=RETRIEVAL_MODES)
+    parser.add_argument("--vector-backend", choices=["chroma", "numpy"], default="chroma")
+    parser.add_argument("--chunk-size", type=int, default=600)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--embedding-batch-size", type=int, default=100)
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Simulated seconds per embedding call")
+    parser.add_argument("--embed-item-latency", type=float, default=0.0005, help="Extra seconds per embedded text")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Simulated seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Simulated seconds per generated token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake API calls that fail")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Print changes against an earlier --output file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        settings = Settings(
+            chromadb_path=os.path.join(data_dir, "chroma"),
+            numpy_index_path=os.path.join(data_dir, "vectors"),
+            vector_backend=args.vector_backend,
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            top_k=args.top_k,
+            embedding_batch_size=args.embedding_batch_size,
+            embedding_retry_base_delay=0.01,
+            embedding_cache_enabled=False,
+            answer_cache_enabled=False,
+            warm_up_on_startup=False
+        )
+        governor = GeminiGovernor(settings)
+        service = DocumentService(
+            settings,
+            embedding_service=FakeEmbeddingService(
+                settings,
+                governor=governor,
+                call_latency=args.embed_latency,
+                item_latency=args.embed_item_latency,
+                error_rate=args.error_rate,
+                seed=args.seed
+            ),
+            llm_service=FakeLLMService(
+                settings,
+                governor=governor,
+                latency=args.llm_latency,
+                token_latency=args.token_latency,
+                error_rate=args.error_rate,
+                seed=args.seed
+            )
+        )
+        timer = StageTimer()
+        instrument(service, timer)
+
+        # The app reuses a container installed before it starts
+        container = ServiceContainer(settings, service)
+        app.state.container = container
+        try:
+            results = asyncio.run(_run(args, data_dir, timer))
+        finally:
+            container.shutdown()
+            app.state.container = None
+
+    report = {
+        "commit": _git_commit(),
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+        "scenarios": results,
+    }
+    _print_results(results)
+    if args.compare:
+        _compare(results, args.compare)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+from google.api_core import exceptions as google_exceptions
+
+from app.config import Settings
+from app.services.embedding_service import EmbeddingService
+from app.services.gemini_governor import GeminiGovernor
+from app.services.llm_service import LLMService
+from app.services.profile_extractor import PROFILE_PROMPT, RuleBasedProfileExtractor
+
+
+def fake_vector(text: str, dimension: int) -> List[float]:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimension)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def bag_of_words_vector(text: str, dimension: int) -> List[float]:
+    # Sum of per-word random vectors: texts sharing words land close together,
+    # which gives retrieval benchmarks a crude but deterministic notion of meaning
+    vector = np.zeros(dimension)
+    for word in re.findall(r"\w+", text.lower()):
+        vector += _word_vector(word, dimension)
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+@lru_cache(maxsize=65536)
+def _word_vector(word: str, dimension: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(word.encode("utf-8")).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(dimension)
+
+
+class FakeEmbeddingService(EmbeddingService):
+    def __init__(
+        self,
+        settings: Settings,
+        dimension: int = 768,
+        call_latency: float = 0.2,
+        item_latency: float = 0.001,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        bag_of_words: bool = False,
+        governor: Optional[GeminiGovernor] = None
+    ):
+        super().__init__(settings, governor)
+        self.dimension = dimension
+        self.bag_of_words = bag_of_words
+        self.call_latency = call_latency
+        self.item_latency = item_latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def warm_up(self) -> None:
+        pass
+
+    def _start(self) -> bool:
+        with self._lock:
+            self.calls += 1
+            return self._random.random() < self.error_rate
+
+    def _vectors(self, texts: List[str], task_type: str, fail: bool) -> List[List[float]]:
+        if fail:
+            raise google_exceptions.ResourceExhausted("fake rate limit")
+        if self.bag_of_words:
+            return [bag_of_words_vector(text, self.dimension) for text in texts]
+        return [fake_vector(f"{task_type}:{text}", self.dimension) for text in texts]
+
+    def _embed_contents(self, texts: List[str], task_type: str) -> List[List[float]]:
+        fail = self._start()
+        time.sleep(self.call_latency + self.item_latency * len(texts))
+        return self._vectors(texts, task_type, fail)
+
+    async def _embed_contents_async(self, texts: List[str], task_type: str) -> List[List[float]]:
+        fail = self._start()
+        await asyncio.sleep(self.call_latency + self.item_latency * len(texts))
+        return self._vectors(texts, task_type, fail)
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+_PROFILE_PREFIX = PROFILE_PROMPT.split("{", 1)[0]
+
+
+def fake_profile_reply(prompt: str) -> str:
+    # What a well-behaved model would answer: the rule-based profile as
+    # fenced JSON, so the LLM extractor's prompt and parsing run offline
+    text = prompt.split("\nCV:\n", 1)[-1]
+    profile = RuleBasedProfileExtractor().extract("fake", text)
+    data = {
+        "name": profile.name,
+        "years_experience": profile.years_experience,
+        "location": profile.location,
+        "sectors": profile.sectors,
+        "skills": profile.skills,
+        "certifications": profile.certifications,
+    }
+    return "```json\n" + json.dumps(data, indent=2) + "\n```"
+
+
+class FakeGenerativeModel:
+    def __init__(self, latency: float = 1.0, token_latency: float = 0.02, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.model_name = "models/fake-generation"
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"Based on the provided context, the best matching candidate is ref-{digest}."
+
+    def _start(self) -> None:
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.error_rate
+        if fail:
+            raise google_exceptions.ResourceExhausted("fake rate limit")
+
+    def _reply(self, prompt: str) -> str:
+        return fake_profile_reply(prompt) if prompt.startswith(_PROFILE_PREFIX) else self._answer(prompt)
+
+    def _stream(self, prompt: str):
+        time.sleep(self.latency)
+        for word in self._answer(prompt).split(" "):
+            time.sleep(self.token_latency)
+            yield FakeResponse(word + " ")
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        self._start()
+        if stream:
+            return self._stream(prompt)
+        answer = self._reply(prompt)
+        time.sleep(self.latency + self.token_latency * len(answer.split(" ")))
+        return FakeResponse(answer)
+
+    async def generate_content_async(self, prompt: str):
+        self._start()
+        answer = self._reply(prompt)
+        await asyncio.sleep(self.latency + self.token_latency * len(answer.split(" ")))
+        return FakeResponse(answer)
+
+
+class FakeLLMService(LLMService):
+    def __init__(self, settings: Settings, governor: Optional[GeminiGovernor] = None, **model_options):
+        super().__init__(settings, governor)
+        self.model = FakeGenerativeModel(**model_options)
+
+    def warm_up(self) -> None:
+        pass
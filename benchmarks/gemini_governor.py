@@ -0,0 +1,239 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from google.api_core import exceptions as google_exceptions
+
+from app.config import Settings
+from app.services.document_service import DocumentService
+from app.services.gemini_governor import GeminiGovernor, GeminiUnavailableError
+from app.utils.chunker import Chunk
+from app.utils.hashing import sha256_text
+from benchmarks.corpus import COMPANIES, FIRST_NAMES, LAST_NAMES, SKILLS
+from benchmarks.fakes import FakeEmbeddingService, FakeGenerativeModel, FakeLLMService
+
+
+class Quota:
+    """Gemini's per-project rate limit: calls past ``per_second`` in any second get a 429."""
+
+    def __init__(self, per_second: int):
+        self.per_second = per_second
+        self.rejected = 0
+        self._calls: deque = deque()
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and self._calls[0] <= now - 1.0:
+                self._calls.popleft()
+            if len(self._calls) >= self.per_second:
+                self.rejected += 1
+                raise google_exceptions.ResourceExhausted("fake quota exceeded")
+            self._calls.append(now)
+
+
+class QuotaEmbeddingService(FakeEmbeddingService):
+    def __init__(self, settings: Settings, quota: Quota, **options):
+        super().__init__(settings, **options)
+        self.quota = quota
+        self.outage = False
+        self.attempts = 0
+
+    def _embed_contents(self, texts: List[str], task_type: str) -> List[List[float]]:
+        self.attempts += 1
+        if self.outage:
+            time.sleep(self.call_latency)
+            raise google_exceptions.ServiceUnavailable("fake outage")
+        self.quota.check()
+        return super()._embed_contents(texts, task_type)
+
+
+class QuotaModel(FakeGenerativeModel):
+    def __init__(self, quota: Quota, **options):
+        super().__init__(**options)
+        self.quota = quota
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        self.quota.check()
+        return super().generate_content(prompt, stream)
+
+
+def _documents(rng: random.Random, count: int, chunks: int) -> List[List[Chunk]]:
+    documents = []
+    for i in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        documents.append([
+            Chunk(f"{name} worked at {rng.choice(COMPANIES)} on {rng.choice(SKILLS)} ({j}).", 1)
+            for j in range(chunks)
+        ])
+    return documents
+
+
+def _service(data_dir: str, quota: Quota, args, **governor_settings) -> DocumentService:
+    settings = Settings(
+        chromadb_path=os.path.join(data_dir, "chroma"),
+        embedding_cache_enabled=False,
+        answer_cache_enabled=False,
+        profile_extractor="none",
+        retrieval_mode="vector",
+        embedding_batch_size=args.batch_size,
+        embedding_retry_base_delay=0.1,
+        embedding_retry_max_delay=2.0,
+        **governor_settings
+    )
+    governor = GeminiGovernor(settings)
+    embedding_service = QuotaEmbeddingService(
+        settings, quota, call_latency=args.embed_latency, item_latency=0.0, governor=governor
+    )
+    llm_service = FakeLLMService(settings, governor=governor)
+    llm_service.model = QuotaModel(quota, latency=args.llm_latency, token_latency=0.0)
+    return DocumentService(settings, embedding_service=embedding_service, llm_service=llm_service)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def mixed_load(label: str, args, **governor_settings) -> None:
+    """Bulk ingest in the background while questions arrive at a steady rate."""
+    rng = random.Random(args.seed)
+    documents = _documents(rng, args.documents, args.chunks)
+    quota = Quota(args.quota)
+    with tempfile.TemporaryDirectory() as data_dir:
+        service = _service(data_dir, quota, args, **governor_settings)
+        failed_ingests: List[str] = []
+        finished: List[float] = []
+
+        def ingest(chunks: List[Chunk]) -> None:
+            try:
+                service.process_chunks(chunks, sha256_text("".join(c.text for c in chunks)))
+            except RuntimeError as e:
+                failed_ingests.append(str(e))
+            finished.append(time.perf_counter())
+
+        start = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=args.ingest_workers)
+        futures = [pool.submit(ingest, chunks) for chunks in documents]
+
+        latencies: List[float] = []
+        outcomes: Dict[str, int] = {"ok": 0, "503": 0, "500": 0}
+        for i in range(args.queries):
+            time.sleep(1.0 / args.query_rate)
+            question = f"Who has worked on {rng.choice(SKILLS)} at {rng.choice(COMPANIES)}? ({i})"
+            query_start = time.perf_counter()
+            try:
+                service.query_documents(question)
+                outcomes["ok"] += 1
+                latencies.append((time.perf_counter() - query_start) * 1000)
+            except GeminiUnavailableError:
+                outcomes["503"] += 1
+            except RuntimeError:
+                outcomes["500"] += 1
+        for future in futures:
+            future.result()
+        ingest_seconds = max(finished) - start
+        pool.shutdown()
+
+        stats = service.governor.stats()
+        p50 = statistics.median(latencies) if latencies else 0.0
+        p95 = _percentile(latencies, 0.95) if latencies else 0.0
+        print(
+            f"{label:<12} {outcomes['ok']:>6} {outcomes['503']:>5} {outcomes['500']:>5} {p50:8.0f} {p95:8.0f} "
+            f"{ingest_seconds:9.1f} {len(failed_ingests):>7} {quota.rejected:>6} "
+            f"{stats['budgets']['ingest']['max_wait_ms'] / 1000:9.1f}"
+        )
+        service.close()
+
+
+def coalescing(args) -> None:
+    """Identical questions arriving together: upstream calls with and without single-flight."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        service = _service(data_dir, Quota(10 ** 6), args)
+        service.process_chunks(_documents(random.Random(args.seed), 1, 10)[0], "doc")
+        embedding_calls = service.embedding_service.calls
+        generation_calls = service.llm_service.model.calls
+        with ThreadPoolExecutor(max_workers=args.duplicates) as pool:
+            list(pool.map(lambda _: service.query_documents("Who knows port construction?"), range(args.duplicates)))
+        print(
+            f"\n{args.duplicates} identical questions at once: "
+            f"{service.embedding_service.calls - embedding_calls} embedding and "
+            f"{service.llm_service.model.calls - generation_calls} generation calls upstream, "
+            f"coalesced {service.governor.stats()['coalesced']}"
+        )
+        service.close()
+
+
+def outage(args) -> None:
+    """Gemini down: how long queries take to fail, with and without the circuit breaker."""
+    print(f"\nOutage: {args.queries // 4} queries against a failing embedding API")
+    for label, threshold in (("no breaker", 10 ** 9), ("breaker", 5)):
+        with tempfile.TemporaryDirectory() as data_dir:
+            service = _service(
+                data_dir, Quota(10 ** 6), args,
+                gemini_breaker_failure_threshold=threshold,
+                gemini_breaker_reset_seconds=60
+            )
+            service.embedding_service.outage = True
+            timings = []
+            for i in range(args.queries // 4):
+                start = time.perf_counter()
+                try:
+                    service.query_documents(f"question {i}")
+                except RuntimeError:
+                    pass
+                timings.append((time.perf_counter() - start) * 1000)
+            print(
+                f"  {label:<11} total {sum(timings) / 1000:6.1f} s, p50 {statistics.median(timings):7.1f} ms, "
+                f"upstream calls {service.embedding_service.attempts}"
+            )
+            service.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gemini governor: queries during a bulk ingest, coalescing and an outage")
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--chunks", type=int, default=20, help="Chunks per document")
+    parser.add_argument("--batch-size", type=int, default=5, help="Chunks per embedding call")
+    parser.add_argument("--ingest-workers", type=int, default=8)
+    parser.add_argument("--quota", type=int, default=40, help="Upstream calls allowed per second")
+    parser.add_argument("--queries", type=int, default=80)
+    parser.add_argument("--query-rate", type=float, default=4.0, help="Questions per second")
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--duplicates", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Two calls per question (embedding, answer); ingest gets the rest of the quota
+    interactive = args.query_rate * 2 * 1.5
+    budgets = {
+        "gemini_interactive_requests_per_minute": interactive * 60,
+        "gemini_ingest_requests_per_minute": max(1.0, args.quota - interactive) * 0.9 * 60,
+        "gemini_interactive_burst": 5,
+        "gemini_ingest_burst": 5,
+    }
+    print(
+        f"{args.documents} documents x {args.chunks} chunks ingested by {args.ingest_workers} workers while "
+        f"{args.queries} questions arrive at {args.query_rate}/s; upstream quota {args.quota} calls/s"
+    )
+    print(
+        f"{'governor':<12} {'ok':>6} {'503':>5} {'500':>5} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'ingest s':>9} {'failed':>7} {'429s':>6} {'ingest wait s':>9}"
+    )
+    mixed_load("off", args, gemini_max_concurrency=1000, gemini_breaker_failure_threshold=10 ** 9)
+    mixed_load("budgets", args, **budgets)
+    coalescing(args)
+    outage(args)
+
+
+if __name__ == "__main__":
+    main()
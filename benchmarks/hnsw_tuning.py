@@ -0,0 +1,135 @@
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from typing import List
+
+import numpy as np
+
+from app.config import Settings
+from app.services.vector_backends import create_backend
+from app.services.vector_backends.base import HnswParams
+from app.tools.tune_hnsw import print_header, print_result, sweep
+
+
+def _corpus(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    # Chunk embeddings cluster by topic; uniform random vectors would make
+    # every index look equally bad
+    centres = rng.standard_normal((max(1, count // 50), dim))
+    vectors = centres[rng.integers(0, len(centres), count)] + 0.6 * rng.standard_normal((count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def online_reindex(vectors: np.ndarray, params: HnswParams, k: int, writes: int) -> None:
+    """Search and write continuously while the collection is rebuilt, then check nothing was lost."""
+    with tempfile.TemporaryDirectory() as root:
+        backend = create_backend(Settings(vector_backend="chroma", chromadb_path=root))
+        base = len(vectors) - writes
+        ids = [f"doc-{i // 10}_chunk_{i % 10}" for i in range(len(vectors))]
+        for offset in range(0, base, 1000):
+            end = min(base, offset + 1000)
+            backend.upsert(
+                ids[offset:end], vectors[offset:end].tolist(), [f"chunk {i}" for i in range(offset, end)],
+                [{"document_id": chunk_id.rsplit("_chunk_", 1)[0]} for chunk_id in ids[offset:end]]
+            )
+        backend.warm_up()
+
+        stop = threading.Event()
+        latencies = {"before": [], "during": [], "after": []}
+        errors: List[str] = []
+        phase = ["before"]
+        swapped_at: List[float] = []
+
+        def search() -> None:
+            rng = np.random.default_rng(1)
+            while not stop.is_set():
+                query = vectors[rng.integers(0, base)].tolist()
+                start = time.perf_counter()
+                try:
+                    backend.query(query, k)
+                except Exception as e:
+                    errors.append(repr(e))
+                latencies[phase[0]].append((time.perf_counter() - start) * 1000)
+                if phase[0] == "during" and not swapped_at and backend.index_params() == params:
+                    swapped_at.append(time.perf_counter())
+
+        # Chunks added and documents deleted while the copy runs
+        deleted = [f"doc-{i}" for i in range(0, base // 10, 7)]
+
+        def write() -> None:
+            for i, offset in enumerate(range(base, len(vectors), 100)):
+                end = min(len(vectors), offset + 100)
+                backend.upsert(
+                    ids[offset:end], vectors[offset:end].tolist(), [f"chunk {j}" for j in range(offset, end)],
+                    [{"document_id": chunk_id.rsplit("_chunk_", 1)[0]} for chunk_id in ids[offset:end]]
+                )
+                if i < len(deleted):
+                    backend.delete_documents([deleted[i]])
+                time.sleep(0.01)
+            backend.delete_documents(deleted[len(range(base, len(vectors), 100)):])
+
+        searcher = threading.Thread(target=search)
+        searcher.start()
+        time.sleep(1.0)
+        phase[0] = "during"
+        writer = threading.Thread(target=write)
+        start = time.perf_counter()
+        writer.start()
+        backend.reindex(params, batch_size=1000)
+        writer.join()
+        phase[0] = "after"
+        time.sleep(1.0)
+        stop.set()
+        searcher.join()
+
+        expected = len(vectors) - 10 * len(deleted)
+        survivors = backend.get_texts([f"{document_id}_chunk_0" for document_id in deleted])
+        print(f"\nOnline reindex of {base} chunks to {params}, {writes} chunks written meanwhile")
+        print(f"  swapped in after {swapped_at[0] - start:.1f} s" if swapped_at else "  swap not observed")
+        print(f"{'phase':<8} {'searches':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, values in latencies.items():
+            if values:
+                print(f"{name:<8} {len(values):>9} {statistics.median(values):8.2f} {_percentile(values, 0.95):8.2f}")
+        print(f"  failed searches: {len(errors)}{' (' + errors[0] + ')' if errors else ''}")
+        print(
+            f"  chunks after: {backend.count()} (expected {expected}), "
+            f"deleted documents still present: {len(survivors)}, index now {backend.index_params()}"
+        )
+        backend.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HNSW recall/latency sweep and an online reindex under load")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--reindex-vectors", type=int, default=10000, help="Collection size for the online reindex")
+    parser.add_argument("--reindex-writes", type=int, default=1000, help="Chunks written during the reindex")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = _corpus(rng, args.vectors + args.queries, args.dim)
+    queries, indexed = vectors[:args.queries], vectors[args.queries:]
+    print(f"{len(indexed)} vectors x {args.dim} dims, {args.queries} queries, k={args.k}")
+    print_header(args.k)
+    for result in sweep(indexed, queries, args.k, args.m, args.construction_ef, args.search_ef):
+        print_result(result)
+
+    online_reindex(
+        vectors[:args.reindex_vectors + args.reindex_writes], HnswParams(32, 200, 100), args.k, args.reindex_writes
+    )
+
+
+if __name__ == "__main__":
+    main()
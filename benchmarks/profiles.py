@@ -0,0 +1,120 @@
+import argparse
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+from dataclasses import replace
+from typing import Dict, List
+
+from app.config import Settings
+from app.services.profile_extractor import SECTORS, LLMProfileExtractor, RuleBasedProfileExtractor
+from app.services.profile_store import ProfileFilter, ProfileStore
+from benchmarks.corpus import generate
+from benchmarks.fakes import FakeGenerativeModel
+
+
+def _compact(term: str) -> str:
+    # "ISO9001" and "ISO 9001" name the same certification
+    return re.sub(r"[\s-]", "", term.lower())
+
+
+def _accuracy(extractor, resumes, max_chars: int) -> Dict[str, float]:
+    """Share of resumes whose extracted field matches the generated one, and throughput."""
+    hits = {"name": 0, "location": 0, "years": 0, "skills": 0, "certification": 0}
+    start = time.perf_counter()
+    for doc in resumes:
+        truth = doc.profile
+        profile = extractor.extract(doc.filename, doc.text[:max_chars])
+        hits["name"] += profile.name == truth["name"]
+        hits["location"] += profile.location == truth["location"]
+        hits["years"] += profile.years_experience == truth["years_experience"]
+        hits["skills"] += all(skill.lower() in profile.skills for skill in truth["skills"])
+        hits["certification"] += _compact(truth["certification"]) in {_compact(c) for c in profile.certifications}
+    elapsed = time.perf_counter() - start
+    result = {field: count / len(resumes) for field, count in hits.items()}
+    result["docs_per_s"] = len(resumes) / elapsed
+    return result
+
+
+def _filters(rng: random.Random, skills: List[str], cities: List[str]) -> List[ProfileFilter]:
+    sectors = list(SECTORS)
+    return [
+        ProfileFilter(min_years_experience=rng.choice([3, 5, 10])),
+        ProfileFilter(sectors=[rng.choice(sectors)], min_sector_years=rng.choice([2, 5])),
+        ProfileFilter(skills=rng.sample(skills, 2), min_years_experience=5),
+        ProfileFilter(certifications=["PMP"], location=rng.choice(cities)),
+        ProfileFilter(sectors=rng.sample(sectors, 2), skills=[rng.choice(skills)]),
+    ]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Candidate profiles: extraction accuracy and filter query latency")
+    parser.add_argument("--documents", type=int, default=500, help="Synthetic documents for the accuracy check")
+    parser.add_argument("--llm-documents", type=int, default=50, help="Resumes sent to the fake model")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds per fake model call")
+    parser.add_argument("--profiles", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings = Settings()
+    resumes = [doc for doc in generate(args.documents, seed=args.seed) if doc.kind == "resume"]
+    extractors = {
+        "rules": (RuleBasedProfileExtractor(), resumes),
+        "llm (fake)": (
+            LLMProfileExtractor(FakeGenerativeModel(latency=args.llm_latency, token_latency=0.0)),
+            resumes[:args.llm_documents]
+        ),
+    }
+    print(f"Extraction accuracy on {len(resumes)} synthetic resumes")
+    fields = ["name", "location", "years", "skills", "certification"]
+    print(f"{'extractor':<12}" + "".join(f"{field:>14}" for field in fields) + f"{'docs/s':>10}")
+    for name, (extractor, docs) in extractors.items():
+        result = _accuracy(extractor, docs, settings.profile_max_chars)
+        print(f"{name:<12}" + "".join(f"{result[field]:14.2%}" for field in fields) + f"{result['docs_per_s']:10.0f}")
+
+    # The store is filled with copies of the extracted profiles under new ids,
+    # so the filters see realistic value distributions at every size
+    rules = RuleBasedProfileExtractor()
+    templates = [rules.extract(doc.filename, doc.text) for doc in resumes]
+    skills = sorted({skill for p in templates for skill in p.skills})
+    cities = sorted({p.location for p in templates if p.location})
+    rng = random.Random(args.seed)
+
+    print(f"\nFilter query latency ({args.queries} queries, limit 50)")
+    print(f"{'profiles':>10} {'upsert/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'mean hits':>10}")
+    for size in args.profiles:
+        with tempfile.TemporaryDirectory() as root:
+            store = ProfileStore(os.path.join(root, "profiles.sqlite3"))
+            start = time.perf_counter()
+            for offset in range(0, size, 1000):
+                batch = []
+                for i in range(offset, min(size, offset + 1000)):
+                    template = templates[i % len(templates)]
+                    batch.append(replace(template, document_id=f"doc-{i}"))
+                store.upsert(batch)
+            upsert_rate = size / (time.perf_counter() - start)
+
+            timings, hits = [], []
+            for _ in range(args.queries // 5):
+                for filters in _filters(rng, skills, cities):
+                    start = time.perf_counter()
+                    _, total = store.search(filters, limit=50)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    hits.append(total)
+            store.close()
+        print(
+            f"{size:>10} {upsert_rate:10.0f} {statistics.median(timings):8.2f} "
+            f"{_percentile(timings, 0.95):8.2f} {statistics.mean(hits):10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
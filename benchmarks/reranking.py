@@ -0,0 +1,129 @@
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.config import Settings
+from app.services.vector_backends import VECTOR_BACKENDS, create_backend
+from app.utils.reranker import ResultReranker
+
+RERANKERS = {
+    "mmr": {"diversity": "mmr"},
+    "group": {"group_by_document": True},
+    "mmr+group": {"diversity": "mmr", "group_by_document": True, "chunks_per_document": 2},
+}
+
+
+def _corpus(rng: np.random.Generator, documents: int, chunks: int, dim: int) -> np.ndarray:
+    # Chunks of one CV sit close together, as overlapping chunks of one
+    # document do; documents themselves fall into a few broad profiles
+    profiles = rng.standard_normal((16, dim))
+    centres = profiles[rng.integers(0, len(profiles), documents)] + 0.8 * rng.standard_normal((documents, dim))
+    vectors = np.repeat(centres, chunks, axis=0) + 0.35 * rng.standard_normal((documents * chunks, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _pool(vectors: np.ndarray, query: np.ndarray, size: int, chunks: int):
+    scores = vectors @ query
+    top = np.argsort(-scores)[:size]
+    ids = [f"doc-{i // chunks}_chunk_{i % chunks}" for i in top.tolist()]
+    return ids, scores[top].tolist(), vectors[top]
+
+
+def _median_ms(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def _fetch_cost(backend_name: str, vectors: np.ndarray, pools: List[int], chunks: int, repeats: int) -> Dict[int, float]:
+    """Milliseconds to load a pool's embeddings back from the vector store."""
+    with tempfile.TemporaryDirectory() as root:
+        backend = create_backend(Settings(vector_backend=backend_name, chromadb_path=root, numpy_index_path=root))
+        ids = [f"doc-{i // chunks}_chunk_{i % chunks}" for i in range(len(vectors))]
+        for offset in range(0, len(ids), 1000):
+            batch = ids[offset:offset + 1000]
+            backend.upsert(
+                batch,
+                vectors[offset:offset + 1000].tolist(),
+                [f"chunk {i}" for i in batch],
+                [{"document_id": chunk_id.rsplit("_chunk_", 1)[0]} for chunk_id in batch]
+            )
+        backend.warm_up()
+        rng = np.random.default_rng(1)
+        costs = {}
+        for size in pools:
+            sample = [ids[i] for i in rng.choice(len(ids), size, replace=False)]
+            costs[size] = _median_ms(lambda: backend.get_embeddings(sample), repeats)
+        backend.close()
+    return costs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MMR and document grouping: cost by pool size, and coverage")
+    parser.add_argument("--pools", type=int, nargs="+", default=[50, 100, 200, 500])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--chunks-per-document", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--mmr-lambda", type=float, default=0.5)
+    parser.add_argument("--backend", choices=VECTOR_BACKENDS, default="chroma", help="Store timed for the embedding fetch")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    chunks = args.chunks_per_document
+    vectors = _corpus(rng, args.documents, chunks, args.dim)
+    queries = vectors[rng.integers(0, len(vectors), args.queries)] + 0.05 * rng.standard_normal(
+        (args.queries, args.dim)
+    ).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    rerankers = {
+        name: ResultReranker(mmr_lambda=args.mmr_lambda, **options) for name, options in RERANKERS.items()
+    }
+
+    print(
+        f"{len(vectors)} chunks ({args.documents} documents x {chunks}) x {args.dim} dims, "
+        f"top_k={args.top_k}, lambda={args.mmr_lambda}"
+    )
+    fetch = _fetch_cost(args.backend, vectors, args.pools, chunks, args.repeats)
+
+    print("\nRe-ranking cost per query (median ms)")
+    print(f"{'pool':>6} {'fetch (' + args.backend + ')':>16}" + "".join(f"{name:>12}" for name in rerankers))
+    for size in args.pools:
+        ids, scores, embeddings = _pool(vectors, queries[0], size, chunks)
+        costs = [
+            _median_ms(lambda: reranker.rerank(ids, scores, embeddings, args.top_k, queries[0]), args.repeats)
+            for reranker in rerankers.values()
+        ]
+        print(f"{size:>6} {fetch[size]:16.2f}" + "".join(f"{cost:12.3f}" for cost in costs))
+
+    # Coverage: distinct documents among the chunks kept, and how relevant
+    # those chunks still are compared with the plain top-k
+    print(f"\nCoverage over {args.queries} queries (pool {args.pools[0]})")
+    print(f"{'method':<12} {'chunks':>7} {'documents':>10} {'mean cosine':>12}")
+    rows = {"top-k": [], **{name: [] for name in rerankers}}
+    for query in queries:
+        ids, scores, embeddings = _pool(vectors, query, args.pools[0], chunks)
+        picks = {"top-k": list(range(args.top_k))}
+        picks.update({
+            name: reranker.rerank(ids, scores, embeddings, args.top_k, query) for name, reranker in rerankers.items()
+        })
+        for name, keep in picks.items():
+            documents = {ids[i].rsplit("_chunk_", 1)[0] for i in keep}
+            rows[name].append((len(keep), len(documents), float(np.mean([scores[i] for i in keep]))))
+    for name, values in rows.items():
+        kept, documents, cosine = (statistics.mean(column) for column in zip(*values))
+        print(f"{name:<12} {kept:7.1f} {documents:10.2f} {cosine:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
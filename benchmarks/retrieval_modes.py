@@ -0,0 +1,100 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from app.config import Settings
+from app.services.document_service import RETRIEVAL_MODES, DocumentService
+from app.utils.chunker import Chunk
+from app.utils.hashing import sha256_text
+from benchmarks.corpus import CERT_PREFIXES, COMPANIES, FIRST_NAMES, LAST_NAMES, SKILLS
+from benchmarks.fakes import FakeEmbeddingService, FakeLLMService
+
+
+def _build_corpus(rng: random.Random, documents: int) -> List[Tuple[List[Chunk], Dict[str, str]]]:
+    corpus = []
+    for i in range(documents):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        skills = rng.sample(SKILLS, 3)
+        company = rng.choice(COMPANIES)
+        cert = f"{rng.choice(CERT_PREFIXES)}-{rng.randrange(10000, 99999)}"
+        chunks = [
+            Chunk(f"{name} is a civil engineer applying for the site engineer position.", 1),
+            Chunk(
+                f"Worked {rng.randint(2, 20)} years at {company} on {skills[0]}, "
+                f"{skills[1]} and {skills[2]}.", 1
+            ),
+            Chunk(f"Certifications: {cert}. Languages: Arabic, English.", 2),
+        ]
+        queries = {
+            "certificate": f"Which candidate holds certificate {cert}?",
+            "descriptive": f"engineer experienced in {skills[0]} and {skills[2]} at {company}",
+        }
+        corpus.append((chunks, queries))
+    return corpus
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latency and recall of vector, lexical and hybrid retrieval")
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per embedding call")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = _build_corpus(rng, args.documents)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        settings = Settings(
+            chromadb_path=os.path.join(data_dir, "chroma"),
+            embedding_cache_enabled=False,
+            answer_cache_enabled=False,
+            top_k=args.top_k
+        )
+        embedding_service = FakeEmbeddingService(settings, call_latency=0.0, item_latency=0.0, bag_of_words=True)
+        service = DocumentService(
+            settings,
+            embedding_service=embedding_service,
+            llm_service=FakeLLMService(settings)
+        )
+
+        # Ground truth: the chunk each query was written against
+        cases: Dict[str, List[Tuple[str, str]]] = {"certificate": [], "descriptive": []}
+        for chunks, queries in corpus:
+            result = service.process_chunks(chunks, sha256_text("".join(c.text for c in chunks)))
+            cases["certificate"].append((queries["certificate"], f"{result.document_id}_chunk_2"))
+            cases["descriptive"].append((queries["descriptive"], f"{result.document_id}_chunk_1"))
+
+        embedding_service.call_latency = args.latency
+        print(f"{args.documents} documents, top_k={args.top_k}, simulated embedding latency={args.latency}s")
+        print(f"{'mode':<8} {'queries':<12} {'recall@k':>9} {'mean ms':>9} {'p95 ms':>9} {'embed calls':>12}")
+        for mode in RETRIEVAL_MODES:
+            for kind, items in cases.items():
+                sample = rng.sample(items, min(args.queries, len(items)))
+                calls_before = embedding_service.calls
+                hits = 0
+                timings = []
+                for question, relevant in sample:
+                    start = time.perf_counter()
+                    query_embedding = None
+                    if mode != "lexical":
+                        query_embedding = embedding_service.generate_query_embedding(question)
+                    chunk_ids = service._retrieve(question, query_embedding, None, mode).chunk_ids
+                    timings.append((time.perf_counter() - start) * 1000)
+                    hits += relevant in chunk_ids
+                p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+                print(
+                    f"{mode:<8} {kind:<12} {hits / len(sample):9.3f} {statistics.mean(timings):9.2f} "
+                    f"{p95:9.2f} {embedding_service.calls - calls_before:12d}"
+                )
+
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from app.config import Settings
+from app.services.container import ServiceContainer
+from app.services.document_service import DocumentService
+
+
+def _time_calls(fn: Callable[[], object], iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: List[float]) -> None:
+    print(
+        f"{label:<28} mean={statistics.mean(timings):8.3f} ms  "
+        f"p50={statistics.median(timings):8.3f} ms  max={max(timings):8.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-request service setup cost")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        settings = Settings(
+            chromadb_path=os.path.join(data_dir, "chroma"),
+            embedding_cache_path=os.path.join(data_dir, "embedding_cache.sqlite3")
+        )
+
+        # Old behaviour: a DocumentService built for every request
+        per_request = _time_calls(lambda: DocumentService(settings), args.iterations)
+
+        # New behaviour: one container built at startup, handlers only look it up
+        container = ServiceContainer(settings)
+        container.warm_up()
+        shared = _time_calls(lambda: container.document_service, args.iterations)
+        container.shutdown()
+
+    _report("DocumentService per request", per_request)
+    _report("Shared container", shared)
+
+
+if __name__ == "__main__":
+    main()
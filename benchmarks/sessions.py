@@ -0,0 +1,196 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.config import Settings
+from app.services.document_service import DocumentService
+from app.services.session_store import SessionStore
+from app.utils.chunker import Chunk
+from app.utils.context_packer import estimate_tokens
+from app.utils.hashing import sha256_text
+from benchmarks.corpus import CERT_PREFIXES, COMPANIES, FIRST_NAMES, LAST_NAMES, SKILLS
+from benchmarks.fakes import FakeEmbeddingService, FakeGenerativeModel, FakeLLMService
+
+
+class ExtractiveModel(FakeGenerativeModel):
+    # Answers with the top chunk, so like a real answer it names the
+    # candidate, and the rolling summary carries who a follow-up is about
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        context = prompt.split("[Chunk 1]\n", 1)[-1]
+        return context.split("\n", 1)[0].strip() or "I don't know based on the provided context."
+
+
+def _build_corpus(rng: random.Random, documents: int) -> List[Tuple[List[Chunk], Dict[str, str]]]:
+    corpus = []
+    for i in range(documents):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        skills = rng.sample(SKILLS, 3)
+        company = rng.choice(COMPANIES)
+        cert = f"{rng.choice(CERT_PREFIXES)}-{rng.randrange(10000, 99999)}"
+        chunks = [
+            Chunk(f"{name} is a civil engineer applying for the site engineer position.", 1),
+            Chunk(
+                f"{name} worked {rng.randint(2, 20)} years at {company} on {skills[0]}, "
+                f"{skills[1]} and {skills[2]}.", 1
+            ),
+            Chunk(f"{name} certifications: {cert}. Languages: Arabic, English.", 2),
+        ]
+        corpus.append((chunks, {"name": name, "company": company, "skill": skills[1]}))
+    return corpus
+
+
+def _conversation(facts: Dict[str, str], other: Dict[str, str]) -> List[Tuple[str, int]]:
+    # (question, chunk that answers it); follow-ups refer back with pronouns,
+    # and the last turn switches to another candidate
+    return [
+        (f"Tell me about {facts['name']} and their work at {facts['company']}", 1),
+        ("Which certifications do they hold?", 2),
+        (f"Have they worked on {facts['skill']}?", 1),
+        ("What position are they applying for?", 0),
+        (f"Which certifications does {other['name']} hold?", 2),
+    ]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _row(label: str, timings: List[float], hits: int, turns: int, searches: int, tokens: List[int]) -> None:
+    print(
+        f"{label:<12} {hits / turns:9.3f} {statistics.median(timings):8.1f} {_percentile(timings, 0.95):8.1f} "
+        f"{searches:9d} {statistics.mean(tokens):11.0f}"
+    )
+
+
+def eviction(max_mb: float, sessions: int, context_size: int, dim: int) -> None:
+    """Fill a store past its memory budget and report what it kept."""
+    store = SessionStore(ttl_seconds=3600, max_bytes=int(max_mb * 1024 * 1024))
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((context_size, dim)).astype(np.float32)
+    texts = ["x" * 600] * context_size
+    for i in range(sessions):
+        session = store.create()
+        session.set_context([f"doc-{i}_chunk_{j}" for j in range(context_size)], texts, embeddings)
+        store.save(session)
+    stats = store.stats()
+    per_session = stats["bytes"] / max(1, stats["sessions"])
+    print(
+        f"\n{sessions} sessions of {context_size} cached chunks into {max_mb} MB: kept {stats['sessions']}, "
+        f"evicted {stats['evictions']}, {stats['bytes'] / 1024 / 1024:.1f} MB used, ~{per_session / 1024:.0f} KB each"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi-turn sessions: context reuse, latency and prompt size vs stateless queries")
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--context-size", type=int, default=30)
+    # Word-overlap fake embeddings score lower than Gemini's, hence lower thresholds than the default 0.6
+    parser.add_argument("--reuse-min-score", type=float, nargs="+", default=[0.3, 0.4, 0.5])
+    parser.add_argument("--embedding-latency", type=float, default=0.05, help="Simulated seconds per embedding call")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per generation")
+    parser.add_argument("--memory-mb", type=float, default=4)
+    parser.add_argument("--eviction-sessions", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = _build_corpus(rng, args.documents)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        settings = Settings(
+            chromadb_path=os.path.join(data_dir, "chroma"),
+            embedding_cache_enabled=False,
+            answer_cache_enabled=False,
+            profile_extractor="none",
+            retrieval_mode="vector",
+            top_k=args.top_k,
+            session_context_size=args.context_size
+        )
+        embedding_service = FakeEmbeddingService(settings, call_latency=0.0, item_latency=0.0, bag_of_words=True)
+        service = DocumentService(
+            settings,
+            embedding_service=embedding_service,
+            llm_service=FakeLLMService(settings)
+        )
+        service.llm_service.model = ExtractiveModel(latency=args.llm_latency, token_latency=0.0)
+        documents = []
+        for chunks, facts in corpus:
+            result = service.process_chunks(chunks, sha256_text("".join(c.text for c in chunks)))
+            documents.append((result.document_id, facts))
+        embedding_service.call_latency = args.embedding_latency
+
+        print(
+            f"{args.documents} documents, {args.conversations} conversations of 5 turns, top_k={args.top_k}, "
+            f"embedding latency={args.embedding_latency}s"
+        )
+        print(f"{'mode':<12} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'searches':>9} {'prompt tok':>11}")
+
+        picks = [rng.sample(range(len(documents)), 2) for _ in range(args.conversations)]
+        turns = args.conversations * 5
+
+        # Stateless: every question on its own, as /documents/query sees it
+        timings, tokens, hits = [], [], 0
+        for first, second in picks:
+            for question, chunk in _conversation(documents[first][1], documents[second][1]):
+                target = documents[second if "does" in question else first][0]
+                start = time.perf_counter()
+                response = service.query_documents(question)
+                timings.append((time.perf_counter() - start) * 1000)
+                tokens.append(response.prompt_tokens or 0)
+                hits += f"{target}_chunk_{chunk}" in [source.chunk_id for source in response.source_chunks]
+        _row("stateless", timings, hits, turns, turns, tokens)
+
+        # Sessions: follow-ups re-rank the last search's chunks when they fit
+        for threshold in args.reuse_min_score:
+            service.settings.session_reuse_min_score = threshold
+            timings, tokens, hits, searches, reused = [], [], 0, 0, 0
+            by_path: Dict[bool, List[float]] = {True: [], False: []}
+            history_tokens: List[int] = []
+            transcript_tokens: List[int] = []
+            for first, second in picks:
+                session = service.create_session()
+                transcript = ""
+                for question, chunk in _conversation(documents[first][1], documents[second][1]):
+                    target = documents[second if "does" in question else first][0]
+                    summary = service.get_session(session.session_id).summary
+                    start = time.perf_counter()
+                    response = service.query_session(session.session_id, question)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    tokens.append(response.prompt_tokens or 0)
+                    hits += f"{target}_chunk_{chunk}" in [source.chunk_id for source in response.source_chunks]
+                    reused += response.context_reused
+                    by_path[response.context_reused].append(timings[-1])
+                    if summary:
+                        history_tokens.append(estimate_tokens(summary))
+                        transcript_tokens.append(estimate_tokens(transcript))
+                    transcript += f"Q: {question}\nA: {response.answer}\n"
+                searches += service.get_session(session.session_id).searches
+            _row(f"reuse>={threshold}", timings, hits, turns, searches, tokens)
+            split = ", ".join(
+                f"{label} p50 {statistics.median(by_path[path]):.1f} ms"
+                for path, label in ((True, "reused"), (False, "searched")) if by_path[path]
+            )
+            print(f"  context reused on {reused / turns:.0%} of turns ({split})")
+            print(
+                "  history per follow-up: "
+                f"summary {statistics.mean(history_tokens):.0f} tokens, "
+                f"full transcript {statistics.mean(transcript_tokens):.0f} tokens"
+            )
+
+        service.close()
+
+    eviction(args.memory_mb, args.eviction_sessions, args.context_size, 768)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.config import Settings
+from app.services.vector_backends import VECTOR_BACKENDS, create_backend
+from benchmarks.vector_backends import _clustered_vectors
+
+CHUNKS_PER_DOCUMENT = 10
+
+
+def _percentiles(timings: List[float]) -> Tuple[float, float]:
+    return statistics.median(timings), statistics.quantiles(timings, n=20)[-1]
+
+
+def _run(
+    backend_name: str,
+    shards: int,
+    data_dir: str,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    query_documents: List[str],
+    top_k: int
+) -> Dict:
+    root = os.path.join(data_dir, f"{backend_name}-{shards}")
+    settings = Settings(
+        vector_backend=backend_name,
+        vector_shards=shards,
+        chromadb_path=root,
+        numpy_index_path=root
+    )
+    backend = create_backend(settings)
+
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), 1000):
+        batch = vectors[offset:offset + 1000]
+        ids = [f"doc-{(offset + i) // CHUNKS_PER_DOCUMENT}_chunk_{(offset + i) % CHUNKS_PER_DOCUMENT}"
+               for i in range(len(batch))]
+        backend.upsert(
+            ids,
+            batch.tolist(),
+            [f"chunk {i}" for i in ids],
+            [{"document_id": chunk_id.rsplit("_chunk_", 1)[0]} for chunk_id in ids]
+        )
+    ingest = time.perf_counter() - start
+
+    backend.warm_up()
+    results, unfiltered, filtered = [], [], []
+    for query, document_id in zip(queries, query_documents):
+        start = time.perf_counter()
+        ids, _, _ = backend.query(query.tolist(), top_k=top_k)
+        unfiltered.append((time.perf_counter() - start) * 1000)
+        results.append(ids)
+
+        start = time.perf_counter()
+        backend.query(query.tolist(), top_k=top_k, document_id=document_id)
+        filtered.append((time.perf_counter() - start) * 1000)
+    backend.close()
+    return {
+        "ingest": ingest,
+        "unfiltered": _percentiles(unfiltered),
+        "filtered": _percentiles(filtered),
+        "results": results
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search latency and recall, unsharded vs sharded")
+    parser.add_argument("--backend", choices=VECTOR_BACKENDS, default="chroma")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = _clustered_vectors(rng, args.vectors, args.dim)
+    picks = rng.integers(0, args.vectors, args.queries)
+    queries = vectors[picks] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    # Each filtered query targets the document its unfiltered twin came from
+    query_documents = [f"doc-{i // CHUNKS_PER_DOCUMENT}" for i in picks]
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.top_k]
+    truth_ids = [
+        {f"doc-{i // CHUNKS_PER_DOCUMENT}_chunk_{i % CHUNKS_PER_DOCUMENT}" for i in row.tolist()}
+        for row in truth
+    ]
+
+    print(
+        f"{args.backend}: {args.vectors} vectors x {args.dim} dims, {args.queries} queries, "
+        f"top_k={args.top_k}"
+    )
+    print(
+        f"{'shards':>6} {'ingest s':>9} {'p50 ms':>8} {'p95 ms':>8} {'doc p50':>8} {'doc p95':>8} "
+        f"{'recall':>7} {'vs 1':>6}"
+    )
+    baseline = None
+    with tempfile.TemporaryDirectory() as data_dir:
+        for shards in args.shards:
+            run = _run(args.backend, shards, data_dir, vectors, queries, query_documents, args.top_k)
+            hits = sum(len(set(ids) & expected) for ids, expected in zip(run["results"], truth_ids))
+            if baseline is None:
+                baseline = run["results"]
+            # How many of the first layout's results the sharded search also returns
+            overlap = sum(len(set(a) & set(b)) for a, b in zip(run["results"], baseline))
+            print(
+                f"{shards:>6} {run['ingest']:9.2f} {run['unfiltered'][0]:8.2f} {run['unfiltered'][1]:8.2f} "
+                f"{run['filtered'][0]:8.2f} {run['filtered'][1]:8.2f} "
+                f"{hits / truth.size:7.3f} {overlap / truth.size:6.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
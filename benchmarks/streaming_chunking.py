@@ -0,0 +1,69 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.utils.chunker import TextChunker
+from app.utils.text_extractor import TextExtractor
+from benchmarks.pdf_writer import build_pdf
+
+PARAGRAPH = (
+    "Senior site engineer responsible for quay wall construction and dredging works. "
+    "Managed subcontractors, method statements and QA/QC inspections on port projects. "
+)
+
+
+def _run_mode(mode: str, path: str) -> None:
+    chunker = TextChunker()
+    start = time.perf_counter()
+    if mode == "whole":
+        chunks = iter(chunker.chunk_text(TextExtractor.extract_text(path, ".pdf")))
+    else:
+        chunks = chunker.chunk_pages(TextExtractor.iter_pages(path, ".pdf"))
+
+    first = None
+    count = 0
+    for _ in chunks:
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    total = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"{mode:<10} chunks={count:6d}  first chunk={first * 1000:9.1f} ms  "
+        f"total={total:7.2f} s  peak RSS={peak:7.1f} MiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Whole-document vs streaming extraction and chunking")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--lines-per-page", type=int, default=50)
+    parser.add_argument("--mode", choices=["whole", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        _run_mode(args.mode, args.path)
+        return
+
+    page_text = "\n".join(PARAGRAPH[:110] for _ in range(args.lines_per_page))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.pdf")
+        with open(path, "wb") as f:
+            f.write(build_pdf([page_text] * args.pages))
+
+        # Each mode runs in its own process so peak RSS is not shared
+        for mode in ("whole", "streaming"):
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.streaming_chunking", "--mode", mode, "--path", path],
+                check=True
+            )
+
+
+if __name__ == "__main__":
+    main()
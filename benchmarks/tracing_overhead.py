@@ -0,0 +1,89 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from app.config import Settings
+from app.services.document_service import DocumentService
+from app.utils import metrics, tracing
+from app.utils.chunker import Chunk
+from app.utils.hashing import sha256_text
+from benchmarks.fakes import FakeEmbeddingService, FakeLLMService
+
+
+def _time_calls(fn: Callable[[int], object], iterations: int) -> List[float]:
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def _traced(fn: Callable[[int], object]) -> Callable[[int], object]:
+    def run(i: int) -> object:
+        token = tracing._request_trace.set(tracing.RequestTrace())
+        try:
+            return fn(i)
+        finally:
+            tracing._request_trace.reset(token)
+    return run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cost of stage spans and metrics, off vs on vs traced")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--documents", type=int, default=200)
+    args = parser.parse_args()
+
+    def empty_span(_: int) -> None:
+        with tracing.span("bench"):
+            pass
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        settings = Settings(
+            chromadb_path=os.path.join(data_dir, "chroma"),
+            embedding_cache_enabled=False,
+            answer_cache_enabled=False,
+            retrieval_mode="lexical"
+        )
+        # Zero-latency fakes, so the pipeline's own work is all that is timed
+        service = DocumentService(
+            settings,
+            embedding_service=FakeEmbeddingService(settings, call_latency=0.0, item_latency=0.0),
+            llm_service=FakeLLMService(settings, latency=0.0, token_latency=0.0)
+        )
+        for i in range(args.documents):
+            text = f"Candidate {i} worked on marine piling and dredging for {i % 17} years."
+            service.process_chunks([Chunk(text, 1)], sha256_text(text))
+
+        def query(i: int) -> None:
+            service.query_documents(f"marine piling candidate {i % args.documents}")
+
+        modes = (
+            ("metrics off", False, lambda fn: fn),
+            ("metrics on", True, lambda fn: fn),
+            ("metrics on + trace", True, _traced),
+        )
+        # Modes take turns in short rounds so machine noise hits all of them alike
+        spans = {label: [] for label, _, _ in modes}
+        queries = {label: [] for label, _, _ in modes}
+        per_round = max(1, args.iterations // args.rounds)
+        for _ in range(args.rounds):
+            for label, enabled, wrap in modes:
+                metrics.set_enabled(enabled)
+                spans[label].append(statistics.median(_time_calls(wrap(empty_span), per_round)))
+                queries[label].append(statistics.median(_time_calls(wrap(query), per_round)))
+
+        print(f"{'':<22} {'span us':>9} {'query p50 us':>13}")
+        for label, _, _ in modes:
+            print(f"{label:<22} {statistics.median(spans[label]):9.2f} {statistics.median(queries[label]):13.1f}")
+        metrics.set_enabled(True)
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.config import Settings
+
+MODES = {
+    "chroma": {"vector_backend": "chroma"},
+    "numpy-float32": {"vector_backend": "numpy", "numpy_dtype": "float32"},
+    "numpy-float16": {"vector_backend": "numpy", "numpy_dtype": "float16"},
+}
+
+
+def _clustered_vectors(rng: np.random.Generator, count: int, dim: int, clusters: int = 64) -> np.ndarray:
+    # Embeddings of similar documents cluster; uniform noise would flatter neither index
+    centres = rng.standard_normal((clusters, dim))
+    vectors = centres[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _prepare(data_dir: str, count: int, dim: int, num_queries: int, top_k: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    vectors = _clustered_vectors(rng, count, dim)
+    queries = vectors[rng.integers(0, count, num_queries)] + 0.05 * rng.standard_normal(
+        (num_queries, dim)
+    ).astype(np.float32)
+    # Exact top-k by brute force is the recall reference
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :top_k]
+
+    np.save(os.path.join(data_dir, "vectors.npy"), vectors)
+    np.save(os.path.join(data_dir, "queries.npy"), queries)
+    np.save(os.path.join(data_dir, "truth.npy"), truth)
+
+
+def _run_mode(mode: str, data_dir: str, top_k: int) -> None:
+    from app.services.vector_backends import create_backend
+
+    vectors = np.load(os.path.join(data_dir, "vectors.npy"), mmap_mode="r")
+    queries = np.load(os.path.join(data_dir, "queries.npy"))
+    truth = np.load(os.path.join(data_dir, "truth.npy"))
+
+    settings = Settings(
+        chromadb_path=os.path.join(data_dir, mode, "chroma"),
+        numpy_index_path=os.path.join(data_dir, mode, "numpy"),
+        **MODES[mode]
+    )
+    backend = create_backend(settings)
+
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), 1000):
+        batch = np.asarray(vectors[offset:offset + 1000])
+        ids = [str(offset + i) for i in range(len(batch))]
+        backend.upsert(
+            ids,
+            batch.tolist(),
+            [f"chunk {i}" for i in ids],
+            [{"document_id": f"doc-{int(i) // 10}"} for i in ids]
+        )
+    ingest = time.perf_counter() - start
+
+    backend.warm_up()
+    timings = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        ids, _, _ = backend.query(query.tolist(), top_k=top_k)
+        timings.append((time.perf_counter() - start) * 1000)
+        hits += len(set(int(i) for i in ids) & set(expected.tolist()))
+    backend.close()
+
+    # ru_maxrss is KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"{mode:<14} ingest={ingest:7.2f} s  p50={statistics.median(timings):7.2f} ms  "
+        f"p95={statistics.quantiles(timings, n=20)[-1]:7.2f} ms  "
+        f"recall@{top_k}={hits / truth.size:6.3f}  peak RSS={peak:7.1f} MiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chroma vs NumPy exact-search vector backends")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=["prepare"] + list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode == "prepare":
+        _prepare(args.data_dir, args.vectors, args.dim, args.queries, args.top_k, args.seed)
+        return
+    if args.mode:
+        _run_mode(args.mode, args.data_dir, args.top_k)
+        return
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Data and ground truth are built in a child too, so the parent's
+        # memory never shows up in a backend's peak RSS
+        subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.vector_backends", "--mode", "prepare",
+                "--data-dir", data_dir, "--vectors", str(args.vectors), "--dim", str(args.dim),
+                "--queries", str(args.queries), "--top-k", str(args.top_k), "--seed", str(args.seed)
+            ],
+            check=True
+        )
+
+        print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, top_k={args.top_k}")
+        # Each backend runs in its own process so peak RSS is not shared
+        for mode in MODES:
+            subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.vector_backends",
+                    "--mode", mode, "--data-dir", data_dir, "--top-k", str(args.top_k)
+                ],
+                check=True
+            )
+
+
+if __name__ == "__main__":
+    main()